@@ -0,0 +1,306 @@
+"""Admission control for the ``/mcp`` endpoint: rate limits, concurrency caps and load shedding.
+
+``AdmissionMiddleware`` reads each JSON-RPC request before it reaches the MCP
+app and classifies it (e.g. ``tools/list`` or the name of the tool called):
+
+* every client has a token bucket; a client that runs dry gets ``429`` with a
+  ``Retry-After`` of when its next token arrives;
+* requests then need a slot: at most ``max_concurrency`` run at once, and at
+  most ``kind_limits[kind]`` of one kind, so one heavy tool cannot take every
+  slot;
+* requests without a slot wait in a bounded queue, served by priority and in
+  arrival order within a priority, so cheap listing calls go ahead of
+  searches. When the queue is full, a request pushes out the newest waiter of
+  a lower priority, or is itself turned away. Shed requests, and those that
+  waited longer than ``queue_timeout``, get ``503`` with a ``Retry-After`` right
+  away instead of timing out.
+
+Rejections are JSON-RPC error responses, so MCP clients report them as such.
+Decisions are counted by kind in the ``decisions`` counter.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Tuple
+import asyncio
+import json
+import math
+import time
+
+from instrumentation import Counter, Histogram
+
+# Priorities: lower is served first
+LIGHT = 0
+HEAVY = 1
+
+# JSON-RPC error code of rejected requests (implementation-defined server error range)
+OVERLOADED = -32000
+
+
+class TokenBuckets:
+    """A token bucket per client, refilled at ``rate`` per second up to ``burst``.
+
+    Only the ``max_clients`` most recently seen clients are remembered; a
+    forgotten client starts again with a full bucket.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_clients: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._clock = clock
+        # Client -> (tokens, last refill time)
+        self._buckets: OrderedDict[str, Tuple[float, float]] = OrderedDict()
+
+    def take(self, client: str) -> float:
+        """Spend a token of ``client``'s; returns 0, or the seconds until one is available."""
+        now = self._clock()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens < 1:
+            wait = (1 - tokens) / self.rate
+        else:
+            tokens -= 1
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """Concurrency slots, overall and per kind of request, handed out by priority."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        kind_limits: Dict[str, int] | None = None,
+        queue_size: int = 256,
+        queue_timeout: float = 2.0,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.kind_limits = dict(kind_limits or {})
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.running: Dict[str, int] = {}
+        self._total = 0
+        # Priority -> waiting (kind, future), oldest first
+        self._waiting: Dict[int, Deque[Tuple[str, asyncio.Future]]] = {}
+        self._queued = 0
+
+    def _has_slot(self, kind: str) -> bool:
+        limit = self.kind_limits.get(kind)
+        return self._total < self.max_concurrency and (limit is None or self.running.get(kind, 0) < limit)
+
+    def _start(self, kind: str) -> None:
+        self._total += 1
+        self.running[kind] = self.running.get(kind, 0) + 1
+
+    async def acquire(self, kind: str, priority: int) -> str:
+        """Wait for a slot; returns ``"admitted"`` or ``"queued"`` once running, or why it was shed."""
+        # Requests still waiting are held back by their own kind's limit, so this one may pass them
+        if self._has_slot(kind):
+            self._start(kind)
+            return "admitted"
+        if self._queued >= self.queue_size and not self._displace(priority):
+            return "queue_full"
+        future = asyncio.get_running_loop().create_future()
+        waiter = (kind, future)
+        self._waiting.setdefault(priority, deque()).append(waiter)
+        self._queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # The client went away: give up the place in line, or the slot if it was just granted
+            if not future.done():
+                self._forget(priority, waiter)
+            elif future.result():
+                self.release(kind)
+            raise
+        if future.done():
+            # Resolved with whether it got a slot or was pushed out of the queue
+            return "queued" if future.result() else "queue_full"
+        self._forget(priority, waiter)
+        return "queue_timeout"
+
+    def _forget(self, priority: int, waiter: Tuple[str, asyncio.Future]) -> None:
+        self._waiting[priority].remove(waiter)
+        self._queued -= 1
+        waiter[1].cancel()
+
+    def _displace(self, priority: int) -> bool:
+        """Shed the newest waiter of a lower priority than ``priority`` to make room; whether there was one."""
+        for lower in sorted(self._waiting, reverse=True):
+            if lower <= priority:
+                break
+            if self._waiting[lower]:
+                _, future = self._waiting[lower].pop()
+                self._queued -= 1
+                future.set_result(False)
+                return True
+        return False
+
+    def release(self, kind: str) -> None:
+        """Free a slot of ``kind`` and hand the freed capacity to the waiters first in line."""
+        self._total -= 1
+        self.running[kind] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for priority in sorted(self._waiting):
+            waiting = self._waiting[priority]
+            for waiter in list(waiting):
+                if self._total >= self.max_concurrency:
+                    return
+                kind, future = waiter
+                if self._has_slot(kind):
+                    waiting.remove(waiter)
+                    self._queued -= 1
+                    self._start(kind)
+                    future.set_result(True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the health endpoint."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": {kind: count for kind, count in self.running.items() if count},
+            "queued": {priority: len(waiting) for priority, waiting in self._waiting.items() if waiting},
+        }
+
+
+def client_key(scope: Dict[str, Any], header: bytes | None = None, trust_forwarded: bool = False) -> str:
+    """Identify the client of a request: by ``header`` if sent, else its address.
+
+    Behind a proxy, ``trust_forwarded`` takes the address from X-Forwarded-For.
+    """
+    forwarded = None
+    for name, value in scope["headers"]:
+        if header is not None and name == header and value:
+            return "id:" + value.decode("latin-1")
+        if name == b"x-forwarded-for":
+            forwarded = value
+    if trust_forwarded and forwarded:
+        return forwarded.split(b",")[0].strip().decode("latin-1")
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying rate limits and concurrency slots to JSON-RPC POSTs on ``paths``.
+
+    ``classify`` maps a parsed request body (``None`` if it is not JSON) to its
+    kind and priority. ``buckets`` is ``None`` to skip rate limiting.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        controller: AdmissionController,
+        classify: Callable[[Any], Tuple[str, int]],
+        decisions: Counter,
+        waits: Histogram,
+        buckets: TokenBuckets | None = None,
+        client_header: str | None = None,
+        trust_forwarded: bool = False,
+        paths: Tuple[str, ...] = ("/mcp",),
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.classify = classify
+        self.decisions = decisions
+        self.waits = waits
+        self.buckets = buckets
+        self.client_header = client_header.lower().encode("latin-1") if client_header else None
+        self.trust_forwarded = trust_forwarded
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        # Read the body to classify the request, then replay it to the app
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        try:
+            request = json.loads(body)
+        except ValueError:
+            request = None
+        kind, priority = self.classify(request)
+
+        if self.buckets is not None:
+            wait = self.buckets.take(client_key(scope, self.client_header, self.trust_forwarded))
+            if wait:
+                self.decisions.inc(kind, "rate_limited")
+                await _reject(send, 429, wait, request, "Rate limit exceeded")
+                return
+
+        started = time.perf_counter()
+        decision = await self.controller.acquire(kind, priority)
+        self.decisions.inc(kind, decision)
+        if decision == "queued":
+            self.waits.observe(time.perf_counter() - started, kind)
+        elif decision != "admitted":
+            await _reject(send, 503, self.controller.queue_timeout, request, "Server is overloaded")
+            return
+
+        replayed = False
+
+        async def replay() -> Dict[str, Any]:
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            self.controller.release(kind)
+
+
+async def _reject(send: Callable, status: int, retry_after: float, request: Any, reason: str) -> None:
+    """Answer with a JSON-RPC error and a Retry-After header, in whole seconds."""
+    seconds = max(1, math.ceil(retry_after))
+    body = json.dumps({
+        "jsonrpc": "2.0",
+        "id": request.get("id") if isinstance(request, dict) else None,
+        "error": {
+            "code": OVERLOADED,
+            "message": f"{reason}; retry in {seconds} s",
+            "data": {"retry_after": seconds},
+        },
+    }).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(seconds).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
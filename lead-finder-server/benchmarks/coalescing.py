@@ -0,0 +1,86 @@
+"""Bursts of identical tool calls, answered with and without request coalescing.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.coalescing --leads 100000 --burst 32
+
+Imports the server over ``--leads`` synthetic leads with the search result
+cache disabled, then sends ``--burst`` identical find-business-leads calls at
+once, ``--rounds`` times, through the coalescing handler and straight to the
+tool handler. Reports the time to answer a whole burst and how many searches
+were computed for it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from benchmarks.compare import save
+
+
+def _bursts(handle: Callable[[Any], Awaitable[Any]], request: Any, burst: int, rounds: int) -> Dict[str, Any]:
+    async def loop() -> list:
+        await handle(request)
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await asyncio.gather(*(handle(request) for _ in range(burst)))
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    timings = asyncio.run(loop())
+    return {
+        "best_ms": round(min(timings) * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+    }
+
+
+def run(count: int, burst: int, rounds: int) -> Dict[str, Any]:
+    """Time bursts of ``burst`` identical searches over ``count`` synthetic leads."""
+    os.environ["LEAD_CORPUS_SIZE"] = str(count)
+    os.environ["SEARCH_CACHE_TTL"] = "0"
+    os.environ.pop("LEAD_STORE_PATH", None)
+    import main
+    import mcp.types as types
+
+    request = types.CallToolRequest(
+        method="tools/call",
+        params=types.CallToolRequestParams(
+            name="find-business-leads",
+            arguments={"industry": "SaaS", "keywords": "prospecting", "limit": 20},
+        ),
+    )
+    computed = main.TOOL_CALLS.computed
+    coalesced = _bursts(main._coalesced_call_tool_request, request, burst, rounds)
+    coalesced["searches_per_burst"] = round((main.TOOL_CALLS.computed - computed - 1) / rounds, 2)
+    separate = _bursts(main._call_tool_request, request, burst, rounds)
+    separate["searches_per_burst"] = burst
+    return {
+        "leads": len(main.LEAD_STORE),
+        "burst": burst,
+        "coalesced": coalesced,
+        "separate": separate,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=100_000, help="Synthetic leads in the server's corpus")
+    parser.add_argument("--burst", type=int, default=32, help="Identical calls sent at once")
+    parser.add_argument("--rounds", type=int, default=10, help="Bursts per variant")
+    parser.add_argument("--output", help="Also save the results to this JSON file, for benchmarks.compare")
+    args = parser.parse_args()
+    results = run(args.leads, args.burst, args.rounds)
+    if args.output:
+        save(args.output, "coalescing", {"leads": args.leads, "burst": args.burst}, results)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
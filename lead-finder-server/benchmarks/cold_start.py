@@ -0,0 +1,99 @@
+"""Cold-start benchmark: opening a saved lead snapshot versus building the store.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.cold_start --leads 1000000
+
+Builds a store of synthetic leads, saves it, then opens it in fresh processes
+and times the open, a first filtered search and materialising its first page
+of leads. With ``--appended`` leads added after the snapshot, the open also
+replays them from the append log.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+from lead_store import SEED_LEADS, LeadStore, synthetic_leads
+
+# Runs in a fresh interpreter, so nothing is shared with the building process but the page cache
+_PROBE = """
+import json, sys, time
+from lead_store import LeadStore
+started = time.perf_counter()
+store = LeadStore.open(sys.argv[1])
+opened = time.perf_counter()
+rows = store.search(industry="SaaS", region="Austin")
+searched = time.perf_counter()
+store.leads(rows[:20])
+done = time.perf_counter()
+print(json.dumps({
+    "leads": len(store),
+    "open_ms": round((opened - started) * 1000, 1),
+    "first_search_ms": round((searched - opened) * 1000, 1),
+    "first_page_ms": round((done - searched) * 1000, 1),
+}))
+"""
+
+
+def _probe(path: str) -> Dict[str, Any]:
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE, path], cwd=server_dir, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def run(count: int, appended: int, repeat: int) -> Dict[str, Any]:
+    """Build and save a store of ``count`` leads, log ``appended`` more, and time opening it."""
+    leads = synthetic_leads(count + appended)
+    started = time.perf_counter()
+    store = LeadStore(SEED_LEADS)
+    for _, lead in zip(range(count), leads):
+        store.add(lead)
+    build_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as path:
+        started = time.perf_counter()
+        store.save(path)
+        save_seconds = time.perf_counter() - started
+        del store
+        if appended:
+            opened = LeadStore.open(path)
+            for lead in leads:
+                opened.add(lead)
+            del opened
+        snapshot_bytes = sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+        )
+        opens = [_probe(path) for _ in range(repeat)]
+
+    best = min(opens, key=lambda probe: probe["open_ms"])
+    return {
+        "leads": best["leads"],
+        "appended": appended,
+        "build_seconds": round(build_seconds, 1),
+        "save_seconds": round(save_seconds, 1),
+        "snapshot_mb": round(snapshot_bytes / 2**20, 1),
+        **{key: value for key, value in best.items() if key != "leads"},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=200_000, help="Leads in the snapshot")
+    parser.add_argument("--appended", type=int, default=0, help="Leads added to the append log after it")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes to open the store in")
+    args = parser.parse_args()
+    print(json.dumps(run(args.leads, args.appended, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Compare two saved benchmark results, e.g. from two commits.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.handlers --output results/before.json
+    # ... change something ...
+    python -m benchmarks.handlers --output results/after.json
+    python -m benchmarks.compare results/before.json results/after.json
+
+``save`` writes a benchmark's results together with the commit, Python
+version and CPU count they were measured on. Comparing prints every numeric
+measurement present in both files with its relative change, and exits
+non-zero if a latency or memory figure grew, or a throughput figure shrank,
+by more than ``--threshold``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Tuple
+
+# Key fragments of measurements where lower is better, and where higher is
+LOWER_IS_BETTER = ("_us", "_ms", "_seconds", "p50", "p95", "p99", "rss", "_mb", "errors")
+HIGHER_IS_BETTER = ("rps", "per_second")
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(path: str, benchmark: str, params: Dict[str, Any], results: Dict[str, Any]) -> None:
+    """Write ``results`` of ``benchmark`` run with ``params`` to ``path`` as JSON."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump({
+            "benchmark": benchmark,
+            "commit": _commit(),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "params": params,
+            "results": results,
+        }, file, indent=2)
+
+
+def _measurements(value: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield ``(dotted.path, number)`` for every numeric leaf of ``value``."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _measurements(item, f"{prefix}{key}.")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix[:-1], float(value)
+
+
+def _direction(key: str) -> int:
+    """+1 if an increase of measurement ``key`` is a regression, -1 if a decrease is, else 0."""
+    name = key.rsplit(".", 1)[-1]
+    if any(fragment in name for fragment in HIGHER_IS_BETTER):
+        return -1
+    if any(fragment in name for fragment in LOWER_IS_BETTER):
+        return 1
+    return 0
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    """Relative change of every measurement in both results, and the regressions beyond ``threshold``."""
+    old = dict(_measurements(before["results"]))
+    changes = {}
+    regressions = []
+    for key, value in _measurements(after["results"]):
+        if key not in old:
+            continue
+        if old[key]:
+            change = (value - old[key]) / old[key]
+            regressed = _direction(key) * change > threshold
+            change = round(change, 3)
+        else:
+            # No relative change from zero, e.g. errors appearing
+            change = None if value else 0.0
+            regressed = _direction(key) * value > 0
+        changes[key] = {"before": old[key], "after": value, "change": change}
+        if regressed:
+            regressions.append(key)
+    return {
+        "benchmark": after["benchmark"],
+        "commits": [before.get("commit"), after.get("commit")],
+        "changes": changes,
+        "regressions": regressions,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before", help="Baseline results file")
+    parser.add_argument("after", help="Results file to check against it")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    args = parser.parse_args()
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+    if before["benchmark"] != after["benchmark"] or before["params"] != after["params"]:
+        print("warning: the results come from different benchmarks or parameters", file=sys.stderr)
+    report = compare(before, after, args.threshold)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
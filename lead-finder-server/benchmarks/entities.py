@@ -0,0 +1,137 @@
+"""Entity resolution benchmark: build time, accuracy and the cost at query time.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.entities --leads 100000
+
+Resolves stores of a quarter of ``--leads`` and of ``--leads`` synthetic leads;
+the time per lead should stay about the same. Synthetic prospects are
+identified by their email address, so the result is checked against it: an
+entity holding two addresses is a false merge, and an address spread over two
+entities is a missed one. Then times ``collapse`` over the whole store and over
+a filtered search, combined lead materialization against plain rows,
+resolving leads added after the build, and saving the index and opening it again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import timeit
+from collections import defaultdict
+from typing import Any, Dict, Set
+
+import numpy as np
+
+from benchmarks.compare import save
+from entity_resolution import EntityIndex, open_entity_index
+from lead_store import SEED_LEADS, LeadStore, synthetic_leads
+
+ADDED = 2000
+
+
+def _store(count: int) -> LeadStore:
+    store = LeadStore(SEED_LEADS)
+    for lead in synthetic_leads(count):
+        store.add(lead)
+    return store
+
+
+def _build(store: LeadStore) -> Dict[str, Any]:
+    started = time.perf_counter()
+    index = EntityIndex(store)
+    seconds = time.perf_counter() - started
+    return {
+        "leads": len(store),
+        "seconds": round(seconds, 2),
+        "us_per_lead": round(seconds / len(store) * 1e6, 1),
+        "index": index,
+    }
+
+
+def _accuracy(store: LeadStore, index: EntityIndex) -> Dict[str, Any]:
+    rows = range(len(store))
+    emails_of: Dict[int, Set[str]] = defaultdict(set)
+    entities_of: Dict[str, Set[int]] = defaultdict(set)
+    for row, email in zip(rows, store.text_values("email", rows)):
+        emails_of[index.entity(row)].add(email)
+        entities_of[email].add(index.entity(row))
+    return {
+        "prospects": len(entities_of),
+        "entities": len(index),
+        "false_merges": sum(len(emails) - 1 for emails in emails_of.values()),
+        "missed_merges": sum(len(entities) - 1 for entities in entities_of.values()),
+    }
+
+
+def _ms(function: Any, number: int) -> float:
+    return round(min(timeit.repeat(function, number=number, repeat=3)) / number * 1000, 3)
+
+
+def run(count: int) -> Dict[str, Any]:
+    """Resolve ``count`` synthetic leads and time the index's operations."""
+    small = _build(_store(count // 4))
+    small.pop("index")
+    store = _store(count)
+    build = _build(store)
+    index = build.pop("index")
+
+    everything = np.arange(len(store))
+    filtered = store.search(industry="SaaS")
+    scores = store.numeric("lead_score")
+    rows = list(everything[index.collapse(everything, scores)][:100])
+    for row in rows:
+        index.lead(row)
+    query = {
+        "collapse_all_ms": _ms(lambda: index.collapse(everything, scores), 20),
+        "collapse_filtered_ms": _ms(lambda: index.collapse(filtered, scores[filtered]), 100),
+        "filtered_rows": len(filtered),
+        "filtered_entities": len(index.collapse(filtered, scores[filtered])),
+        "store_lead_us": round(_ms(lambda: [store.lead(row) for row in rows], 20) * 10, 2),
+        "combined_lead_us": round(_ms(lambda: [index.lead(row) for row in rows], 20) * 10, 2),
+    }
+
+    started = time.perf_counter()
+    for lead in synthetic_leads(ADDED, seed=1):
+        lead["id"] += "-added"
+        store.add(lead)
+    added_us = (time.perf_counter() - started) / ADDED * 1e6
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "entities")
+        started = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter()
+        reopened = open_entity_index(store, path)
+        saving = {
+            "save_seconds": round(saved - started, 2),
+            "open_ms": round((time.perf_counter() - saved) * 1000, 1),
+            "same_entities": len(reopened) == len(index),
+        }
+
+    return {
+        "build": [small, build],
+        "accuracy": _accuracy(store, index),
+        "query": query,
+        "saved": saving,
+        "add_us_per_lead": round(added_us, 1),
+        "stats": index.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=100_000, help="Synthetic leads to resolve")
+    parser.add_argument("--output", help="Also save the results to this JSON file, for benchmarks.compare")
+    args = parser.parse_args()
+    results = run(args.leads)
+    if args.output:
+        save(args.output, "entities", {"leads": args.leads}, results)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Micro-benchmarks of the server's hot paths: lead generation, metrics and MCP handlers.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.handlers --leads 100000 --output results/handlers.json
+
+Imports the server with a corpus of ``--leads`` synthetic leads (kept in
+memory, whatever ``LEAD_STORE_PATH`` says) and times each operation in a loop,
+reporting the best and median time per call over ``--repeat`` rounds. Handlers
+are awaited directly, without the HTTP transport; ``benchmarks.load`` covers
+that end to end. The output mode operations also serialize the result to JSON
+and report its size, plain and gzipped, for a page of 100 leads.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from benchmarks.compare import save
+
+# Leads generated or added per call in the corpus benchmarks
+BATCH = 1000
+# Leads per find-business-leads response in the output mode benchmarks
+PAGE = 100
+
+
+def _stats(timings: list, number: int) -> Dict[str, Any]:
+    per_call = [elapsed / number for elapsed in timings]
+    return {
+        "calls": number * len(timings),
+        "best_us": round(min(per_call) * 1e6, 2),
+        "median_us": round(statistics.median(per_call) * 1e6, 2),
+    }
+
+
+def _time(call: Callable[[], Any], number: int, repeat: int) -> Dict[str, Any]:
+    call()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            call()
+        timings.append(time.perf_counter() - started)
+    return _stats(timings, number)
+
+
+def _time_async(call: Callable[[], Awaitable[Any]], number: int, repeat: int) -> Dict[str, Any]:
+    async def loop() -> list:
+        await call()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                await call()
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    return _stats(asyncio.run(loop()), number)
+
+
+def run(count: int, number: int, repeat: int) -> Dict[str, Any]:
+    """Import the server over ``count`` synthetic leads and time its hot paths."""
+    os.environ["LEAD_CORPUS_SIZE"] = str(count)
+    os.environ.pop("LEAD_STORE_PATH", None)
+    started = time.perf_counter()
+    import main
+    import mcp.types as types
+    from lead_metrics import LeadMetrics
+    from lead_store import SEED_LEADS, LeadStore, synthetic_leads
+    import_seconds = time.perf_counter() - started
+
+    store = main.LEAD_STORE
+    leads = list(synthetic_leads(BATCH))
+    page = store.leads(store.search(industry="SaaS")[:20])
+    matched = store.search(industry="SaaS")
+    payload = main.LeadSearchInput(industry="SaaS", keywords="prospecting", limit=20)
+    widget = main.widgets[0]
+    list_request = types.ListToolsRequest(method="tools/list")
+    read_request = types.ReadResourceRequest(
+        method="resources/read",
+        params=types.ReadResourceRequestParams(uri=widget.template_uri),
+    )
+    call_request = types.CallToolRequest(
+        method="tools/call",
+        params=types.CallToolRequestParams(name="find-business-leads", arguments={"industry": "SaaS", "limit": 20}),
+    )
+
+    def output_mode(output: str) -> Dict[str, Any]:
+        """Time a cached find-business-leads call in ``output`` mode, serialized as the transport does."""
+        request = types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(
+                name="find-business-leads", arguments={"industry": "SaaS", "limit": PAGE, "output": output},
+            ),
+        )
+
+        async def call_and_serialize() -> bytes:
+            result = await main._call_tool_request(request)
+            return result.model_dump_json(by_alias=True, exclude_none=True).encode()
+
+        body = asyncio.run(call_and_serialize())
+        return {
+            "leads": len(json.loads(body)["structuredContent"]["leads"]),
+            "response_bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+            **_time_async(call_and_serialize, few, repeat),
+        }
+
+    def add_batch() -> None:
+        batch = LeadStore(SEED_LEADS)
+        for lead in leads:
+            batch.add({**lead, "id": f"{lead['id']}-copy"})
+
+    few = max(1, number // 100)
+    results = {
+        f"synthetic_leads_x{BATCH}": _time(lambda: list(synthetic_leads(BATCH)), few, repeat),
+        f"lead_store_add_x{BATCH}": _time(add_batch, few, repeat),
+        "lead_metrics_page": _time(lambda: LeadMetrics.from_leads(page), number, repeat),
+        "summarize_matched_set": {
+            "rows": len(matched),
+            **_time(lambda: store.summarize(matched), few, repeat),
+        },
+        "match_rows": _time(lambda: main._match_rows(payload), few, repeat),
+        "search_leads_uncached": _time(lambda: main._search_leads(payload), few, repeat),
+        "embedded_widget_resource": _time(lambda: main._embedded_widget_resource(widget), number, repeat),
+        "list_tools": _time_async(lambda: main._list_tools(list_request), number, repeat),
+        "list_tools_json": _time(
+            lambda: main.TOOLS_MANIFEST.model_dump_json(by_alias=True, exclude_none=True), number, repeat,
+        ),
+        "read_resource": _time_async(lambda: main._handle_read_resource(read_request), number, repeat),
+        "call_tool_cached_search": _time_async(lambda: main._call_tool_request(call_request), number, repeat),
+        **{f"call_tool_{output}_json": output_mode(output) for output in ("detailed_table", "summary", "compact_list")},
+    }
+    return {"leads": len(store), "import_seconds": round(import_seconds, 1), "operations": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=100_000, help="Synthetic leads in the server's corpus")
+    parser.add_argument("--number", type=int, default=1000, help="Calls per round of the fast operations")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds per operation")
+    parser.add_argument("--output", help="Also save the results to this JSON file, for benchmarks.compare")
+    args = parser.parse_args()
+    results = run(args.leads, args.number, args.repeat)
+    if args.output:
+        save(args.output, "handlers", {"leads": args.leads, "number": args.number}, results)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Ingestion throughput benchmark: raw conversation dumps into a live lead store.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.ingestion --posts 200000 --workers 4
+
+Writes a JSON-lines dump of synthetic LinkedIn, Reddit and Twitter posts in
+their native shapes (with repeat authors, re-delivered URLs, posts without
+intent and malformed lines), then streams it into a store with the vector
+index attached, once in-process and once with a process pool, and reports
+records per second against a 10k-posts-per-minute feed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+from typing import Any, Dict, Iterator
+
+from ingestion import IngestionPipeline, read_jsonl
+from lead_store import SEED_LEADS, LeadStore
+from vector_index import open_vector_index
+
+FEED_POSTS_PER_MINUTE = 10_000
+
+_NAMES = ["Sarah Johnson", "Michael Chen", "Priya Patel", "David Kim", "Olivia Garcia", "Omar Okafor"]
+_TITLES = ["VP of Marketing", "Head of Sales", "Marketing Director", "CEO", "RevOps Manager", "Engineer"]
+_COMPANIES = ["TechCorp", "GrowthCo", "DataLabs", "CloudWorks", "FinSystems"]
+_LOCATIONS = ["Austin, TX", "Boston, MA", "San Francisco, CA", "Toronto, ON"]
+_TEXTS = [
+    "Looking for a good CRM software, our team is struggling with manual prospecting.",
+    "Anyone switched marketing automation vendors recently? Need help with data silos asap",
+    "Recommendations for campaign analytics tools that can prove ROI this quarter?",
+    "We are evaluating sales automation and lead generation platforms, demo of yours?",
+    "Great offsite with the team this week!",
+    "Hot take: most dashboards are vanity metrics.",
+]
+
+
+def synthetic_posts(count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield ``count`` raw posts; about 5% repeat an earlier author."""
+    rng = random.Random(seed)
+    for n in range(count):
+        author_n = rng.randrange(n) if n and rng.random() < 0.05 else n
+        name = _NAMES[author_n % len(_NAMES)]
+        handle = f"{name.split()[0].lower()}{author_n}"
+        text = rng.choice(_TEXTS)
+        platform = ("linkedin", "reddit", "twitter")[n % 3]
+        if platform == "linkedin":
+            yield {
+                "platform": "linkedin",
+                "url": f"https://linkedin.com/posts/{handle}-{n}",
+                "author": {
+                    "handle": handle,
+                    "name": name,
+                    "headline": f"{rng.choice(_TITLES)} at {rng.choice(_COMPANIES)}",
+                    "location": rng.choice(_LOCATIONS),
+                    "company_size": rng.choice(["1-50", "51-200", "201-1000"]),
+                },
+                "text": text,
+                "created_at": "2026-10-01T12:00:00Z",
+                "reactions": rng.randrange(200),
+                "comments": rng.randrange(30),
+            }
+        elif platform == "reddit":
+            yield {
+                "subreddit": "sales",
+                "permalink": f"/r/sales/comments/{n:x}/post/",
+                "author": handle,
+                "title": text.split(",")[0],
+                "selftext": text,
+                "created_utc": 1790000000 + n,
+                "score": rng.randrange(100),
+                "num_comments": rng.randrange(40),
+            }
+        else:
+            yield {
+                "id": str(10**15 + n),
+                "full_text": text,
+                "user": {"screen_name": handle, "name": name, "location": rng.choice(_LOCATIONS)},
+                "created_at": "Thu Oct 01 12:00:00 +0000 2026",
+                "public_metrics": {"like_count": rng.randrange(50), "retweet_count": rng.randrange(10)},
+            }
+
+
+def _ingest(path: str, workers: int, batch_size: int) -> Dict[str, Any]:
+    store = LeadStore(SEED_LEADS)
+    open_vector_index(store)
+    pipeline = IngestionPipeline(store, workers=workers, batch_size=batch_size)
+    stats = pipeline.run(read_jsonl([path])).as_dict()
+    stats["store_leads"] = len(store)
+    stats["feed_headroom"] = round(stats["records_per_second"] * 60 / FEED_POSTS_PER_MINUTE, 1)
+    return stats
+
+
+def run(posts: int, workers: int, batch_size: int) -> Dict[str, Any]:
+    """Write ``posts`` raw posts (plus a malformed line per thousand) and ingest them."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "posts.jsonl")
+        with open(path, "w") as file:
+            for n, post in enumerate(synthetic_posts(posts)):
+                file.write(json.dumps(post) + "\n")
+                if n % 1000 == 999:
+                    file.write("{not json\n")
+        results = {"in_process": _ingest(path, 0, batch_size)}
+        if workers > 0:
+            results[f"{workers}_workers"] = _ingest(path, workers, batch_size)
+    return {"posts": posts, "feed_posts_per_minute": FEED_POSTS_PER_MINUTE, **results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=100_000, help="Posts in the dump")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Pool processes for the second run")
+    parser.add_argument("--batch-size", type=int, default=500, help="Posts per worker batch")
+    args = parser.parse_args()
+    print(json.dumps(run(args.posts, args.workers, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
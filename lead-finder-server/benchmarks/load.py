@@ -0,0 +1,268 @@
+"""End-to-end load test: JSON-RPC traffic against the server's ``/mcp`` endpoint.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.load --leads 100000 --concurrency 32 --duration 30
+    python -m benchmarks.load --workers 4 --output results/load.json
+
+Starts the server with uvicorn (``--workers`` processes over a corpus of
+``--leads`` synthetic leads) on a free port, or targets ``--url`` instead, and
+keeps ``--concurrency`` clients sending requests back to back for
+``--duration`` seconds. Traffic mixes ``tools/list`` with ``tools/call`` of
+find-business-leads (filter combinations drawn at random, so some repeat and
+hit the result cache) and analyze-lead-trends. Reports latency percentiles per
+request kind, requests per second and the resident memory of the server
+processes, which is read from ``/proc`` (Linux only; pass ``--server-pid`` for
+a server started elsewhere). The client runs on the same machine and competes
+with the server for CPU.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks.compare import save
+
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+INDUSTRIES = ["SaaS", "FinTech", "Healthcare", "E-commerce", "Manufacturing", None]
+REGIONS = ["Austin", "San Francisco", "Boston", "New York", None]
+ROLES = [["VP of Marketing"], ["Head of Sales", "CEO"], None]
+KEYWORDS = ["prospecting", "CRM software", "marketing automation", None]
+
+
+def _request(rng: random.Random, list_share: float) -> Tuple[str, Dict[str, Any]]:
+    """A random request kind and its JSON-RPC params."""
+    draw = rng.random()
+    if draw < list_share:
+        return "tools/list", {}
+    if draw < list_share + (1 - list_share) * 0.1:
+        return "analyze-lead-trends", {
+            "name": "analyze-lead-trends",
+            "arguments": {"time_range": rng.choice(["7d", "30d", "90d"])},
+        }
+    arguments = {
+        "industry": rng.choice(INDUSTRIES),
+        "region": rng.choice(REGIONS),
+        "contact_roles": rng.choice(ROLES),
+        "keywords": rng.choice(KEYWORDS),
+        "limit": rng.choice([5, 10, 20]),
+    }
+    return "find-business-leads", {
+        "name": "find-business-leads",
+        "arguments": {key: value for key, value in arguments.items() if value is not None},
+    }
+
+
+def _failed(response: httpx.Response) -> bool:
+    """Whether a response carries an HTTP, JSON-RPC or tool error."""
+    if response.status_code != 200:
+        return True
+    body = response.text
+    if not body.startswith("{"):
+        # Server-sent event stream: the message is on its data line
+        body = next((line[5:] for line in body.splitlines() if line.startswith("data:")), "{}")
+    message = json.loads(body)
+    return "error" in message or bool(message.get("result", {}).get("isError"))
+
+
+async def _client(
+    client: httpx.AsyncClient,
+    url: str,
+    deadline: float,
+    seed: int,
+    list_share: float,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+) -> None:
+    rng = random.Random(seed)
+    request_id = 0
+    while time.perf_counter() < deadline:
+        kind, params = _request(rng, list_share)
+        request_id += 1
+        body = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "tools/list" if kind == "tools/list" else "tools/call",
+            "params": params,
+        }
+        started = time.perf_counter()
+        try:
+            response = await client.post(url, json=body, headers=HEADERS)
+            failed = _failed(response)
+        except (httpx.HTTPError, ValueError):
+            failed = True
+        latencies.setdefault(kind, []).append(time.perf_counter() - started)
+        if failed:
+            errors[kind] = errors.get(kind, 0) + 1
+
+
+def _rss_mb(pid: int) -> float | None:
+    """Resident memory of process ``pid`` and its descendants, in MiB (Linux only)."""
+    children: Dict[int, List[int]] = {}
+    try:
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                with open(f"/proc/{entry}/stat") as file:
+                    # The command name may contain spaces; fields after it are fixed
+                    parent = int(file.read().rsplit(")", 1)[1].split()[1])
+                children.setdefault(parent, []).append(int(entry))
+    except OSError:
+        return None
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, ()))
+        try:
+            with open(f"/proc/{current}/status") as file:
+                for line in file:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return round(total / 1024, 1)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(count: int, workers: int, startup_timeout: float) -> Tuple[subprocess.Popen, str]:
+    """Start the server over ``count`` synthetic leads and wait until it answers."""
+    port = _free_port()
+    env = {**os.environ, "LEAD_CORPUS_SIZE": str(count), "WEB_CONCURRENCY": str(workers)}
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=server_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(
+                f"server exited during startup with code {process.returncode}; run it with uvicorn to see why"
+            )
+        try:
+            if httpx.get(f"{base}/", timeout=1).status_code == 200:
+                return process, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("server did not start in time")
+
+
+def _summary(latencies: List[float], errors: int, seconds: float) -> Dict[str, Any]:
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (0.0, 0.0, 0.0)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / seconds, 1),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+    }
+
+
+async def _load(base: str, concurrency: int, duration: float, list_share: float, pid: int | None) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        url = f"{base}/mcp"
+        # A second of untimed traffic first, so the timed run starts warm
+        await _client(client, url, time.perf_counter() + 1, -1, list_share, {}, {})
+        rss_before = _rss_mb(pid) if pid else None
+        peak = rss_before
+        started = time.perf_counter()
+        deadline = started + duration
+        clients = asyncio.gather(*(
+            _client(client, url, deadline, seed, list_share, latencies, errors) for seed in range(concurrency)
+        ))
+        while not clients.done():
+            await asyncio.wait([clients], timeout=0.5)
+            if pid:
+                rss = _rss_mb(pid)
+                peak = max(peak or 0.0, rss or 0.0)
+        await clients
+        seconds = time.perf_counter() - started
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        "overall": _summary(everything, sum(errors.values()), seconds),
+        "by_kind": {
+            kind: _summary(values, errors.get(kind, 0), seconds) for kind, values in sorted(latencies.items())
+        },
+        "server_rss_mb": {"before": rss_before, "peak": peak, "after": _rss_mb(pid) if pid else None},
+    }
+
+
+def run(
+    count: int,
+    workers: int,
+    concurrency: int,
+    duration: float,
+    list_share: float,
+    url: str | None = None,
+    server_pid: int | None = None,
+) -> Dict[str, Any]:
+    """Load the server at ``url``, or one started over ``count`` leads, for ``duration`` seconds."""
+    process = None
+    if url is None:
+        process, url = _start_server(count, workers, startup_timeout=600)
+        server_pid = process.pid
+    try:
+        results = asyncio.run(_load(url.rstrip("/"), concurrency, duration, list_share, server_pid))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return {
+        "leads": count if process is not None else None,
+        "workers": workers if process is not None else None,
+        "concurrency": concurrency,
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=100_000, help="Synthetic leads in the started server's corpus")
+    parser.add_argument("--workers", type=int, default=1, help="Server worker processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clients sending requests back to back")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load")
+    parser.add_argument("--list-share", type=float, default=0.2, help="Share of requests that are tools/list")
+    parser.add_argument("--url", help="Load an already running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID of the server at --url, to report its memory")
+    parser.add_argument("--output", help="Also save the results to this JSON file, for benchmarks.compare")
+    args = parser.parse_args()
+    results = run(
+        args.leads, args.workers, args.concurrency, args.duration, args.list_share, args.url, args.server_pid,
+    )
+    if args.output:
+        params = {
+            key: getattr(args, key) for key in ("leads", "workers", "concurrency", "duration", "list_share", "url")
+        }
+        save(args.output, "load", params, results)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
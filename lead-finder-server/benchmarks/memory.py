@@ -0,0 +1,66 @@
+"""Memory benchmark: columnar LeadStore vs. the nested-dict lead layout.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.memory --leads 100000
+
+Both layouts are built from the same JSON-decoded corpus, so neither benefits
+from the string sharing of the synthetic generator. Sizes are measured with
+``tracemalloc`` and reported per lead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from lead_store import LeadStore, synthetic_leads
+
+
+def _measure(build: Callable[[], Any]) -> int:
+    """Return the bytes still allocated by the object ``build`` returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def run(count: int) -> Dict[str, Any]:
+    """Measure both layouts for a corpus of ``count`` leads."""
+    encoded = [json.dumps(lead) for lead in synthetic_leads(count)]
+
+    def build_dicts() -> List[Any]:
+        leads = [json.loads(line) for line in encoded]
+        return [leads, {lead["id"]: lead for lead in leads}]
+
+    def build_store() -> LeadStore:
+        return LeadStore(json.loads(line) for line in encoded)
+
+    dict_bytes = _measure(build_dicts)
+    store_bytes = _measure(build_store)
+    return {
+        "leads": count,
+        "dict_layout_bytes": dict_bytes,
+        "columnar_store_bytes": store_bytes,
+        "dict_bytes_per_lead": round(dict_bytes / count, 1),
+        "columnar_bytes_per_lead": round(store_bytes / count, 1),
+        "reduction": round(dict_bytes / store_bytes, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=50_000, help="Corpus size")
+    args = parser.parse_args()
+    print(json.dumps(run(args.leads), indent=2))
+
+
+if __name__ == "__main__":
+    main()
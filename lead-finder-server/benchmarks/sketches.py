@@ -0,0 +1,98 @@
+"""Accuracy benchmark: trend sketches vs. exact counts.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.sketches --items 200000 --days 90
+
+Streams a Zipf-distributed sequence of items, split into one sketch per day,
+merges the daily sketches and compares the merged estimates with exact counts.
+Exits non-zero if any estimate falls outside its documented bound: heavy-hitter
+counts may over-count by at most the Count-Min bound and never under-count,
+the true top items must be reported, and the HyperLogLog estimate must lie
+within four standard errors.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+from sketches import HeavyHitters, HyperLogLog
+
+TOP = 10
+
+
+def run(items: int, days: int, vocabulary: int, seed: int) -> Dict[str, Any]:
+    """Sketch ``items`` draws over ``days`` daily buckets and check the merged estimates."""
+    rng = random.Random(seed)
+    weights = [1 / rank ** 1.1 for rank in range(1, vocabulary + 1)]
+    names = [f"item-{rank}" for rank in range(vocabulary)]
+    stream = rng.choices(names, weights, k=items)
+
+    exact: Counter = Counter(stream)
+    per_day = -(-items // days)
+    heavy: List[HeavyHitters] = []
+    distinct: List[HyperLogLog] = []
+    for start in range(0, items, per_day):
+        day_heavy, day_distinct = HeavyHitters(), HyperLogLog()
+        for item in stream[start:start + per_day]:
+            day_heavy.add(item)
+            day_distinct.add(item)
+        heavy.append(day_heavy)
+        distinct.append(day_distinct)
+
+    started = time.perf_counter()
+    merged = HeavyHitters.combine(heavy)
+    merged_distinct = HyperLogLog.combine(distinct, distinct[0].precision)
+    merge_ms = (time.perf_counter() - started) * 1000
+
+    bound = merged.sketch.error_bound
+    top = merged.top(TOP)
+    overcounts = [estimate - exact[item] for item, estimate in top]
+    true_top = {item for item, _ in exact.most_common(TOP)}
+    cardinality = merged_distinct.estimate()
+    cardinality_error = cardinality / len(exact) - 1
+    failures = []
+    if min(overcounts) < 0:
+        failures.append("heavy-hitter estimate under-counts")
+    if max(overcounts) > bound:
+        failures.append("heavy-hitter estimate exceeds the Count-Min bound")
+    top_matches = {item for item, _ in top} == true_top
+    if not top_matches:
+        failures.append("reported top items differ from the exact top items")
+    if abs(cardinality_error) > 4 * merged_distinct.relative_error:
+        failures.append("distinct count outside four standard errors")
+    return {
+        "items": items,
+        "days": len(heavy),
+        "merge_ms": round(merge_ms, 2),
+        "top_max_overcount": max(overcounts),
+        "overcount_bound": round(bound, 1),
+        "top_matches_exact": top_matches,
+        "distinct_exact": len(exact),
+        "distinct_estimate": cardinality,
+        "distinct_relative_error": round(cardinality_error, 4),
+        "distinct_standard_error": round(merged_distinct.relative_error, 4),
+        "failures": failures,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=200_000, help="Stream length")
+    parser.add_argument("--days", type=int, default=90, help="Daily sketches to merge")
+    parser.add_argument("--vocabulary", type=int, default=50_000, help="Distinct items to draw from")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    report = run(args.items, args.days, args.vocabulary, args.seed)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Vector search benchmark: semantic intent queries over a saved, memory-mapped index.
+
+Run from ``lead-finder-server``::
+
+    python -m benchmarks.vector_search --leads 1000000
+
+Embeds the texts of a synthetic corpus, builds and saves the IVF index, loads
+it back memory-mapped and times queries (embedding included) against exact
+search. Recall counts approximate results scoring at least the exact k-th
+similarity, since many synthetic posts are identical and tie.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from lead_store import synthetic_leads
+from vector_index import VectorIndex, embed
+
+QUERIES: List[List[str]] = [
+    ["actively hiring"],
+    ["recently funded"],
+    ["expanding team", "actively hiring"],
+    ["struggling with manual prospecting"],
+    ["evaluating CRM software vendors"],
+]
+
+
+def run(count: int, k: int, repeat: int) -> Dict[str, Any]:
+    """Build, save and reload an index over ``count`` leads and time ``QUERIES`` against it."""
+    texts = [
+        " ".join([lead["source_content"], *lead["company_insights"]["recent_news"]])
+        for lead in synthetic_leads(count)
+    ]
+    started = time.perf_counter()
+    vectors = embed(texts)
+    embed_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    built = VectorIndex.build(vectors)
+    build_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = f"{directory}/index"
+        built.save(path, {"count": count})
+        started = time.perf_counter()
+        index, _ = VectorIndex.load(path)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        queries = []
+        for query in QUERIES:
+            index.search(query, k=k)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                rows, similarity = index.search(query, k=k)
+            elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+
+            exact = VectorIndex(index.vectors, index.rows, index.offsets, index.centroids, exact_limit=count)
+            started = time.perf_counter()
+            _, exact_similarity = exact.search(query, k=k)
+            exact_ms = (time.perf_counter() - started) * 1000
+            kth = np.sort(exact_similarity)[-min(k, len(exact_similarity))] if len(exact_similarity) else 0.0
+            good = int(np.count_nonzero(similarity >= kth - 1e-3))
+            queries.append({
+                "query": query,
+                "results": len(rows),
+                "ivf_ms": round(elapsed_ms, 2),
+                "exact_ms": round(exact_ms, 2),
+                "recall": round(good / min(k, len(exact_similarity)), 3) if len(exact_similarity) else None,
+            })
+    return {
+        "leads": count,
+        "lists": len(built.centroids),
+        "nprobe": built.nprobe,
+        "embed_seconds": round(embed_seconds, 1),
+        "build_seconds": round(build_seconds, 1),
+        "mmap_load_ms": round(load_ms, 1),
+        "queries": queries,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=200_000, help="Corpus size")
+    parser.add_argument("--k", type=int, default=1000, help="Results per query")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    args = parser.parse_args()
+    print(json.dumps(run(args.leads, args.k, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
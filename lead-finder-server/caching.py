@@ -0,0 +1,209 @@
+"""Small caches.
+
+``TTLCache`` is an in-process LRU map whose entries also expire after a time
+to live, either cache-wide or set per entry. It counts hits, misses and
+evictions so they can be reported on the health endpoint.
+
+``SharedCache`` keeps JSON values with an expiry in a local SQLite file, so
+every server worker on the machine sees what the others have cached.
+
+``SingleFlight`` caches nothing past completion: it lets concurrent calls with
+the same key share one in-flight computation.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Tuple, TypeVar
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Size-bounded LRU cache with per-entry expiry."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, Tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> V | None:
+        """Return the live value for ``key`` and mark it recently used, or ``None``."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: V, ttl: float | None = None) -> None:
+        """Store ``value``, evicting the least recently used entries beyond the bound.
+
+        ``ttl`` overrides the cache-wide time to live for this entry.
+        """
+        self._entries[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. when the data behind the cache changes."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the health endpoint."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SharedCache:
+    """Expiring key-value cache in a local SQLite file, shared by processes on one machine."""
+
+    def __init__(self, path: str, ttl: float, max_entries: int = 10_000) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_cache ("
+                " key TEXT PRIMARY KEY,"
+                " expires_at REAL NOT NULL,"
+                " value TEXT NOT NULL)"
+            )
+        self.purge_expired()
+
+    def get(self, key: str) -> Any | None:
+        """Return the live value for ``key``, or ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM shared_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store the JSON-serialisable ``value``; ``ttl`` overrides the cache-wide one."""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO shared_cache VALUES (?, ?, ?)",
+                (key, expires_at, json.dumps(value, separators=(",", ":"))),
+            )
+        self._writes += 1
+        if self._writes % 256 == 0:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, and the soonest-expiring ones beyond ``max_entries``."""
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM shared_cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM shared_cache WHERE key IN ("
+                " SELECT key FROM shared_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the health endpoint."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM shared_cache").fetchone()
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class SingleFlight(Generic[V]):
+    """Run one computation for concurrent calls with the same key, and give every caller its outcome.
+
+    A call joins the computation in flight for its key if that started less
+    than ``window`` seconds ago, and starts a new one otherwise; a window of 0
+    never joins. Nothing is kept once a computation finishes, so a later call
+    never gets an earlier result. Callers all receive the result or the
+    exception; a caller that is cancelled stops waiting, but the computation
+    carries on for the others.
+    """
+
+    def __init__(self, window: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.window = window
+        self._clock = clock
+        # Key -> (start time, task) of the computations in flight
+        self._in_flight: Dict[Hashable, Tuple[float, asyncio.Task]] = {}
+        self.computed = 0
+        self.joined = 0
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[V]]) -> V:
+        """Await ``compute()``, or the computation already in flight for ``key``."""
+        now = self._clock()
+        entry = self._in_flight.get(key)
+        if entry is not None and now - entry[0] < self.window:
+            self.joined += 1
+            task = entry[1]
+        else:
+            self.computed += 1
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = (now, task)
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        entry = self._in_flight.get(key)
+        if entry is not None and entry[1] is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Retrieved here, so a failure whose callers all gave up is not reported as unhandled
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the health endpoint."""
+        return {
+            "window_seconds": self.window,
+            "in_flight": len(self._in_flight),
+            "computed": self.computed,
+            "joined": self.joined,
+        }
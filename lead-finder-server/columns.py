@@ -0,0 +1,321 @@
+"""Compact column types for the lead store.
+
+Repeated strings are interned once in a ``StringPool`` and referenced by code,
+free text is packed as UTF-8 into one buffer per column, and string lists are
+flattened into a single code array. None of them allocate a Python object per
+stored value.
+
+Every column can start from a read-only *base*, usually arrays memory-mapped
+from a snapshot (see ``snapshot.py``), with values appended later kept in
+memory after it. Row numbers run across both.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+import hashlib
+
+import numpy as np
+
+
+class StringPool:
+    """Interned strings addressed by an integer code; code 0 is the empty string."""
+
+    __slots__ = ("_strings", "_codes")
+
+    def __init__(self, strings: Sequence[str] = ("",)) -> None:
+        self._strings: List[str] = list(strings)
+        self._codes = {value: code for code, value in enumerate(self._strings)}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __getitem__(self, code: int) -> str:
+        return self._strings[code]
+
+    def code(self, value: str | None) -> int:
+        """Return the code of ``value``, interning it on first use."""
+        if not value:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def find(self, value: str) -> int | None:
+        """Return the code of ``value`` without interning it."""
+        return self._codes.get(value)
+
+    def strings(self) -> List[str]:
+        return list(self._strings)
+
+
+class ArrayColumn:
+    """Fixed-width values of one NumPy-compatible ``array`` typecode.
+
+    Appended values are kept in a NumPy buffer that doubles when full. Growing
+    allocates a new buffer rather than resizing the old one, so arrays already
+    handed out stay valid while values are appended.
+    """
+
+    __slots__ = ("dtype", "_typecode", "_base", "_tail", "_items", "_size", "_whole")
+
+    def __init__(self, typecode: str, base: np.ndarray | None = None) -> None:
+        self.dtype = np.dtype(typecode)
+        self._typecode = typecode
+        self._base = base if base is not None else np.empty(0, dtype=self.dtype)
+        self._tail = np.empty(0, dtype=self.dtype)
+        self._items = _view(self._tail, typecode)
+        self._size = 0
+        self._whole: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._base) + self._size
+
+    def __getitem__(self, row: int):
+        base = len(self._base)
+        return self._base[row].item() if row < base else self._items[row - base]
+
+    def append(self, value) -> None:
+        size = self._size
+        if size == len(self._tail):
+            tail = np.empty(max(2 * size, 64), dtype=self.dtype)
+            tail[:size] = self._tail[:size]
+            self._tail, self._items = tail, _view(tail, self._typecode)
+        self._items[size] = value
+        self._size = size + 1
+
+    def array(self) -> np.ndarray:
+        """The whole column as a NumPy array.
+
+        Zero-copy when the column is all base or all appended; otherwise a copy
+        cached until the column grows. Later appends never change it.
+        """
+        if not self._size:
+            return self._base
+        if not len(self._base):
+            return self._tail[:self._size]
+        whole = self._whole
+        if whole is None or len(whole) != len(self):
+            whole = self._whole = np.concatenate([self._base, self._tail[:self._size]])
+        return whole
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """The values at the ascending ``rows``, without assembling the whole column."""
+        if not self._size:
+            return self._base[rows]
+        base = len(self._base)
+        if not base:
+            return self._tail[rows]
+        split = np.searchsorted(rows, base)
+        return np.concatenate([self._base[rows[:split]], self._tail[rows[split:] - base]])
+
+
+def _view(values: np.ndarray, typecode: str) -> memoryview:
+    """A flat memoryview of ``values``; indexing it is several times cheaper than indexing NumPy."""
+    return memoryview(np.ascontiguousarray(values)).cast("B").cast(typecode)
+
+
+class TextColumn:
+    """Variable-length strings packed as UTF-8 into one buffer with an offset array."""
+
+    __slots__ = ("_base_data", "_base_offsets", "_base_rows", "_data", "_offsets")
+
+    def __init__(self, base_data: np.ndarray | None = None, base_offsets: np.ndarray | None = None) -> None:
+        self._base_data = _view(base_data if base_data is not None else np.empty(0, dtype=np.uint8), "B")
+        self._base_offsets = _view(base_offsets if base_offsets is not None else np.zeros(1, dtype=np.uint64), "Q")
+        self._base_rows = len(self._base_offsets) - 1
+        self._data = bytearray()
+        self._offsets = array("Q", [0])
+
+    def __len__(self) -> int:
+        return self._base_rows + len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        base = self._base_rows
+        if row < base:
+            offsets = self._base_offsets
+            return str(self._base_data[offsets[row]:offsets[row + 1]], "utf-8")
+        row -= base
+        return self._data[self._offsets[row]:self._offsets[row + 1]].decode()
+
+    def append(self, value: str | None) -> None:
+        self._data += (value or "").encode()
+        self._offsets.append(len(self._data))
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Packed data and offsets of every row, for writing a snapshot."""
+        base_offsets = np.asarray(self._base_offsets)
+        tail_offsets = np.frombuffer(self._offsets, dtype=np.uint64)
+        data = np.concatenate([np.asarray(self._base_data), np.frombuffer(bytes(self._data), dtype=np.uint8)])
+        offsets = np.concatenate([base_offsets, tail_offsets[1:] + base_offsets[-1]])
+        return data, offsets
+
+
+class ListColumn:
+    """Per-row lists of pooled strings, flattened into one code array."""
+
+    __slots__ = ("_pool", "_base_codes", "_base_offsets", "_base_rows", "_codes", "_offsets")
+
+    def __init__(
+        self,
+        pool: StringPool,
+        base_codes: np.ndarray | None = None,
+        base_offsets: np.ndarray | None = None,
+    ) -> None:
+        self._pool = pool
+        self._base_codes = _view(base_codes if base_codes is not None else np.empty(0, dtype=np.uint32), "I")
+        self._base_offsets = _view(base_offsets if base_offsets is not None else np.zeros(1, dtype=np.uint32), "I")
+        self._base_rows = len(self._base_offsets) - 1
+        self._codes = array("I")
+        self._offsets = array("I", [0])
+
+    def __len__(self) -> int:
+        return self._base_rows + len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> List[str]:
+        pool = self._pool
+        base = self._base_rows
+        if row < base:
+            offsets = self._base_offsets
+            codes = self._base_codes[offsets[row]:offsets[row + 1]]
+        else:
+            row -= base
+            codes = self._codes[self._offsets[row]:self._offsets[row + 1]]
+        return [pool[code] for code in codes]
+
+    def append(self, values: Iterable[str] | None) -> None:
+        self._codes.extend(self._pool.code(value) for value in values or ())
+        self._offsets.append(len(self._codes))
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Flattened codes and offsets of every row, for writing a snapshot."""
+        base_offsets = np.asarray(self._base_offsets)
+        tail_offsets = np.frombuffer(self._offsets, dtype=np.uint32)
+        codes = np.concatenate([np.asarray(self._base_codes), np.frombuffer(self._codes, dtype=np.uint32)])
+        offsets = np.concatenate([base_offsets, tail_offsets[1:] + base_offsets[-1]])
+        return codes, offsets
+
+
+class Postings:
+    """Per-key ascending lists, e.g. of row numbers, sharing one base array.
+
+    The base holds each key's list as a ``(start, stop)`` span of one array;
+    values appended later are kept per key.
+    """
+
+    __slots__ = ("dtype", "_typecode", "_base", "_spans", "_tails")
+
+    def __init__(
+        self,
+        typecode: str,
+        base: np.ndarray | None = None,
+        spans: Dict[str, Sequence[int]] | None = None,
+    ) -> None:
+        self.dtype = np.dtype(typecode)
+        self._typecode = typecode
+        self._base = base if base is not None else np.empty(0, dtype=self.dtype)
+        self._spans = {key: (int(start), int(stop)) for key, (start, stop) in (spans or {}).items()}
+        self._tails: Dict[str, array] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._spans or key in self._tails
+
+    def __len__(self) -> int:
+        return len(self._spans) + sum(1 for key in self._tails if key not in self._spans)
+
+    def keys(self) -> List[str]:
+        return list(self._spans) + [key for key in self._tails if key not in self._spans]
+
+    def append(self, key: str, value: int) -> bool:
+        """Append ``value`` to the list of ``key``; returns whether the key is new."""
+        tail = self._tails.get(key)
+        if tail is None:
+            tail = self._tails[key] = array(self._typecode)
+            tail.append(value)
+            return key not in self._spans
+        tail.append(value)
+        return False
+
+    def count(self, key: str) -> int:
+        start, stop = self._spans.get(key, (0, 0))
+        return stop - start + len(self._tails.get(key, ()))
+
+    def get(self, key: str) -> np.ndarray:
+        """The list of ``key``, empty if unknown."""
+        span = self._spans.get(key)
+        tail = self._tails.get(key)
+        base = self._base[span[0]:span[1]] if span else None
+        if tail is None:
+            return base if base is not None else np.empty(0, dtype=self.dtype)
+        appended = np.array(tail, dtype=self.dtype)
+        return appended if base is None else np.concatenate([base, appended])
+
+    def arrays(self) -> Tuple[np.ndarray, Dict[str, Tuple[int, int]]]:
+        """Every list concatenated, with the span of each key, for writing a snapshot."""
+        lists = []
+        spans: Dict[str, Tuple[int, int]] = {}
+        start = 0
+        for key in self.keys():
+            values = self.get(key)
+            lists.append(values)
+            spans[key] = (start, start + len(values))
+            start += len(values)
+        data = np.concatenate(lists) if lists else np.empty(0, dtype=self.dtype)
+        return data, spans
+
+
+def key_hash(key: str) -> int:
+    """Stable 64-bit hash of a string key."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+class KeyIndex:
+    """Unique string keys (such as lead ids) of a ``TextColumn``, mapped to their rows.
+
+    The base is a sorted table of 64-bit key hashes with the row of each, so it
+    can be memory-mapped instead of rebuilt as a dict; hash matches are
+    confirmed against the column. Keys added later are kept in a dict.
+    """
+
+    __slots__ = ("_keys", "_hashes", "_rows", "_added")
+
+    def __init__(
+        self,
+        keys: TextColumn,
+        hashes: np.ndarray | None = None,
+        rows: np.ndarray | None = None,
+    ) -> None:
+        self._keys = keys
+        self._hashes = hashes if hashes is not None else np.empty(0, dtype=np.uint64)
+        self._rows = rows if rows is not None else np.empty(0, dtype=np.uint32)
+        self._added: Dict[str, int] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: str) -> int | None:
+        row = self._added.get(key)
+        if row is not None or not len(self._hashes):
+            return row
+        h = np.uint64(key_hash(key))
+        start = int(np.searchsorted(self._hashes, h, side="left"))
+        stop = int(np.searchsorted(self._hashes, h, side="right"))
+        for i in range(start, stop):
+            row = int(self._rows[i])
+            if self._keys[row] == key:
+                return row
+        return None
+
+    def add(self, key: str, row: int) -> None:
+        self._added[key] = row
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted hashes of every key and their rows, for writing a snapshot."""
+        keys = self._keys
+        hashes = np.fromiter((key_hash(keys[row]) for row in range(len(keys))), dtype=np.uint64, count=len(keys))
+        order = np.argsort(hashes, kind="stable")
+        return hashes[order], order.astype(np.uint32)
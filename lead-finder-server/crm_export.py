@@ -0,0 +1,525 @@
+"""Bulk export of leads to CRM systems.
+
+Each CRM has an adapter that maps leads to its bulk API: Salesforce sObject
+collections (200 records per call), HubSpot batch create (100 per call) and
+Pipedrive, which has no bulk endpoint, one person per call. ``CRMExporter``
+reads leads from the store a batch at a time, so memory stays flat however
+many IDs are exported, and runs batches concurrently through one pooled HTTP
+client per CRM. Given an entity index (see ``entity_resolution.py``), the
+leads of one prospect are exported once, as a merged record. A token bucket
+keeps each CRM at its documented request rate, and rate-limited or failed
+calls are retried with exponential backoff.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+import asyncio
+import os
+import random
+import time
+
+import httpx
+
+from entity_resolution import EntityIndex
+from lead_store import LeadStore
+
+# Errors kept in an export report; the rest are only counted
+MAX_REPORTED_ERRORS = 10
+
+# Statuses worth retrying: rate limited or a server-side failure
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Intent levels as values of Salesforce's standard Lead Rating picklist
+SALESFORCE_RATINGS = {"high": "Hot", "medium": "Warm", "low": "Cold"}
+
+
+class CRMError(Exception):
+    """Raised when a CRM rejects a request or keeps failing after retries."""
+
+
+class RateLimiter:
+    """Token bucket spacing requests to ``rate`` per second, with bursts of ``burst``."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._updated = time.monotonic()
+                self._tokens = 1.0
+            self._tokens -= 1
+
+
+def _split_name(name: str) -> Tuple[str, str]:
+    first, _, last = name.strip().rpartition(" ")
+    return (first, last) if first else ("", last)
+
+
+def _follow_up_subject(lead: Dict[str, Any]) -> str:
+    return f"Follow up with {lead['prospect_name']} ({lead['company']})"
+
+
+def _lead_description(lead: Dict[str, Any]) -> str:
+    description = f"{lead['source_platform']}: {lead['source_content']}\n{lead['source_url']}"
+    if "source_platforms" in lead:
+        description += f"\nSeen on: {', '.join(lead['source_platforms'])}"
+    return description
+
+
+class CRMAdapter:
+    """Maps leads to one CRM's bulk API.
+
+    ``create_request`` and ``task_request`` return the ``(path, body)`` of a
+    POST; ``created_ids`` reads the CRM record IDs back from the response,
+    aligned with the batch (``None`` where a record was rejected).
+    """
+
+    name = ""
+    label = ""
+    default_url = ""
+    # Records per bulk call and the CRM's sustained request rate per second
+    batch_size = 100
+    rate_limit = 10.0
+
+    def headers(self, token: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {token}"}
+
+    def create_request(self, leads: Sequence[Dict[str, Any]]) -> Tuple[str, Any]:
+        raise NotImplementedError
+
+    def created_ids(self, leads: Sequence[Dict[str, Any]], body: Any) -> List[Tuple[str | None, str | None]]:
+        """Return ``(record_id, error)`` for each lead of the batch."""
+        raise NotImplementedError
+
+    def task_request(
+        self,
+        created: Sequence[Tuple[Dict[str, Any], str]],
+        due: datetime,
+        set_reminders: bool,
+    ) -> Tuple[str, Any]:
+        raise NotImplementedError
+
+
+class SalesforceAdapter(CRMAdapter):
+    """Salesforce Lead and Task records through the sObject collections API."""
+
+    name = "salesforce"
+    label = "Salesforce"
+    default_url = "https://login.salesforce.com"
+    batch_size = 200
+    rate_limit = 20.0
+    path = "/services/data/v60.0/composite/sobjects"
+
+    def create_request(self, leads):
+        records = []
+        for lead in leads:
+            first_name, last_name = _split_name(lead["prospect_name"])
+            contact = lead["contact_info"]
+            records.append({
+                "attributes": {"type": "Lead"},
+                "FirstName": first_name,
+                "LastName": last_name or lead["prospect_name"],
+                "Company": lead["company"],
+                "Title": lead["title"],
+                "Email": contact.get("email"),
+                "Phone": contact.get("phone"),
+                "City": lead["location"],
+                "Industry": lead["industry"],
+                "LeadSource": lead["source_platform"],
+                "Rating": SALESFORCE_RATINGS.get(lead["intent_analysis"].get("intent_level", "")),
+                "Description": _lead_description(lead),
+            })
+        return self.path, {"allOrNone": False, "records": records}
+
+    def created_ids(self, leads, body):
+        # An error such as an expired session comes back as one object, not a result per record
+        if not isinstance(body, list) or not all(isinstance(result, dict) for result in body):
+            raise CRMError(f"{self.label} returned an unexpected response: {str(body)[:200]}")
+        return [
+            (result["id"], None) if result.get("success")
+            else (None, "; ".join(error.get("message", "") for error in result.get("errors", [])))
+            for result in body
+        ]
+
+    def task_request(self, created, due, set_reminders):
+        records = []
+        for lead, record_id in created:
+            task = {
+                "attributes": {"type": "Task"},
+                "WhoId": record_id,
+                "Subject": _follow_up_subject(lead),
+                "ActivityDate": due.date().isoformat(),
+                "Status": "Not Started",
+            }
+            if set_reminders:
+                task["IsReminderSet"] = True
+                task["ReminderDateTime"] = due.isoformat()
+            records.append(task)
+        return self.path, {"allOrNone": False, "records": records}
+
+
+class HubSpotAdapter(CRMAdapter):
+    """HubSpot contacts and tasks through the CRM v3 batch endpoints."""
+
+    name = "hubspot"
+    label = "HubSpot"
+    default_url = "https://api.hubapi.com"
+    batch_size = 100
+    rate_limit = 10.0
+    # HubSpot-defined association type from a task to a contact
+    task_to_contact = 204
+
+    def create_request(self, leads):
+        inputs = []
+        for lead in leads:
+            first_name, last_name = _split_name(lead["prospect_name"])
+            contact = lead["contact_info"]
+            inputs.append({
+                "objectWriteTraceId": lead["id"],
+                "properties": {
+                    "firstname": first_name,
+                    "lastname": last_name,
+                    "email": contact.get("email"),
+                    "phone": contact.get("phone"),
+                    "company": lead["company"],
+                    "jobtitle": lead["title"],
+                    "city": lead["location"],
+                    "industry": lead["industry"],
+                    "hs_lead_status": "NEW",
+                },
+            })
+        return "/crm/v3/objects/contacts/batch/create", {"inputs": inputs}
+
+    def created_ids(self, leads, body):
+        # Batch results are not ordered; match them back by trace ID
+        ids = {result.get("objectWriteTraceId"): result["id"] for result in body.get("results", [])}
+        errors = {}
+        for error in body.get("errors", []):
+            for trace_id in (error.get("context") or {}).get("objectWriteTraceId", []):
+                errors[trace_id] = error.get("message", "")
+        return [
+            (ids[lead["id"]], None) if lead["id"] in ids else (None, errors.get(lead["id"], "Not created"))
+            for lead in leads
+        ]
+
+    def task_request(self, created, due, set_reminders):
+        timestamp = int(due.timestamp() * 1000)
+        inputs = []
+        for lead, record_id in created:
+            properties = {
+                "hs_task_subject": _follow_up_subject(lead),
+                "hs_task_body": _lead_description(lead),
+                "hs_task_status": "NOT_STARTED",
+                "hs_task_type": "TODO",
+                "hs_timestamp": timestamp,
+            }
+            if set_reminders:
+                properties["hs_task_reminders"] = timestamp
+            inputs.append({
+                "objectWriteTraceId": lead["id"],
+                "properties": properties,
+                "associations": [{
+                    "to": {"id": record_id},
+                    "types": [{"associationCategory": "HUBSPOT_DEFINED", "associationTypeId": self.task_to_contact}],
+                }],
+            })
+        return "/crm/v3/objects/tasks/batch/create", {"inputs": inputs}
+
+
+class PipedriveAdapter(CRMAdapter):
+    """Pipedrive persons and task activities; Pipedrive has no bulk create, so batches hold one lead."""
+
+    name = "pipedrive"
+    label = "Pipedrive"
+    default_url = "https://api.pipedrive.com"
+    batch_size = 1
+    rate_limit = 40.0
+
+    def headers(self, token):
+        return {"x-api-token": token}
+
+    def create_request(self, leads):
+        (lead,) = leads
+        contact = lead["contact_info"]
+        person = {"name": lead["prospect_name"], "job_title": lead["title"]}
+        if contact.get("email"):
+            person["email"] = [{"value": contact["email"], "primary": True, "label": "work"}]
+        if contact.get("phone"):
+            person["phone"] = [{"value": contact["phone"], "primary": True, "label": "work"}]
+        return "/v1/persons", person
+
+    def created_ids(self, leads, body):
+        data = body.get("data") or {}
+        if body.get("success") and "id" in data:
+            return [(str(data["id"]), None)]
+        return [(None, body.get("error") or "Not created")]
+
+    def task_request(self, created, due, set_reminders):
+        # Pipedrive activities have no reminder field; the due time is the reminder
+        ((lead, record_id),) = created
+        return "/v1/activities", {
+            "subject": _follow_up_subject(lead),
+            "type": "task",
+            "person_id": int(record_id) if record_id.isdigit() else record_id,
+            "due_date": due.date().isoformat(),
+            "due_time": due.strftime("%H:%M"),
+            "note": _lead_description(lead),
+        }
+
+
+ADAPTERS: Dict[str, CRMAdapter] = {
+    adapter.name: adapter for adapter in (SalesforceAdapter(), HubSpotAdapter(), PipedriveAdapter())
+}
+
+
+class CRMConnection:
+    """Pooled HTTP client, rate limiter and retry policy for one CRM."""
+
+    def __init__(
+        self,
+        adapter: CRMAdapter,
+        base_url: str,
+        token: str,
+        rate_limit: float | None = None,
+        max_concurrency: int = 8,
+        max_attempts: int = 5,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+    ) -> None:
+        self.adapter = adapter
+        self.base_url = base_url
+        self.token = token
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        rate = rate_limit or adapter.rate_limit
+        self.limiter = RateLimiter(rate, burst=max(1, int(rate)))
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the server's event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.adapter.headers(self.token),
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+        return self._client
+
+    async def post(self, path: str, body: Any, stats: Dict[str, int]) -> Any:
+        """POST within the rate limit, retrying throttled and failed calls."""
+        for attempt in range(self.max_attempts):
+            await self.limiter.acquire()
+            stats["requests"] += 1
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            try:
+                response = await self.client.post(path, json=body)
+            except httpx.TransportError as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code >= 400:
+                        raise CRMError(f"{self.adapter.label} returned {response.status_code}: {response.text[:200]}")
+                    try:
+                        return response.json()
+                    except ValueError as exc:
+                        raise CRMError(f"{self.adapter.label} returned a response that is not JSON: {exc}") from exc
+                error = f"{self.adapter.label} returned {response.status_code}"
+                retry_after = response.headers.get("Retry-After")
+                if retry_after:
+                    try:
+                        delay = max(delay, float(retry_after))
+                    except ValueError:
+                        pass
+            if attempt + 1 < self.max_attempts:
+                stats["retries"] += 1
+                await asyncio.sleep(delay)
+        raise CRMError(f"{error} after {self.max_attempts} attempts")
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _lead_batches(
+    lookup: Callable[[str], Dict[str, Any] | None],
+    lead_ids: Sequence[str],
+    batch_size: int,
+    missing: List[str],
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield batches of leads, materializing one batch at a time; unknown IDs go to ``missing``."""
+    batch: List[Dict[str, Any]] = []
+    for lead_id in lead_ids:
+        lead = lookup(lead_id)
+        if lead is None:
+            missing.append(lead_id)
+            continue
+        batch.append(lead)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class CRMExporter:
+    """Exports leads from a store to whichever CRMs have credentials configured.
+
+    With ``entities``, leads of one prospect are exported once, as their merged record.
+    """
+
+    def __init__(
+        self,
+        store: LeadStore,
+        connections: Dict[str, CRMConnection],
+        entities: EntityIndex | None = None,
+    ) -> None:
+        self.store = store
+        self.connections = connections
+        self.entities = entities
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """Call ``listener`` with the leads of every batch a CRM accepted."""
+        self._listeners.append(listener)
+
+    @classmethod
+    def from_env(cls, store: LeadStore, entities: EntityIndex | None = None) -> "CRMExporter":
+        """Configure a connection for each CRM with ``<CRM>_API_TOKEN`` set."""
+        connections = {}
+        for name, adapter in ADAPTERS.items():
+            prefix = name.upper()
+            token = os.getenv(f"{prefix}_API_TOKEN")
+            if not token:
+                continue
+            rate_limit = os.getenv(f"{prefix}_RATE_LIMIT")
+            connections[name] = CRMConnection(
+                adapter,
+                base_url=os.getenv(f"{prefix}_API_URL", adapter.default_url),
+                token=token,
+                rate_limit=float(rate_limit) if rate_limit else None,
+                max_concurrency=int(os.getenv("CRM_EXPORT_CONCURRENCY", "8")),
+            )
+        return cls(store, connections, entities)
+
+    def connection(self, crm_system: str) -> CRMConnection:
+        """Return the connection to a CRM, or raise ``CRMError`` if it is not configured."""
+        connection = self.connections.get(crm_system)
+        if connection is None:
+            raise CRMError(
+                f"{ADAPTERS[crm_system].label} export is not configured; set {crm_system.upper()}_API_TOKEN"
+            )
+        return connection
+
+    async def export(
+        self,
+        crm_system: str,
+        lead_ids: Sequence[str],
+        create_tasks: bool = True,
+        set_reminders: bool = True,
+        follow_up_in: timedelta = timedelta(days=2),
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> Dict[str, Any]:
+        """Export ``lead_ids`` and return a report of what the CRM accepted.
+
+        ``on_progress(processed, total)`` is called after every batch.
+        """
+        connection = self.connection(crm_system)
+        adapter = connection.adapter
+        started = time.perf_counter()
+        due = (datetime.now(timezone.utc) + follow_up_in).replace(microsecond=0)
+        unique_ids = list(dict.fromkeys(lead_ids))
+        lookup = self.store.get
+        merged = 0
+        if self.entities is not None:
+            distinct_ids = self.entities.distinct(unique_ids)
+            merged = len(unique_ids) - len(distinct_ids)
+            unique_ids, lookup = distinct_ids, self.entities.get
+        missing: List[str] = []
+        batches = _lead_batches(lookup, unique_ids, adapter.batch_size, missing)
+        stats = {"exported": 0, "failed": 0, "tasks_created": 0, "batches": 0, "requests": 0, "retries": 0}
+        errors: List[Dict[str, Any]] = []
+
+        def record_error(lead_ids: Sequence[str], message: str) -> None:
+            stats["failed"] += len(lead_ids)
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"lead_ids": list(lead_ids)[:5], "error": message})
+
+        async def export_batch(batch: List[Dict[str, Any]]) -> None:
+            try:
+                path, body = adapter.create_request(batch)
+                results = adapter.created_ids(batch, await connection.post(path, body, stats))
+            except CRMError as exc:
+                record_error([lead["id"] for lead in batch], str(exc))
+                return
+            created = []
+            for lead, (record_id, error) in zip(batch, results):
+                if record_id is None:
+                    record_error([lead["id"]], error or "Not created")
+                else:
+                    created.append((lead, record_id))
+            stats["exported"] += len(created)
+            for listener in self._listeners:
+                listener([lead for lead, _ in created])
+            if create_tasks and created:
+                try:
+                    path, body = adapter.task_request(created, due, set_reminders)
+                    tasks = adapter.created_ids([lead for lead, _ in created], await connection.post(path, body, stats))
+                    stats["tasks_created"] += sum(1 for record_id, _ in tasks if record_id is not None)
+                except CRMError as exc:
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"lead_ids": [lead["id"] for lead, _ in created][:5], "error": f"Tasks: {exc}"})
+
+        async def worker() -> None:
+            # Workers share one lazy batch iterator, so only in-flight batches are in memory
+            for batch in batches:
+                stats["batches"] += 1
+                await export_batch(batch)
+                if on_progress is not None:
+                    on_progress(stats["exported"] + stats["failed"] + len(missing), len(unique_ids))
+
+        await asyncio.gather(*(worker() for _ in range(connection.max_concurrency)))
+
+        if not stats["failed"] and not missing:
+            status = "completed"
+        elif stats["exported"]:
+            status = "partial"
+        else:
+            status = "failed"
+        elapsed = time.perf_counter() - started
+        return {
+            "status": status,
+            **stats,
+            "merged": merged,
+            "missing": len(missing),
+            "missing_lead_ids": missing[:MAX_REPORTED_ERRORS],
+            "errors": errors,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "requests_per_second": round(stats["requests"] / elapsed, 1) if elapsed else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP clients."""
+        for connection in self.connections.values():
+            await connection.aclose()
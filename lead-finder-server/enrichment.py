@@ -0,0 +1,319 @@
+"""Concurrent prospect enrichment.
+
+Enrichment data comes from several providers (email finder, contact directory,
+company data, ...). ``EnrichmentPipeline`` de-duplicates the requested prospect
+IDs, splits them into one batch per provider call, runs every batch
+concurrently under a semaphore and merges whatever has arrived when the
+request deadline passes, so a request costs roughly one batch round trip.
+
+Providers here are local stand-ins that answer from the lead store after a
+simulated network delay, so the pipeline can run and be exercised offline.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Sequence, Set, Tuple
+import asyncio
+import random
+import time
+
+from enrichment_cache import EnrichmentCache
+from lead_store import LeadStore
+
+CONTACT_INFO = "contact_info"
+COMPANY_INSIGHTS = "company_insights"
+
+# Providers queried at each enrichment level
+ENRICHMENT_LEVELS: Dict[str, Tuple[str, ...]] = {
+    "basic": ("email_finder", "company_data"),
+    "standard": ("email_finder", "contact_directory", "company_data"),
+    "premium": ("email_finder", "contact_directory", "company_data", "company_signals"),
+}
+
+
+class ProviderError(Exception):
+    """Raised when an enrichment provider fails a batch lookup."""
+
+
+class EnrichmentProvider:
+    """A source of enrichment fields for one lead section, queried in batches."""
+
+    def __init__(self, name: str, section: str, fields: Sequence[str], batch_size: int) -> None:
+        self.name = name
+        self.section = section
+        self.fields = tuple(fields)
+        self.batch_size = batch_size
+
+    async def fetch(self, prospect_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up a batch, returning the fields found for each known prospect."""
+        raise NotImplementedError
+
+
+class SimulatedProvider(EnrichmentProvider):
+    """Offline stand-in that answers from the lead store after a simulated round trip."""
+
+    def __init__(
+        self,
+        name: str,
+        section: str,
+        fields: Sequence[str],
+        store: LeadStore,
+        latency: float,
+        batch_size: int = 100,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        super().__init__(name, section, fields, batch_size)
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+
+    async def fetch(self, prospect_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        await asyncio.sleep(self.latency + self._rng.uniform(0, self.jitter))
+        if self._rng.random() < self.failure_rate:
+            raise ProviderError(f"{self.name} lookup failed")
+        found = {}
+        for prospect_id in prospect_ids:
+            lead = self.store.get(prospect_id)
+            section = (lead or {}).get(self.section) or {}
+            values = {field: section[field] for field in self.fields if field in section}
+            if values:
+                found[prospect_id] = values
+        return found
+
+
+def default_providers(store: LeadStore) -> List[EnrichmentProvider]:
+    """Simulated stand-ins for the email, contact and company data providers."""
+    return [
+        SimulatedProvider("email_finder", CONTACT_INFO, ("email", "email_confidence"), store,
+                          latency=0.08, jitter=0.04, batch_size=100),
+        SimulatedProvider("contact_directory", CONTACT_INFO, ("phone", "social_profiles"), store,
+                          latency=0.12, jitter=0.05, batch_size=50),
+        SimulatedProvider("company_data", COMPANY_INSIGHTS, ("industry", "size", "revenue"), store,
+                          latency=0.1, jitter=0.05, batch_size=100),
+        SimulatedProvider("company_signals", COMPANY_INSIGHTS, ("technologies", "recent_news"), store,
+                          latency=0.15, jitter=0.05, batch_size=25),
+    ]
+
+
+def _chunks(items: Sequence[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield list(items[start:start + size])
+
+
+class EnrichmentPipeline:
+    """Fans enrichment lookups out to providers in concurrent batches.
+
+    With a cache, answers already known are served without a provider call,
+    lookups that failed recently are not retried until the failure expires,
+    and a prospect that another request is already fetching from a provider
+    is awaited rather than fetched again. A batch other requests are waiting
+    on is never cancelled by one request's deadline.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[EnrichmentProvider],
+        max_concurrency: int = 32,
+        deadline: float = 5.0,
+        cache: EnrichmentCache | None = None,
+    ) -> None:
+        self.providers = {provider.name: provider for provider in providers}
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.cache = cache
+        # Lookups currently running, resolved with the answer or None on failure
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        # Requests waiting on each in-flight lookup besides the one that started it
+        self._joined: Dict[Tuple[str, str], int] = {}
+        # Batches that have answered but are still writing to the cache
+        self._background: Set[asyncio.Task] = set()
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    def select_providers(
+        self,
+        level: str,
+        include_contact_info: bool = True,
+        include_company_insights: bool = True,
+    ) -> List[EnrichmentProvider]:
+        """Return the providers a request needs, given its level and sections."""
+        sections = set()
+        if include_contact_info:
+            sections.add(CONTACT_INFO)
+        if include_company_insights:
+            sections.add(COMPANY_INSIGHTS)
+        return [
+            self.providers[name]
+            for name in ENRICHMENT_LEVELS[level]
+            if name in self.providers and self.providers[name].section in sections
+        ]
+
+    async def _run_batch(
+        self,
+        provider: EnrichmentProvider,
+        batch: List[str],
+        futures: List[asyncio.Future],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Fetch one batch and resolve the lookups waiting on it."""
+        try:
+            async with semaphore:
+                found = await provider.fetch(batch)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception:
+            for future in futures:
+                future.set_result(None)
+            if self.cache is not None:
+                self.cache.set_failed(provider.name, batch)
+            raise
+        else:
+            answers = {prospect_id: found.get(prospect_id, {}) for prospect_id in batch}
+            for prospect_id, future in zip(batch, futures):
+                future.set_result(answers[prospect_id])
+            if self.cache is not None:
+                await self.cache.set_many(provider.name, answers)
+        finally:
+            for prospect_id in batch:
+                self._in_flight.pop((provider.name, prospect_id), None)
+
+    async def enrich(
+        self,
+        prospect_ids: Sequence[str],
+        level: str = "standard",
+        include_contact_info: bool = True,
+        include_company_insights: bool = True,
+        deadline: float | None = None,
+    ) -> Dict[str, Any]:
+        """Enrich ``prospect_ids``, returning partial results if the deadline passes."""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        unique_ids = list(dict.fromkeys(prospect_ids))
+        providers = self.select_providers(level, include_contact_info, include_company_insights)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Serve cached answers, join lookups already in flight, and batch the rest
+        answers: Dict[Tuple[str, str], Dict[str, Any] | None] = {}
+        waiting: Dict[Tuple[str, str], asyncio.Future] = {}
+        batches: List[List[Tuple[EnrichmentProvider, List[str], List[asyncio.Future]]]] = []
+        joined: List[Tuple[str, str]] = []
+        cached_failures = 0
+        for provider in providers:
+            cached = await self.cache.get_many(provider.name, unique_ids) if self.cache else {}
+            uncached = [prospect_id for prospect_id in unique_ids if prospect_id not in cached]
+            failed = self.cache.failed(provider.name, uncached) if self.cache else set()
+            cached_failures += len(failed)
+            to_fetch: List[str] = []
+            for prospect_id in unique_ids:
+                key = (provider.name, prospect_id)
+                if prospect_id in cached:
+                    answers[key] = cached[prospect_id]
+                elif prospect_id in failed:
+                    answers[key] = None
+                elif key in self._in_flight:
+                    waiting[key] = self._in_flight[key]
+                    self._joined[key] = self._joined.get(key, 0) + 1
+                    joined.append(key)
+                else:
+                    waiting[key] = self._in_flight[key] = loop.create_future()
+                    to_fetch.append(prospect_id)
+            batches.append([
+                (provider, chunk, [waiting[(provider.name, prospect_id)] for prospect_id in chunk])
+                for chunk in _chunks(to_fetch, provider.batch_size)
+            ])
+
+        # Interleave providers so a deadline cuts every provider short evenly
+        tasks: List[Tuple[asyncio.Task, List[Tuple[str, str]], List[asyncio.Future]]] = []
+        for i in range(max(map(len, batches), default=0)):
+            for provider_batches in batches:
+                if i < len(provider_batches):
+                    provider, chunk, futures = provider_batches[i]
+                    task = asyncio.create_task(self._run_batch(provider, chunk, futures, semaphore))
+                    tasks.append((task, [(provider.name, prospect_id) for prospect_id in chunk], futures))
+        pending: Set[asyncio.Future] = set()
+        try:
+            if waiting:
+                timeout = self.deadline if deadline is None else deadline
+                _, pending = await asyncio.wait(waiting.values(), timeout=timeout)
+        finally:
+            for key in joined:
+                count = self._joined.pop(key) - 1
+                if count:
+                    self._joined[key] = count
+
+        # Cancel batches that missed the deadline unless another request is
+        # waiting on them; those, and batches that already answered, are left
+        # to finish (and write the cache) in the background
+        finished = []
+        timed_out_batches = 0
+        for task, keys, futures in tasks:
+            if task.done():
+                finished.append(task)
+                continue
+            answered = all(future.done() for future in futures)
+            if not answered:
+                timed_out_batches += 1
+                if not any(key in self._joined for key in keys):
+                    task.cancel()
+                    finished.append(task)
+                    continue
+            self._background.add(task)
+            task.add_done_callback(self._background_done)
+        outcomes = await asyncio.gather(*finished, return_exceptions=True)
+        failed_batches = sum(
+            1 for outcome in outcomes
+            if isinstance(outcome, Exception) and not isinstance(outcome, asyncio.CancelledError)
+        )
+        for key, future in waiting.items():
+            if future not in pending and not future.cancelled():
+                answers[key] = future.result()
+
+        enrichments = []
+        for prospect_id in unique_ids:
+            sections: Dict[str, Dict[str, Any]] = {}
+            answered = 0
+            for provider in providers:
+                answer = answers.get((provider.name, prospect_id))
+                if answer is None:
+                    continue
+                answered += 1
+                if answer:
+                    sections.setdefault(provider.section, {}).update(answer)
+            if answered < len(providers):
+                status = "partial"
+            elif sections or not providers:
+                status = "complete"
+            else:
+                status = "not_found"
+            enrichments.append({"prospect_id": prospect_id, "status": status, **sections})
+
+        statuses = [enrichment["status"] for enrichment in enrichments]
+        lookups = len(unique_ids) * len(providers)
+        return {
+            "enrichments": enrichments,
+            "summary": {
+                "requested": len(prospect_ids),
+                "unique": len(unique_ids),
+                "complete": statuses.count("complete"),
+                "partial": statuses.count("partial"),
+                "not_found": statuses.count("not_found"),
+                "enrichment_level": level,
+                "providers": [provider.name for provider in providers],
+                "cache_hits": lookups - len(waiting) - cached_failures,
+                "cached_failures": cached_failures,
+                "joined_in_flight": len(joined),
+                "batches": len(tasks),
+                "failed_batches": failed_batches,
+                "timed_out_batches": timed_out_batches,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            },
+        }
@@ -0,0 +1,167 @@
+"""Two-tier cache of enrichment provider answers.
+
+Answers are cached per provider and prospect, so each field group expires on
+its own schedule (an email's confidence goes stale long before a company's
+revenue band does). Prospects a provider had nothing for are cached too, as
+empty answers with a shorter time to live, and lookups that failed are
+remembered in process for a shorter time still, so a failing provider is not
+asked for the same prospects on every request. The in-process LRU tier is always
+on; an SQLite file can be added as a second tier that survives restarts and is
+shared by every worker on the machine.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence, Set
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+from caching import TTLCache
+
+Answer = Dict[str, Any]
+
+# Seconds each provider's answers stay fresh
+DEFAULT_TTLS: Dict[str, float] = {
+    "email_finder": 24 * 3600,
+    "contact_directory": 7 * 24 * 3600,
+    "company_data": 30 * 24 * 3600,
+    "company_signals": 3 * 24 * 3600,
+}
+DEFAULT_NEGATIVE_TTL = 3600.0
+DEFAULT_FAILURE_TTL = 60.0
+
+# SQLite caps the number of bound parameters per statement
+_SQLITE_BATCH = 500
+
+
+class SQLiteTier:
+    """Persistent cache tier in a local SQLite file, keyed by provider and prospect."""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS enrichment_cache ("
+                " provider TEXT NOT NULL,"
+                " prospect_id TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " answer TEXT NOT NULL,"
+                " PRIMARY KEY (provider, prospect_id))"
+            )
+        self.purge_expired()
+
+    def get_many(self, provider: str, prospect_ids: Sequence[str]) -> Dict[str, tuple]:
+        """Return ``{prospect_id: (expires_at, answer)}`` for the unexpired entries."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(prospect_ids), _SQLITE_BATCH):
+                chunk = prospect_ids[start:start + _SQLITE_BATCH]
+                rows = self._conn.execute(
+                    "SELECT prospect_id, expires_at, answer FROM enrichment_cache"
+                    f" WHERE provider = ? AND prospect_id IN ({','.join('?' * len(chunk))})"
+                    " AND expires_at > ?",
+                    (provider, *chunk, now),
+                )
+                for prospect_id, expires_at, answer in rows:
+                    found[prospect_id] = (expires_at, json.loads(answer))
+        return found
+
+    def set_many(self, provider: str, entries: Dict[str, tuple]) -> None:
+        """Store ``{prospect_id: (expires_at, answer)}``."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO enrichment_cache VALUES (?, ?, ?, ?)",
+                [
+                    (provider, prospect_id, expires_at, json.dumps(answer))
+                    for prospect_id, (expires_at, answer) in entries.items()
+                ],
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, returning how many were removed."""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM enrichment_cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+
+class EnrichmentCache:
+    """Per-provider answer cache: an in-process LRU in front of an optional SQLite tier."""
+
+    def __init__(
+        self,
+        ttls: Dict[str, float] | None = None,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        failure_ttl: float = DEFAULT_FAILURE_TTL,
+        default_ttl: float = 24 * 3600,
+        max_entries: int = 100_000,
+        path: str | None = None,
+    ) -> None:
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.negative_ttl = negative_ttl
+        self.default_ttl = default_ttl
+        self.memory: TTLCache[Answer] = TTLCache(max_entries=max_entries, ttl=default_ttl)
+        # Failed lookups, kept in process only: an outage is not shared with other workers
+        self.failures: TTLCache[bool] = TTLCache(max_entries=max_entries, ttl=failure_ttl)
+        self.disk = SQLiteTier(path) if path else None
+        self.disk_hits = 0
+
+    def ttl_for(self, provider: str, answer: Answer) -> float:
+        """Time to live of an answer: the provider's TTL, or the negative TTL if empty."""
+        if not answer:
+            return self.negative_ttl
+        return self.ttls.get(provider, self.default_ttl)
+
+    async def get_many(self, provider: str, prospect_ids: Sequence[str]) -> Dict[str, Answer]:
+        """Return cached answers (``{}`` for a cached miss); absent IDs need a lookup."""
+        found = {}
+        missing: List[str] = []
+        for prospect_id in prospect_ids:
+            answer = self.memory.get((provider, prospect_id))
+            if answer is None:
+                missing.append(prospect_id)
+            else:
+                found[prospect_id] = answer
+        if missing and self.disk is not None:
+            stored = await asyncio.to_thread(self.disk.get_many, provider, missing)
+            now = time.time()
+            for prospect_id, (expires_at, answer) in stored.items():
+                self.memory.set((provider, prospect_id), answer, ttl=expires_at - now)
+                found[prospect_id] = answer
+            self.disk_hits += len(stored)
+        return found
+
+    async def set_many(self, provider: str, answers: Dict[str, Answer]) -> None:
+        """Cache fresh provider answers in both tiers."""
+        now = time.time()
+        entries = {}
+        for prospect_id, answer in answers.items():
+            ttl = self.ttl_for(provider, answer)
+            self.memory.set((provider, prospect_id), answer, ttl=ttl)
+            entries[prospect_id] = (now + ttl, answer)
+        if entries and self.disk is not None:
+            await asyncio.to_thread(self.disk.set_many, provider, entries)
+
+    def failed(self, provider: str, prospect_ids: Sequence[str]) -> Set[str]:
+        """The prospects whose lookup from ``provider`` failed within the failure TTL."""
+        return {prospect_id for prospect_id in prospect_ids if self.failures.get((provider, prospect_id))}
+
+    def set_failed(self, provider: str, prospect_ids: Sequence[str]) -> None:
+        """Remember that looking ``prospect_ids`` up from ``provider`` failed."""
+        for prospect_id in prospect_ids:
+            self.failures.set((provider, prospect_id), True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the health endpoint."""
+        return {
+            **self.memory.stats(),
+            "cached_failures": len(self.failures),
+            "disk_tier": self.disk is not None,
+            "disk_hits": self.disk_hits,
+        }
@@ -0,0 +1,741 @@
+"""Entity resolution: one prospect's leads from several platforms merged into one.
+
+A prospect who posts on LinkedIn, Reddit and Twitter becomes three leads.
+``EntityIndex`` groups leads into entities as they are added to the store, and
+never compares every pair of leads. A new lead is compared only with the
+leads that share one of its blocking keys:
+
+* its email address, and each social profile it links (LinkedIn ``/in/``
+  pages, Twitter handles, Reddit users), normalized;
+* its normalized name together with its normalized company, or with the
+  domain of a company email address;
+* the LSH bands of a MinHash signature over the character trigrams of its name
+  and company, together with its first initial. Spellings that differ a
+  little ("Jon Smith, Acme Inc." and "Jon Smyth, ACME") then share a band.
+
+A lead is compared with the first lead that held each of its keys, plus at
+most ``max_candidates`` leads in each of its LSH buckets. The work per lead
+stays the same however many leads the store holds. Candidates are then
+verified:
+
+* a shared email, or the same name with the same company or email domain,
+  merges the leads;
+* a shared social profile also needs matching names (see ``names_match``);
+* an LSH candidate needs matching names, companies whose trigram Jaccard
+  similarity is at least ``threshold``, and no two different email addresses.
+
+Two entities are never merged if their company email domains differ.
+Merging relabels the smaller entity, so resolving n leads takes O(n log n).
+
+Store rows are immutable, so merges are applied when results are read.
+``collapse`` keeps the best-ranked row per entity among the rows a search matched. ``lead``
+rebuilds that row with the combined signals of the whole entity:
+
+* every merged lead ID and source platform;
+* the union of their pain points and sought solutions;
+* the strongest intent;
+* contact details and social profiles that any of the leads found.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+import zlib
+
+import numpy as np
+
+from columns import key_hash
+from lead_store import LeadStore
+from snapshot import exclusive, read_snapshot, snapshot_exists, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Email domains shared by unrelated people: neither blocking keys nor evidence of a conflict
+FREE_EMAIL_DOMAINS = frozenset({
+    "gmail.com", "googlemail.com", "yahoo.com", "hotmail.com", "outlook.com", "live.com",
+    "icloud.com", "me.com", "aol.com", "proton.me", "protonmail.com", "gmx.com",
+})
+
+# Words dropped from the end of company names
+COMPANY_SUFFIXES = frozenset({
+    "inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "company", "gmbh", "plc", "sa",
+})
+
+URGENCY_ORDER = {"low": 0, "medium": 1, "high": 2}
+
+# Universal hashing modulus for MinHash permutations, prime and above 2**32
+_PRIME = 4294967311
+
+# Bumped whenever resolution or the saved layout changes, so saved indexes are rebuilt
+ENTITY_INDEX_VERSION = 1
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_PROFILE_URL = re.compile(r"^(?:https?://)?(?:www\.|m\.|mobile\.|old\.)?([^/?#]+)/+([^?#]*)", re.IGNORECASE)
+_TWITTER_RESERVED = frozenset({"i", "home", "search", "hashtag", "intent", "share", "explore"})
+
+
+def normalize_name(value: str | None) -> str:
+    """Lowercase ``value`` without accents or punctuation."""
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+    return " ".join(_NON_ALNUM.sub(" ", value.lower()).split())
+
+
+def normalize_company(value: str | None) -> str:
+    """``normalize_name`` without trailing legal suffixes such as "Inc" or "LLC"."""
+    words = normalize_name(value).split()
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def email_domain(email: str | None) -> str:
+    """The domain of a company email address, or "" for free-mail or missing addresses."""
+    if not email or "@" not in email:
+        return ""
+    domain = email.rsplit("@", 1)[1].strip().lower()
+    return "" if domain in FREE_EMAIL_DOMAINS else domain
+
+
+def profile_key(platform: str, value: str | None) -> str | None:
+    """A key naming the account behind a social profile URL or handle, or ``None`` if it names none.
+
+    Post URLs that don't contain their author (LinkedIn posts, Reddit threads) name none.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    match = _PROFILE_URL.match(value)
+    if match is None:
+        handle = value.lstrip("@")
+        if not handle or "/" in handle or " " in handle:
+            return None
+        return f"{'twitter' if value.startswith('@') else platform.lower()}:{handle.lower()}"
+    host = match.group(1).lower()
+    parts = [part for part in match.group(2).split("/") if part]
+    if not parts:
+        return None
+    if host.endswith("linkedin.com") and len(parts) > 1 and parts[0] == "in":
+        return f"linkedin:{parts[1].lower()}"
+    if host in ("twitter.com", "x.com") and parts[0].lower() not in _TWITTER_RESERVED:
+        return f"twitter:{parts[0].lower()}"
+    if host.endswith("reddit.com") and len(parts) > 1 and parts[0] in ("user", "u"):
+        return f"reddit:{parts[1].lower()}"
+    return None
+
+
+def shingles(text: str) -> Set[str]:
+    """Character trigrams of ``text``, padded so that word boundaries count."""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def names_match(a: str, b: str) -> bool:
+    """Whether two normalized names may be the same person's.
+
+    First names must be equal or one a prefix of the other ("jon" and
+    "jonathan", or an initial); last names must be equal or one typo apart.
+    """
+    if a == b:
+        return True
+    words_a, words_b = a.split(), b.split()
+    if not (words_a and words_b):
+        return False
+    first_a, last_a = words_a[0], words_a[-1]
+    first_b, last_b = words_b[0], words_b[-1]
+    if not (first_a.startswith(first_b) or first_b.startswith(first_a)):
+        return False
+    return last_a == last_b or (min(len(last_a), len(last_b)) >= 4 and _one_edit_apart(last_a, last_b))
+
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """Whether one substitution, insertion or deletion turns ``a`` into ``b``."""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+def _union(lists: Iterable[List[str]]) -> List[str]:
+    """Distinct values of ``lists``, in order of first appearance."""
+    return list(dict.fromkeys(value for values in lists for value in values))
+
+
+def _table(entries: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """String keys mapped to rows, as key hashes sorted for ``_find`` and the row of each."""
+    hashes = np.fromiter((key_hash(key) for key in entries), np.uint64, len(entries))
+    rows = np.fromiter(entries.values(), np.uint32, len(entries))
+    order = np.argsort(hashes, kind="stable")
+    return hashes[order], rows[order]
+
+
+def _find(hashes: np.ndarray, rows: np.ndarray, value: int) -> int | None:
+    """The row of ``value`` in a table from ``_table``, or ``None``."""
+    i = int(np.searchsorted(hashes, np.uint64(value)))
+    return int(rows[i]) if i < len(hashes) and hashes[i] == value else None
+
+
+class MinHasher:
+    """MinHash signatures of trigram sets, cut into LSH bands.
+
+    Two sets share a band with probability ``1 - (1 - s**rows)**bands`` at
+    Jaccard similarity ``s``.
+    """
+
+    def __init__(self, bands: int = 8, rows: int = 4, seed: int = 1) -> None:
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        permutations = bands * rows
+        self._a = rng.integers(1, 2**31, size=(permutations, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 2**32, size=(permutations, 1), dtype=np.uint64)
+
+    def signatures(self, trigram_sets: Sequence[Set[str]]) -> np.ndarray:
+        """The signatures of non-empty ``trigram_sets``, one row each, computed in one pass."""
+        hashes = np.fromiter(
+            (zlib.crc32(t.encode()) for trigrams in trigram_sets for t in trigrams), np.uint64,
+        )
+        starts = np.cumsum([0] + [len(trigrams) for trigrams in trigram_sets[:-1]])
+        return np.minimum.reduceat((self._a * hashes + self._b) % _PRIME, starts, axis=1).T
+
+    def band_keys(self, trigram_sets: Sequence[Set[str]]) -> List[List[int]]:
+        """The LSH bucket of each band of each set's signature, as hashes."""
+        if not trigram_sets:
+            return []
+        bands = self.signatures(trigram_sets).reshape(len(trigram_sets), self.bands, self.rows)
+        # Stable across processes, so saved buckets stay valid
+        return [
+            [band << 32 | zlib.crc32(values.tobytes()) for band, values in enumerate(signature)]
+            for signature in bands
+        ]
+
+
+class EntityIndex:
+    """Groups the leads of a store into entities, at startup and then as leads are added.
+
+    ``threshold`` is the company name similarity an LSH candidate needs to be
+    merged.
+
+    An index can start from a *base* written by ``save`` and memory-mapped by
+    ``open_entity_index``: the entity of every row it covers, the members of
+    each entity, and the blocking keys and LSH buckets that later leads are
+    matched against. Only rows added after the base are resolved, into
+    in-memory tables kept in front of it.
+    """
+
+    def __init__(
+        self,
+        store: LeadStore,
+        threshold: float = 0.7,
+        max_candidates: int = 16,
+        hasher: MinHasher | None = None,
+        base: Tuple[Dict[str, np.ndarray], Dict[str, Any]] | None = None,
+    ) -> None:
+        self.store = store
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self.hasher = hasher or MinHasher()
+        # Plain views of the memory-mapped arrays, which index and search faster
+        arrays, meta = ({name: np.asarray(values) for name, values in base[0].items()}, base[1]) if base else ({}, {})
+        empty = np.empty(0, dtype=np.uint32)
+        self._base_count: int = meta.get("count", 0)
+        self._base_roots = arrays.get("roots", empty)
+        self._member_roots = arrays.get("member_roots", empty)
+        self._member_offsets = arrays.get("member_offsets", np.zeros(1, dtype=np.uint32))
+        self._member_rows = arrays.get("member_rows", empty)
+        self._block_hashes = arrays.get("block_hashes", np.empty(0, dtype=np.uint64))
+        self._block_rows = arrays.get("block_rows", empty)
+        self._string_hashes = arrays.get("string_hashes", np.empty(0, dtype=np.uint64))
+        self._string_rows = arrays.get("string_rows", empty)
+        self._bucket_keys = arrays.get("bucket_keys", np.empty(0, dtype=np.uint64))
+        self._bucket_offsets = arrays.get("bucket_offsets", np.zeros(1, dtype=np.uint32))
+        self._bucket_rows = arrays.get("bucket_rows", empty)
+        # Base root -> root it was merged into since; rows after the base -> root of their entity
+        self._moved: Dict[int, int] = {}
+        self._moved_arrays: Tuple[np.ndarray, np.ndarray] | None = None
+        self._tail = np.zeros(max(len(store) - self._base_count, 1024), dtype=np.uint32)
+        # Root -> rows of its entity, for entities changed since the base
+        self._members: Dict[int, List[int]] = {}
+        # Root -> company email domain
+        self._domains: Dict[int, str] = {}
+        # Blocking key -> first row that held it, and its normalized name
+        self._blocks: Dict[str, Tuple[int, str]] = {}
+        # Key of (initial, LSH band) -> latest "name|company" strings in it (a string
+        # while there is one); string -> its first row and email
+        self._buckets: Dict[int, str | List[str]] = {}
+        self._strings: Dict[str, Tuple[int, str]] = {}
+        # Base row -> its normalized name, company and email, for rows matched against
+        self._base_fields: Dict[int, Tuple[str, str, str]] = {}
+        # Root -> combined fields of its members, built on first read
+        self._combined: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._count: int = meta.get("entities", 0)
+        self.merged: int = meta.get("merged", 0)
+        self.refused: int = meta.get("refused", 0)
+        self._resolve(range(self._base_count, len(store)))
+        store.add_listener(lambda row: self._resolve([row]))
+
+    def __len__(self) -> int:
+        """Number of entities."""
+        return self._count
+
+    def entity(self, row: int) -> int:
+        """Root row of the entity of ``row``."""
+        if row >= self._base_count:
+            return int(self._tail[row - self._base_count])
+        return self._follow(int(self._base_roots[row]))
+
+    def _follow(self, root: int) -> int:
+        """The root a saved root was merged into since, through any later merges."""
+        moved = self._moved
+        while root in moved:
+            root = moved[root]
+        return root
+
+    def _roots(self, rows: np.ndarray) -> np.ndarray:
+        """Root rows of the entities of ``rows``."""
+        base = self._base_count
+        if not base:
+            return self._tail[rows]
+        in_base = rows < base
+        roots = np.empty(len(rows), dtype=np.uint32)
+        roots[in_base] = self._base_roots[rows[in_base]]
+        roots[~in_base] = self._tail[rows[~in_base] - base]
+        if self._moved:
+            moved = self._moved_arrays
+            if moved is None:
+                keys = np.array(sorted(self._moved), dtype=np.uint32)
+                finals = np.array([self._follow(int(key)) for key in keys], dtype=np.uint32)
+                moved = self._moved_arrays = (keys, finals)
+            keys, finals = moved
+            position = np.minimum(np.searchsorted(keys, roots), len(keys) - 1)
+            hit = keys[position] == roots
+            roots[hit] = finals[position[hit]]
+        return roots
+
+    def members(self, row: int) -> List[int]:
+        """Rows of the entity of ``row``."""
+        return self._member_list(self.entity(row))
+
+    def _member_list(self, root: int) -> List[int]:
+        members = self._members.get(root)
+        return members if members is not None else self._member_rows_of(root)
+
+    def _member_rows_of(self, root: int) -> List[int]:
+        """Rows of the entity the base has under ``root``."""
+        roots = self._member_roots
+        i = int(np.searchsorted(roots, np.uint32(root)))
+        if i < len(roots) and roots[i] == root:
+            return self._member_rows[self._member_offsets[i]:self._member_offsets[i + 1]].tolist()
+        return [root]
+
+    def _domain(self, root: int) -> str:
+        domain = self._domains.get(root)
+        if domain is None and root < self._base_count:
+            emails = self.store.text_values("email", self._member_list(root))
+            domain = self._domains[root] = next(filter(None, map(email_domain, emails)), "")
+        return domain or ""
+
+    def _fields(self, row: int) -> Tuple[str, str, str]:
+        """Normalized name, company and email of a base row."""
+        fields = self._base_fields.get(row)
+        if fields is None:
+            store = self.store
+            fields = self._base_fields[row] = (
+                normalize_name(store.text_values("prospect_name", [row])[0]),
+                normalize_company(store.categorical_values("company", [row])[0]),
+                store.text_values("email", [row])[0].strip().lower(),
+            )
+        return fields
+
+    def _base_block(self, key: str) -> Tuple[int, str] | None:
+        row = _find(self._block_hashes, self._block_rows, key_hash(key))
+        return None if row is None else (row, self._fields(row)[0])
+
+    def _known_string(self, text: str) -> bool:
+        return text in self._strings or (
+            self._base_count > 0 and _find(self._string_hashes, self._string_rows, key_hash(text)) is not None
+        )
+
+    def _base_bucket(self, key: int) -> List[Tuple[str, int, str]]:
+        """``(text, row, email)`` of the strings the base holds in LSH bucket ``key``."""
+        keys = self._bucket_keys
+        i = int(np.searchsorted(keys, np.uint64(key)))
+        if i == len(keys) or keys[i] != key:
+            return []
+        candidates = []
+        for row in self._bucket_rows[self._bucket_offsets[i]:self._bucket_offsets[i + 1]].tolist():
+            name, company, email = self._fields(row)
+            candidates.append((f"{name}|{company}", row, email))
+        return candidates
+
+    def _resolve(self, rows: Sequence[int], chunk: int = 2048) -> None:
+        # In chunks, so a full build holds the fields of a few leads at a time
+        for start in range(0, len(rows), chunk):
+            self._resolve_chunk(rows[start:start + chunk])
+
+    def _resolve_chunk(self, rows: Sequence[int]) -> None:
+        store = self.store
+        # Names and companies repeat across leads; normalize each once
+        names: Dict[str, str] = {}
+        companies: Dict[str, str] = {}
+        fields = []
+        for name, company, email, profiles in zip(
+            store.text_values("prospect_name", rows),
+            store.categorical_values("company", rows),
+            store.text_values("email", rows),
+            store.text_values("social_profiles", rows),
+        ):
+            if name not in names:
+                names[name] = normalize_name(name)
+            if company not in companies:
+                companies[company] = normalize_company(company)
+            fields.append((names[name], companies[company], email.strip().lower(), profiles))
+        new_texts = [
+            text for text in {f"{name}|{company}" for name, company, _, _ in fields if name and company}
+            if not self._known_string(text)
+        ]
+        buckets = dict(zip(new_texts, self.hasher.band_keys([shingles(text) for text in new_texts])))
+        with self._lock:
+            for row, (name, company, email, profiles) in zip(rows, fields):
+                self._add(row, name, company, email, profiles, buckets)
+
+    def _add(
+        self,
+        row: int,
+        name: str,
+        company: str,
+        email: str,
+        profiles: str,
+        buckets: Dict[str, List[int]],
+    ) -> None:
+        position = row - self._base_count
+        if position >= len(self._tail):
+            grown = np.zeros(max(2 * len(self._tail), position + 1), dtype=np.uint32)
+            grown[:len(self._tail)] = self._tail
+            self._tail = grown
+        self._tail[position] = row
+        self._members[row] = [row]
+        self._count += 1
+        domain = email_domain(email)
+        if domain:
+            self._domains[row] = domain
+
+        # Exact blocking keys, and whether a lead sharing one also needs a matching name
+        keys: List[Tuple[str, bool]] = []
+        if email:
+            keys.append(("email:" + email, False))
+        if profiles != "{}":
+            for platform, profile in json.loads(profiles).items():
+                key = profile_key(platform, profile)
+                if key:
+                    keys.append(("profile:" + key, True))
+        if name and company:
+            keys.append((f"company:{name}|{company}", False))
+        if name and domain:
+            keys.append((f"domain:{name}|{domain}", False))
+        for key, check_name in keys:
+            held = self._blocks.get(key)
+            if held is None:
+                if self._base_count:
+                    held = self._base_block(key)
+                held = self._blocks[key] = held or (row, name)
+            other, other_name = held
+            if self.entity(other) != self.entity(row) and (not check_name or names_match(name, other_name)):
+                self._merge(other, row)
+
+        # Approximate name and company matches; an exact repeat was merged above
+        text = f"{name}|{company}"
+        if text not in buckets or text in self._strings:
+            return
+        self._strings[text] = (row, email)
+        company_trigrams = None
+        checked: Set[str] = set()
+        for band in buckets[text]:
+            # Matching names share their first letter, so it narrows the bucket for free
+            bucket = band << 8 | ord(name[0]) & 0xFF
+            held = self._buckets.get(bucket)
+            candidates = self._base_bucket(bucket) if self._base_count else []
+            if held is not None:
+                texts = [held] if isinstance(held, str) else held
+                candidates.extend((other_text, *self._strings[other_text]) for other_text in texts)
+            for other_text, other, other_email in candidates[-self.max_candidates:]:
+                if other_text in checked:
+                    continue
+                checked.add(other_text)
+                if self.entity(other) == self.entity(row):
+                    continue
+                other_name, other_company = other_text.split("|", 1)
+                if not names_match(name, other_name):
+                    continue
+                if company_trigrams is None:
+                    company_trigrams = shingles(company)
+                if jaccard(company_trigrams, shingles(other_company)) < self.threshold:
+                    continue
+                # Similar isn't the same: two addresses mean two people
+                if email and other_email and email != other_email:
+                    continue
+                self._merge(other, row)
+            if held is None:
+                self._buckets[bucket] = text
+            elif isinstance(held, str):
+                self._buckets[bucket] = [held, text]
+            else:
+                held.append(text)
+                if len(held) > 2 * self.max_candidates:
+                    del held[:-self.max_candidates]
+
+    def _merge(self, a: int, b: int) -> None:
+        """Merge the entities of rows ``a`` and ``b`` unless their company domains conflict."""
+        root_a, root_b = self.entity(a), self.entity(b)
+        if root_a == root_b:
+            return
+        domain_a, domain_b = self._domain(root_a), self._domain(root_b)
+        if domain_a and domain_b and domain_a != domain_b:
+            self.refused += 1
+            return
+        members_a, members_b = self._member_list(root_a), self._member_list(root_b)
+        if len(members_a) < len(members_b):
+            root_a, root_b, members_a, members_b = root_b, root_a, members_b, members_a
+        self._members.pop(root_b, None)
+        if root_a not in self._members:
+            self._members[root_a] = members_a
+        members_a.extend(members_b)
+        base = self._base_count
+        for row in members_b:
+            if row >= base:
+                self._tail[row - base] = root_a
+        if base:
+            # Base rows keep their saved root, which now leads to root_a
+            self._moved[root_b] = root_a
+            self._moved_arrays = None
+        if domain_a or domain_b:
+            self._domains[root_a] = domain_a or domain_b
+        self._domains.pop(root_b, None)
+        self._combined.pop(root_a, None)
+        self._combined.pop(root_b, None)
+        self._count -= 1
+        self.merged += 1
+
+    def collapse(self, rows: Sequence[int], key: np.ndarray) -> np.ndarray:
+        """Positions in ``rows`` of one row per entity: the one with the highest ``key``.
+
+        Ties go to the earlier position; positions are returned ascending. Only
+        ``rows`` are grouped, so the cost grows with them, not with the store.
+        """
+        if not self.merged or len(rows) < 2:
+            return np.arange(len(rows))
+        order = np.argsort(-key, kind="stable")
+        _, first = np.unique(self._roots(np.asarray(rows)[order]), return_index=True)
+        return np.sort(order[first])
+
+    def lead(self, row: int, score: float | None = None) -> Dict[str, Any]:
+        """The lead at ``row`` combined with the other leads of its entity."""
+        lead = self.store.lead(row, score)
+        root = self.entity(row)
+        members = self._member_list(root)
+        if len(members) < 2:
+            return lead
+        combined = self._combined.get(root)
+        if combined is None:
+            count = len(members)
+            combined = self._combine(members[:count])
+            # Unless a lead joined meanwhile (searches may run in a thread)
+            if len(members) == count:
+                self._combined[root] = combined
+        lead["merged_lead_ids"] = combined["merged_lead_ids"]
+        lead["source_platforms"] = combined["source_platforms"]
+        lead["intent_analysis"].update(combined["intent_analysis"])
+        contact = lead["contact_info"]
+        if not contact["email"] and combined["email"]:
+            contact["email"], contact["email_confidence"] = combined["email"]
+        contact["phone"] = contact["phone"] or combined["phone"]
+        contact["social_profiles"] = {**combined["social_profiles"], **contact["social_profiles"]}
+        return lead
+
+    def _combine(self, rows: List[int]) -> Dict[str, Any]:
+        """Fields combined over the leads at ``rows``."""
+        leads = [self.store.lead(row) for row in sorted(rows)]
+        intents = [lead["intent_analysis"] for lead in leads]
+        contacts = [lead["contact_info"] for lead in leads]
+        strongest = max(intents, key=lambda intent: intent["confidence"])
+        emails = [(contact["email"], contact["email_confidence"]) for contact in contacts if contact["email"]]
+        profiles: Dict[str, str] = {}
+        for contact in reversed(contacts):
+            profiles.update(contact["social_profiles"])
+        return {
+            "merged_lead_ids": [lead["id"] for lead in leads],
+            "source_platforms": _union([lead["source_platform"]] for lead in leads if lead["source_platform"]),
+            "intent_analysis": {
+                "has_intent": any(intent["has_intent"] for intent in intents),
+                "confidence": strongest["confidence"],
+                "intent_level": strongest["intent_level"],
+                "urgency_level": max(
+                    (intent["urgency_level"] for intent in intents),
+                    key=lambda level: URGENCY_ORDER.get(level, -1),
+                ),
+                "solution_seeking": _union(intent["solution_seeking"] for intent in intents),
+                "pain_points": _union(intent["pain_points"] for intent in intents),
+            },
+            "email": max(emails, key=lambda email: email[1]) if emails else None,
+            "phone": next((contact["phone"] for contact in contacts if contact["phone"]), ""),
+            "social_profiles": profiles,
+        }
+
+    def get(self, lead_id: str) -> Dict[str, Any] | None:
+        """The combined lead of a lead ID, or ``None`` if it is unknown."""
+        row = self.store.row(lead_id)
+        return None if row is None else self.lead(row)
+
+    def distinct(self, lead_ids: Sequence[str]) -> List[str]:
+        """``lead_ids`` without repeats of an entity: the first ID given of each is kept.
+
+        Unknown IDs are kept as they are.
+        """
+        seen: Set[int] = set()
+        distinct = []
+        for lead_id in dict.fromkeys(lead_ids):
+            row = self.store.row(lead_id)
+            if row is not None:
+                root = self.entity(row)
+                if root in seen:
+                    continue
+                seen.add(root)
+            distinct.append(lead_id)
+        return distinct
+
+    def save(self, path: str) -> None:
+        """Write the index to directory ``path``, as a base for ``open_entity_index``.
+
+        Only an index resolved wholly in memory, without a base, can be saved.
+        """
+        if self._base_count:
+            raise ValueError("An entity index opened from a saved base cannot be saved again")
+        with self._lock:
+            count = len(self.store)
+            roots = self._tail[:count].copy()
+            member_rows = np.argsort(roots, kind="stable").astype(np.uint32)
+            member_roots, first = np.unique(roots[member_rows], return_index=True)
+            block_hashes, block_rows = _table({key: row for key, (row, _) in self._blocks.items()})
+            string_hashes, string_rows = _table({text: row for text, (row, _) in self._strings.items()})
+            bucket_keys = sorted(self._buckets)
+            bucket_lists = []
+            for key in bucket_keys:
+                held = self._buckets[key]
+                texts = [held] if isinstance(held, str) else held[-self.max_candidates:]
+                bucket_lists.append([self._strings[text][0] for text in texts])
+            meta = {
+                "fingerprint": _fingerprint(self.store, count, self.threshold, self.max_candidates, self.hasher),
+                "count": count,
+                "entities": self._count,
+                "merged": self.merged,
+                "refused": self.refused,
+            }
+        write_snapshot(path, {
+            "roots": roots,
+            "member_roots": member_roots,
+            "member_offsets": np.append(first, count).astype(np.uint32),
+            "member_rows": member_rows,
+            "block_hashes": block_hashes,
+            "block_rows": block_rows,
+            "string_hashes": string_hashes,
+            "string_rows": string_rows,
+            "bucket_keys": np.array(bucket_keys, dtype=np.uint64),
+            "bucket_offsets": np.cumsum([0] + [len(rows) for rows in bucket_lists], dtype=np.uint32),
+            "bucket_rows": np.fromiter((row for rows in bucket_lists for row in rows), np.uint32),
+        }, meta)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the health endpoint."""
+        return {
+            "leads": len(self.store),
+            "entities": len(self),
+            "merged": self.merged,
+            "refused": self.refused,
+            "saved_leads": self._base_count,
+        }
+
+
+def _fingerprint(
+    store: LeadStore,
+    count: int,
+    threshold: float,
+    max_candidates: int,
+    hasher: MinHasher,
+) -> Dict[str, Any]:
+    last_id = store.text_values("id", [count - 1])[0] if 0 < count <= len(store) else None
+    return {
+        "version": ENTITY_INDEX_VERSION,
+        "count": count,
+        "last_id": last_id,
+        "threshold": threshold,
+        "max_candidates": max_candidates,
+        "minhash": [hasher.bands, hasher.rows, hasher.seed],
+    }
+
+
+def open_entity_index(
+    store: LeadStore,
+    path: str | None = None,
+    threshold: float = 0.7,
+    max_candidates: int = 16,
+    hasher: MinHasher | None = None,
+) -> EntityIndex:
+    """Open the index saved at ``path`` if it matches ``store``, else resolve every lead (and save the result).
+
+    A saved index is memory-mapped, so workers share it and only leads added
+    since it was saved are resolved. Processes opening the same ``path``
+    together build it only once.
+    """
+    hasher = hasher or MinHasher()
+    options = {"threshold": threshold, "max_candidates": max_candidates, "hasher": hasher}
+    if not path:
+        return EntityIndex(store, **options)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with exclusive(f"{path}.lock"):
+        base = _load_base(store, path, threshold, max_candidates, hasher)
+        if base is None:
+            index = EntityIndex(store, **options)
+            index.save(path)
+            return index
+    return EntityIndex(store, base=base, **options)
+
+
+def _load_base(
+    store: LeadStore,
+    path: str,
+    threshold: float,
+    max_candidates: int,
+    hasher: MinHasher,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]] | None:
+    if not snapshot_exists(path):
+        return None
+    try:
+        arrays, meta = read_snapshot(path)
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring entity index at %s: %s", path, exc)
+        return None
+    count = meta.get("count", -1)
+    if meta.get("fingerprint") != _fingerprint(store, count, threshold, max_candidates, hasher):
+        logger.info("Entity index at %s is out of date; rebuilding", path)
+        return None
+    return arrays, meta
@@ -0,0 +1,470 @@
+"""Streaming ingestion of social conversations into the lead store.
+
+Raw conversation dumps are JSON-lines files of LinkedIn, Reddit and Twitter
+posts. The pipeline is a chain of generators, so a dump of any size (or a feed
+being appended to, with ``follow``) streams through in constant memory:
+
+1. ``read_jsonl`` parses records, skipping malformed lines;
+2. ``normalize`` maps each platform's shape onto one post layout;
+3. posts are deduplicated: by URL against the batches in flight, and by lead
+   id, derived from the platform and author (or the URL for anonymous
+   posts), against the store, so re-delivered posts and an author's repeat
+   posts are dropped;
+4. ``process_batch`` detects purchase intent and scores the posts, batched
+   across a process pool since this is the CPU-heavy stage;
+5. leads with intent are added to the store, whose listeners update the
+   search, vector and trend indexes incrementally.
+
+Store rows are immutable, so a later post by an already stored author is
+counted as a duplicate rather than replacing the lead.
+
+Run from ``lead-finder-server`` to ingest into the store at ``LEAD_STORE_PATH``
+(leads land in its append log)::
+
+    python -m ingestion dumps/*.jsonl --workers 4
+
+Accepted record fields (first one present wins):
+
+- platform: ``platform`` ("linkedin", "reddit", "twitter" or "x"), else inferred from the URL
+- url: ``url``, ``permalink`` (Reddit), or built from a tweet's ``id`` and author
+- author: ``author`` (a handle, or an object with ``handle``/``username``/``name``, ``title``
+  or ``headline``, ``company``, ``location``, ``industry``, ``company_size``), ``user`` (Twitter)
+- text: ``text``, ``full_text``, ``content``, ``commentary``, or Reddit ``title`` plus ``selftext``
+- time: ``created_at`` (ISO 8601 or Twitter's format) or ``created_utc`` (epoch seconds)
+- engagement: any of ``likes``, ``comments``, ``shares``, ``reactions``, ``score``,
+  ``num_comments``, ``favorite_count``, ``retweet_count``, ``reply_count``, ``like_count``,
+  also inside ``public_metrics``
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+import argparse
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+
+from lead_store import SCORE_COMPONENTS, LeadStore, build_default_store, format_timestamp, parse_timestamp
+from scoring import ScoringWeights
+
+logger = logging.getLogger(__name__)
+
+PLATFORMS = {"linkedin": "LinkedIn", "reddit": "Reddit", "twitter": "Twitter", "x": "Twitter"}
+_PLATFORM_DOMAINS = {"linkedin.com": "LinkedIn", "reddit.com": "Reddit", "twitter.com": "Twitter", "x.com": "Twitter"}
+_ENGAGEMENT_KEYS = (
+    "likes", "comments", "shares", "reactions", "score", "num_comments",
+    "favorite_count", "retweet_count", "reply_count", "like_count", "quote_count",
+)
+
+# Phrases of someone shopping for a solution, and of time pressure
+BUYING_PHRASES = (
+    "looking for", "recommendations for", "recommend", "need help with", "need a ", "evaluating",
+    "switching from", "switched", "alternative to", "alternatives to", "anyone use", "seeking",
+    "shopping for", "in the market for", "demo of", "pricing for", "vendors",
+)
+URGENCY_PHRASES = (
+    "asap", "urgent", "this week", "this month", "this quarter", "immediately", "right now",
+    "deadline", "by end of", "killing us",
+)
+# Solutions and pain points recognised in posts
+SOLUTIONS = (
+    "marketing automation", "sales automation", "lead generation", "crm software", "crm",
+    "campaign analytics", "data integration", "customer support tools", "attribution",
+    "workflow tools", "sales engagement", "email outreach", "analytics",
+)
+PAIN_POINTS = (
+    "manual processes", "data silos", "low conversion rates", "manual prospecting", "campaign tracking",
+    "roi measurement", "slow onboarding", "pipeline visibility", "churn", "lead quality",
+)
+_STRUGGLING = re.compile(
+    r"\b(?:struggling with|frustrated with|tired of|problems? with) ([a-z][a-z \-]{2,40}?)(?=[.,!?;]|$)"
+)
+
+# Job-title keywords and the role relevance they carry, most senior first
+ROLE_SENIORITY = (
+    (("chief", "ceo", "cto", "coo", "cmo", "cro", "founder", "owner", "president"), 0.9),
+    (("vp", "vice president", "head of"), 0.85),
+    (("director",), 0.75),
+    (("manager", "lead"), 0.6),
+)
+_ROLE_PATTERNS = [
+    (re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b"), relevance)
+    for keywords, relevance in ROLE_SENIORITY
+]
+INTENT_LEVELS = (("high", 0.8), ("medium", 0.6), ("low", 0.0))
+# Company sizes that fit the product best
+TARGET_COMPANY_SIZES = ("51-200", "201-1000")
+
+
+def read_jsonl(paths: Sequence[str], follow: bool = False, poll: float = 1.0) -> Iterator[Dict[str, Any]]:
+    """Yield the records of JSON-lines files in order, skipping malformed lines.
+
+    With ``follow``, keep reading the last file as it grows, like ``tail -f``.
+    """
+    for i, path in enumerate(paths):
+        with open(path, encoding="utf-8") as file:
+            number = 0
+            pending = ""
+            while True:
+                line = file.readline()
+                if not line:
+                    if not (follow and i == len(paths) - 1):
+                        break
+                    time.sleep(poll)
+                    continue
+                if not line.endswith("\n") and follow:
+                    # A record still being written; finish it on the next read
+                    pending += line
+                    continue
+                line, pending = pending + line, ""
+                number += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping malformed record at %s:%d", path, number)
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _first(record: Dict[str, Any], *keys: str) -> Any:
+    for key in keys:
+        value = record.get(key)
+        if value:
+            return value
+    return None
+
+
+def _timestamp(record: Dict[str, Any]) -> float:
+    if record.get("created_utc"):
+        return float(record["created_utc"])
+    created = record.get("created_at")
+    if not created:
+        return time.time()
+    try:
+        return parse_timestamp(created)
+    except ValueError:
+        pass
+    try:
+        # Twitter's "Wed Oct 10 20:19:24 +0000 2018"
+        return datetime.strptime(created, "%a %b %d %H:%M:%S %z %Y").timestamp()
+    except ValueError:
+        return time.time()
+
+
+def _engagement(record: Dict[str, Any]) -> int:
+    total = 0
+    for source in (record, record.get("public_metrics") or {}):
+        for key in _ENGAGEMENT_KEYS:
+            value = source.get(key)
+            if isinstance(value, (int, float)) and value > 0:
+                total += int(value)
+    return total
+
+
+def _headline(headline: str | None) -> Tuple[str | None, str | None]:
+    """Split a LinkedIn headline such as "VP Sales at Acme" into title and company."""
+    if not headline:
+        return None, None
+    title, _, company = headline.partition(" at ")
+    return title.strip() or None, company.strip() or None
+
+
+def normalize(record: Dict[str, Any]) -> Dict[str, Any] | None:
+    """Map a raw post onto the common post layout, or ``None`` if it lacks text or an origin."""
+    author = record.get("author") or record.get("user") or {}
+    if isinstance(author, str):
+        author = {"handle": author}
+    handle = _first(author, "handle", "username", "screen_name", "name")
+    url = _first(record, "url", "permalink")
+    platform = PLATFORMS.get(str(record.get("platform") or "").casefold())
+    if url and url.startswith("/r/"):
+        url = "https://reddit.com" + url
+        platform = platform or "Reddit"
+    if platform is None and url:
+        host = re.sub(r"^https?://(www\.)?", "", url).split("/", 1)[0]
+        platform = _PLATFORM_DOMAINS.get(host)
+    if platform is None and "subreddit" in record:
+        platform = "Reddit"
+    if platform is None and "user" in record:
+        platform = "Twitter"
+    if not url and platform == "Twitter" and handle and record.get("id"):
+        url = f"https://twitter.com/{handle}/status/{record['id']}"
+
+    if record.get("selftext") is not None:
+        text = " ".join(part for part in (record.get("title"), record.get("selftext")) if part)
+    else:
+        text = _first(record, "text", "full_text", "content", "commentary")
+    if not text or not platform or not (url or handle):
+        return None
+    title, company = _headline(author.get("headline"))
+    return {
+        "platform": platform,
+        "url": url or "",
+        "handle": handle or "",
+        "name": _first(author, "name", "display_name") or handle,
+        "title": author.get("title") or title,
+        "company": author.get("company") or company,
+        "location": author.get("location") or None,
+        "industry": author.get("industry") or None,
+        "company_size": author.get("company_size") or None,
+        "profile_url": _first(author, "profile_url", "url"),
+        "text": " ".join(str(text).split()),
+        "posted_at": _timestamp(record),
+        "engagement": _engagement(record),
+    }
+
+
+def lead_id(post: Dict[str, Any]) -> str:
+    """Stable lead id of a post's author (of its URL when anonymous)."""
+    origin = f"{post['platform']}:{post['handle'].casefold()}" if post["handle"] else post["url"]
+    return "lead-" + hashlib.blake2b(origin.encode(), digest_size=8).hexdigest()
+
+
+def _level(value: float) -> str:
+    for level, lower in INTENT_LEVELS:
+        if value >= lower:
+            return level
+    return INTENT_LEVELS[-1][0]
+
+
+def detect_intent(text: str) -> Dict[str, Any]:
+    """Rule-based purchase intent of a post, in the shape of a lead's ``intent_analysis``."""
+    lowered = text.casefold()
+    buying = sum(phrase in lowered for phrase in BUYING_PHRASES)
+    urgent = sum(phrase in lowered for phrase in URGENCY_PHRASES)
+    solutions = [solution for solution in SOLUTIONS if solution in lowered]
+    # Prefer "crm software" to a bare "crm" it contains
+    solutions = [
+        solution for solution in solutions
+        if not any(solution != other and solution in other for other in solutions)
+    ]
+    pains = [pain for pain in PAIN_POINTS if pain in lowered]
+    pains += [match.strip() for match in _STRUGGLING.findall(lowered) if match.strip() not in pains]
+
+    confidence = 0.0
+    if buying:
+        confidence = 0.55 + 0.1 * min(buying - 1, 2)
+    elif pains:
+        confidence = 0.4
+    if confidence:
+        confidence += 0.1 * bool(solutions) + 0.05 * bool(pains) + 0.05 * ("?" in text)
+    confidence = round(min(confidence, 0.95), 2)
+    urgency = 0.8 if urgent else 0.6 if buying and solutions else 0.3
+    return {
+        "has_intent": confidence >= 0.5,
+        "confidence": confidence,
+        "intent_level": _level(confidence),
+        "urgency_level": _level(urgency),
+        "solution_seeking": solutions[:3],
+        "pain_points": pains[:3],
+    }
+
+
+def _role_relevance(title: str | None) -> float:
+    if not title:
+        return 0.3
+    lowered = title.casefold()
+    for pattern, relevance in _ROLE_PATTERNS:
+        if pattern.search(lowered):
+            return relevance
+    return 0.4
+
+
+def score_post(post: Dict[str, Any], intent: Dict[str, Any], weights: Sequence[float]) -> Dict[str, Any]:
+    """Score breakdown and lead score of a post, given ``ScoringWeights.vector()``."""
+    fit = 0.5 + 0.15 * (post["company_size"] in TARGET_COMPANY_SIZES)
+    fit += 0.1 * bool(post["industry"]) + 0.1 * bool(post["company"])
+    age_days = max(time.time() - post["posted_at"], 0) / 86400
+    breakdown = {
+        "intent_strength": intent["confidence"],
+        "company_fit": round(min(fit, 1.0), 2),
+        "role_relevance": _role_relevance(post["title"]),
+        "engagement_level": round(min(0.3 + 0.15 * math.log10(1 + post["engagement"]), 1.0), 2),
+        "timing_signals": round({"high": 0.9, "medium": 0.7}.get(intent["urgency_level"], 0.5)
+                                * (1.0 if age_days <= 7 else 0.8 if age_days <= 30 else 0.6), 2),
+    }
+    score = sum(breakdown[component] * weight for component, weight in zip(SCORE_COMPONENTS, weights))
+    return {"lead_score": round(float(score), 2), "score_breakdown": breakdown}
+
+
+def to_lead(post: Dict[str, Any], weights: Sequence[float] | None = None) -> Dict[str, Any]:
+    """Build the lead record of a normalized post."""
+    intent = detect_intent(post["text"])
+    profile = post["profile_url"] or post["url"]
+    return {
+        "id": lead_id(post),
+        "prospect_name": post["name"],
+        "company": post["company"],
+        "title": post["title"],
+        "industry": post["industry"],
+        "location": post["location"],
+        "source_platform": post["platform"],
+        "source_url": post["url"],
+        "source_content": post["text"],
+        "discovered_at": format_timestamp(post["posted_at"]),
+        **score_post(post, intent, ScoringWeights().vector().tolist() if weights is None else weights),
+        "intent_analysis": intent,
+        "contact_info": {
+            "email": None,
+            "email_confidence": 0.0,
+            "phone": None,
+            "social_profiles": {post["platform"].lower(): profile} if profile else {},
+        },
+        "company_insights": {
+            "industry": post["industry"],
+            "size": post["company_size"],
+            "revenue": None,
+            "technologies": [],
+            "recent_news": [],
+        },
+    }
+
+
+def process_batch(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Detect intent in and score a batch of normalized posts; runs in pool workers."""
+    weights = ScoringWeights().vector().tolist()
+    return [to_lead(post, weights) for post in posts]
+
+
+class IngestStats:
+    """Counters of one ingestion run."""
+
+    __slots__ = ("read", "invalid", "duplicates", "no_intent", "added", "started")
+
+    def __init__(self) -> None:
+        self.read = self.invalid = self.duplicates = self.no_intent = self.added = 0
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def records_per_second(self) -> float:
+        seconds = self.seconds
+        return self.read / seconds if seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "records": self.read,
+            "invalid": self.invalid,
+            "duplicates": self.duplicates,
+            "no_intent": self.no_intent,
+            "leads_added": self.added,
+            "seconds": round(self.seconds, 2),
+            "records_per_second": round(self.records_per_second, 1),
+        }
+
+
+class IngestionPipeline:
+    """Streams raw posts into a ``LeadStore``.
+
+    With ``workers`` > 0, intent detection and scoring run in that many
+    processes, with at most ``2 * workers`` batches in flight so memory stays
+    bounded however fast records arrive. The store is only touched from the
+    calling thread.
+    """
+
+    def __init__(
+        self,
+        store: LeadStore,
+        workers: int = 0,
+        batch_size: int = 500,
+        min_confidence: float = 0.5,
+    ) -> None:
+        self.store = store
+        self.workers = workers
+        self.batch_size = batch_size
+        self.min_confidence = min_confidence
+        # URLs of the posts in batches being processed (posts without one are told apart by author)
+        self._in_flight: Set[str] = set()
+
+    def _posts(self, records: Iterable[Dict[str, Any]], stats: IngestStats) -> Iterator[Dict[str, Any]]:
+        """Normalize and deduplicate records."""
+        for record in records:
+            stats.read += 1
+            post = normalize(record)
+            if post is None:
+                stats.invalid += 1
+                continue
+            url = post["url"]
+            if (url and url in self._in_flight) or lead_id(post) in self.store:
+                stats.duplicates += 1
+                continue
+            if url:
+                self._in_flight.add(url)
+            yield post
+
+    def _scored(self, batches: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """Run ``process_batch`` over ``batches``, in a process pool if configured, keeping their order."""
+        if self.workers <= 0:
+            for batch in batches:
+                yield process_batch(batch)
+            return
+        with ProcessPoolExecutor(self.workers) as pool:
+            pending: Deque[Future] = deque()
+            for batch in batches:
+                pending.append(pool.submit(process_batch, batch))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def run(self, records: Iterable[Dict[str, Any]], report_every: float | None = None) -> IngestStats:
+        """Ingest ``records``, logging throughput every ``report_every`` seconds if given."""
+        stats = IngestStats()
+        reported = time.perf_counter()
+        for leads in self._scored(batched(self._posts(records, stats), self.batch_size)):
+            for lead in leads:
+                if lead["source_url"]:
+                    self._in_flight.discard(lead["source_url"])
+                if lead["intent_analysis"]["confidence"] < self.min_confidence:
+                    stats.no_intent += 1
+                    continue
+                if lead["id"] in self.store:
+                    # The author's earlier post in the same batches had intent too
+                    stats.duplicates += 1
+                    continue
+                self.store.add(lead)
+                stats.added += 1
+            if report_every is not None and time.perf_counter() - reported >= report_every:
+                reported = time.perf_counter()
+                logger.info("Ingested %s", stats.as_dict())
+        return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest JSON-lines conversation dumps into the lead store")
+    parser.add_argument("paths", nargs="+", help="JSON-lines files, read in order")
+    parser.add_argument("--follow", action="store_true", help="Keep reading the last file as it grows")
+    parser.add_argument("--workers", type=int, default=0, help="Processes for intent detection and scoring")
+    parser.add_argument("--batch-size", type=int, default=500, help="Posts per worker batch")
+    parser.add_argument("--min-confidence", type=float, default=0.5, help="Intent confidence a lead needs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    pipeline = IngestionPipeline(build_default_store(), args.workers, args.batch_size, args.min_confidence)
+    stats = pipeline.run(read_jsonl(args.paths, follow=args.follow), report_every=10.0)
+    print(json.dumps(stats.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Request instrumentation: Prometheus metrics and an opt-in slow-request profiler.
+
+``Metrics`` is a small registry of counters, histograms and gauges rendered in
+the Prometheus text format. Histograms have fixed buckets, so recording a
+value is a bisect and two additions under an uncontended lock, cheap enough
+for every request. Gauges are read from callbacks at scrape time. Each server
+worker keeps its own registry.
+
+``HTTPMetricsMiddleware`` records the duration and the request and response
+body sizes of every HTTP request.
+
+``SlowRequestProfiler`` samples the event loop thread's stack at a fixed
+interval while enabled, and keeps the collapsed stacks sampled during requests
+that took longer than a threshold. Work handed to other threads (e.g. large
+searches run as background jobs) is not sampled.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter as _Tally, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, Sequence, Tuple
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds; from sub-millisecond cache hits to background-sized searches
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic count per combination of label values."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets, per combination of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Per label values: a count per bucket (the last one past every bound), then sum
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def count(self, *labels: str) -> int:
+        counts = self._values.get(labels)
+        return int(sum(counts[:-1])) if counts else 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = [(labels, list(counts)) for labels, counts in self._values.items()]
+        names = (*self.labels, "le")
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                yield f"{self.name}_bucket{_labels(names, (*labels, le))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {_number(counts[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+class Gauge:
+    """Value read from a callback at scrape time; the callback returns ``{label values: value}``.
+
+    ``kind="counter"`` exposes a count kept elsewhere, such as a cache's hits.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], Dict[Tuple[str, ...], float]],
+        labels: Sequence[str] = (),
+        kind: str = "gauge",
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.kind = kind
+        self._read = read
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in self._read().items():
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+
+
+class Metrics:
+    """Registry of the metrics a process exposes."""
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], Dict[Tuple[str, ...], float]],
+        labels: Sequence[str] = (),
+        kind: str = "gauge",
+    ) -> Gauge:
+        return self._register(Gauge(name, help, read, labels, kind))
+
+    def _register(self, metric: Any) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # A failing gauge callback must not take the other metrics down
+                logger.exception("Could not render metric %s", metric.name)
+        lines.append("")
+        return "\n".join(lines)
+
+
+class HTTPMetricsMiddleware:
+    """ASGI middleware recording the duration and body sizes of HTTP requests per path."""
+
+    def __init__(self, app: Any, durations: Histogram, sizes: Histogram, paths: Sequence[str]) -> None:
+        self.app = app
+        self.durations = durations
+        self.sizes = sizes
+        # Other paths are recorded as "other", so clients cannot grow the label set
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"] if scope["path"] in self.paths else "other"
+        started = time.perf_counter()
+        received = 0
+        sent = 0
+
+        async def counting_receive() -> Dict[str, Any]:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Dict[str, Any]) -> None:
+            nonlocal sent
+            if message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            self.durations.observe(time.perf_counter() - started, path)
+            self.sizes.observe(received, path, "request")
+            self.sizes.observe(sent, path, "response")
+
+
+class SlowRequestProfiler:
+    """Sampling profiler keeping the stacks of requests slower than ``threshold`` seconds."""
+
+    def __init__(self, threshold: float, interval: float = 0.005, keep: int = 50, top: int = 20) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self.top = top
+        self.slow: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        # (monotonic time, collapsed stack) of recent samples, covering requests up to 4x the threshold
+        self._samples: Deque[Tuple[float, str]] = deque(maxlen=int(max(4 * threshold, 1) / interval))
+        self._thread_id: int | None = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._sampler: threading.Thread | None = None
+
+    def begin(self) -> float:
+        """Mark the start of a request on the calling (event loop) thread; returns its start time."""
+        with self._lock:
+            self._in_flight += 1
+            if self._sampler is None:
+                self._thread_id = threading.get_ident()
+                self._sampler = threading.Thread(target=self._sample, name="slow-request-profiler", daemon=True)
+                self._sampler.start()
+        return time.monotonic()
+
+    def end(self, started: float, label: str) -> None:
+        """Mark the end of a request; keeps its profile if it was slow."""
+        finished = time.monotonic()
+        with self._lock:
+            self._in_flight -= 1
+        duration = finished - started
+        if duration < self.threshold:
+            return
+        stacks = _Tally(stack for at, stack in list(self._samples) if started <= at <= finished)
+        profile = {
+            "request": label,
+            "duration_ms": round(duration * 1000, 1),
+            "finished_at": datetime.now().isoformat(),
+            "samples": sum(stacks.values()),
+            "stacks": [{"stack": stack, "samples": count} for stack, count in stacks.most_common(self.top)],
+        }
+        self.slow.append(profile)
+        hottest = profile["stacks"][0]["stack"].rsplit(";", 3)[-3:] if stacks else []
+        logger.warning("Slow request %s took %.0f ms; hottest: %s", label, duration * 1000, " <- ".join(reversed(hottest)))
+
+    def _sample(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            if not self._in_flight:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            self._samples.append((time.monotonic(), ";".join(reversed(stack))))
@@ -0,0 +1,327 @@
+"""In-process background jobs.
+
+Tool calls that would run too long for a chat turn (large CRM exports, searches
+over very large candidate sets) are handed to ``JobScheduler``, which returns a
+job straight away and runs it on the server's event loop. Clients poll the job
+for progress and its result.
+
+Jobs start in priority order (lower runs first) up to ``max_concurrency`` at a
+time, and ``kind_limits`` caps how many jobs of one kind may run at once, so a
+batch of huge exports always leaves slots free for interactive work. Finished
+jobs are kept for polling until ``max_finished`` newer ones have finished.
+
+With several server workers a poll may reach a different worker than the one
+running the job, so a scheduler can publish its jobs to a ``JobBoard``, an
+SQLite file every worker on the machine reads. Jobs still run where they were
+submitted; a cancellation requested through another worker takes effect at
+the job's next progress report.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import count
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple
+import asyncio
+import heapq
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+# Priorities: interactive requests start before bulk work
+INTERACTIVE = 0
+BULK = 10
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class Job:
+    """A unit of background work, with its progress and outcome."""
+
+    __slots__ = (
+        "id", "kind", "description", "priority", "status", "done", "total",
+        "result", "error", "created_at", "started_at", "finished_at", "_run", "_task",
+        "_on_report",
+    )
+
+    def __init__(
+        self,
+        kind: str,
+        run: Callable[["Job"], Awaitable[Any]],
+        priority: int,
+        description: str,
+    ) -> None:
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.description = description
+        self.priority = priority
+        self.status = QUEUED
+        self.done = 0
+        self.total: int | None = None
+        self.result: Any = None
+        self.error: str | None = None
+        self.created_at = datetime.now()
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self._run = run
+        self._task: asyncio.Task | None = None
+        self._on_report: Callable[["Job"], None] | None = None
+
+    @classmethod
+    def restore(cls, status: Dict[str, Any], result: Any = None) -> "Job":
+        """Rebuild a job from its ``as_dict`` status, e.g. one published by another worker."""
+        job = cls(status["kind"], None, status["priority"], status["description"])
+        job.id = status["job_id"]
+        job.status = status["status"]
+        job.done = status["progress"]["done"]
+        job.total = status["progress"]["total"]
+        job.result = result
+        job.error = status["error"]
+        job.created_at = datetime.fromisoformat(status["created_at"])
+        for field in ("started_at", "finished_at"):
+            if status[field]:
+                setattr(job, field, datetime.fromisoformat(status[field]))
+        return job
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED, CANCELLED)
+
+    def report(self, done: int, total: int | None = None) -> None:
+        """Record progress; called by the job's own coroutine."""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if self._on_report is not None:
+            self._on_report(self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Job status for clients, without the result."""
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "description": self.description,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": {
+                "done": self.done,
+                "total": self.total,
+                "fraction": round(self.done / self.total, 3) if self.total else None,
+            },
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class JobBoard:
+    """Statuses and results of jobs in a local SQLite file, shared by the workers on one machine."""
+
+    def __init__(self, path: str, retention: float = 24 * 3600) -> None:
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " cancel INTEGER NOT NULL DEFAULT 0,"
+                " updated_at REAL NOT NULL)"
+            )
+        self.purge()
+
+    def publish(self, job: Job) -> bool:
+        """Record the job's current status (and result, once completed); returns whether it should be cancelled."""
+        result = json.dumps(job.result, default=str) if job.status == COMPLETED else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, result, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (job_id) DO UPDATE SET"
+                " status = excluded.status, result = excluded.result, updated_at = excluded.updated_at",
+                (job.id, json.dumps(job.as_dict()), result, time.time()),
+            )
+            (cancel,) = self._conn.execute("SELECT cancel FROM jobs WHERE job_id = ?", (job.id,)).fetchone()
+        return bool(cancel)
+
+    def lookup(self, job_id: str) -> Job | None:
+        with self._lock:
+            row = self._conn.execute("SELECT status, result FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return Job.restore(json.loads(row[0]), json.loads(row[1]) if row[1] is not None else None)
+
+    def request_cancel(self, job_id: str) -> Job | None:
+        """Flag a job for cancellation by the worker running it."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET cancel = 1 WHERE job_id = ?", (job_id,))
+        return self.lookup(job_id)
+
+    def purge(self) -> int:
+        """Forget jobs not updated within the retention period, returning how many."""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE updated_at <= ?", (time.time() - self.retention,)
+            ).rowcount
+
+
+class JobScheduler:
+    """Priority scheduler running jobs as tasks on the current event loop."""
+
+    # Seconds between progress updates published to the board, per job
+    publish_interval = 0.5
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        kind_limits: Dict[str, int] | None = None,
+        max_finished: int = 1000,
+        board: JobBoard | None = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.kind_limits = dict(kind_limits or {})
+        self.max_finished = max_finished
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queue: List[Tuple[int, int, Job]] = []
+        self._sequence = count()
+        self._running: Dict[str, int] = {}
+        self._finished: Deque[str] = deque()
+        self.board = board
+        self._published: Dict[str, float] = {}
+
+    def submit(
+        self,
+        kind: str,
+        run: Callable[[Job], Awaitable[Any]],
+        priority: int = BULK,
+        description: str = "",
+    ) -> Job:
+        """Queue ``run(job)`` and return its job immediately."""
+        job = Job(kind, run, priority, description)
+        self._jobs[job.id] = job
+        if self.board is not None:
+            job._on_report = self._reported
+            self._publish(job)
+        heapq.heappush(self._queue, (priority, next(self._sequence), job))
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Look up a job, falling back to the board for jobs submitted to other workers."""
+        job = self._jobs.get(job_id)
+        if job is None and self.board is not None:
+            return self.board.lookup(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> Job | None:
+        """Cancel a queued or running job; finished jobs are left as they are."""
+        job = self._jobs.get(job_id)
+        if job is None and self.board is not None:
+            job = self.board.lookup(job_id)
+            return self.board.request_cancel(job_id) if job is not None and not job.finished else job
+        if job is None or job.finished:
+            return job
+        if job._task is None:
+            # Still queued: the dispatcher skips it when it reaches the heap top
+            self._finish(job, CANCELLED)
+        else:
+            job._task.cancel()
+        return job
+
+    def _dispatch(self) -> None:
+        """Start the best queued jobs that fit the concurrency limits."""
+        skipped = []
+        while self._queue and sum(self._running.values()) < self.max_concurrency:
+            entry = heapq.heappop(self._queue)
+            job = entry[2]
+            if job.status != QUEUED:
+                continue
+            if self._running.get(job.kind, 0) >= self.kind_limits.get(job.kind, self.max_concurrency):
+                skipped.append(entry)
+                continue
+            job.status = RUNNING
+            job.started_at = datetime.now()
+            if self.board is not None and self._publish(job):
+                # Cancelled through another worker while queued
+                self._finish(job, CANCELLED)
+                continue
+            self._running[job.kind] = self._running.get(job.kind, 0) + 1
+            job._task = asyncio.get_running_loop().create_task(self._execute(job))
+            # Also runs for a task cancelled before its first step, which never enters _execute
+            job._task.add_done_callback(lambda task, job=job: self._release(job))
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+
+    async def _execute(self, job: Job) -> None:
+        try:
+            job.result = await job._run(job)
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED)
+        except Exception as exc:
+            job.error = str(exc)
+            self._finish(job, FAILED)
+        else:
+            self._finish(job, COMPLETED)
+
+    def _release(self, job: Job) -> None:
+        """Free the concurrency slot of a job whose task is done, and start the next jobs."""
+        if not job.finished:
+            self._finish(job, CANCELLED)
+        self._running[job.kind] -= 1
+        self._dispatch()
+
+    def _publish(self, job: Job) -> bool:
+        """Publish the job to the board; returns whether it should be cancelled."""
+        self._published[job.id] = time.monotonic()
+        return self.board.publish(job)
+
+    def _reported(self, job: Job) -> None:
+        """Publish throttled progress of a running job, cancelling it if that was requested elsewhere."""
+        if job.finished or time.monotonic() - self._published.get(job.id, 0.0) < self.publish_interval:
+            return
+        if self._publish(job) and job._task is not None:
+            job._task.cancel()
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = datetime.now()
+        job._run = None
+        if self.board is not None:
+            self._published.pop(job.id, None)
+            self.board.publish(job)
+        self._finished.append(job.id)
+        while len(self._finished) > self.max_finished:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the health endpoint."""
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "kind_limits": self.kind_limits,
+            "running": {kind: running for kind, running in self._running.items() if running},
+            "jobs": statuses,
+            "shared_board": self.board is not None,
+        }
+
+    async def aclose(self) -> None:
+        """Cancel unfinished jobs, e.g. at shutdown."""
+        tasks = [job._task for job in self._jobs.values() if job._task is not None and not job.finished]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
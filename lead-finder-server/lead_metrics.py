@@ -0,0 +1,113 @@
+"""Single-pass aggregation of lead metrics.
+
+``LeadMetrics`` folds leads in one at a time, so every breakdown, the average
+score and the score histogram come out of a single pass over the leads. The
+lead store keeps one as a running total for the whole corpus.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+# Platforms always reported, even with a zero count
+PLATFORMS = ("LinkedIn", "Reddit", "Twitter")
+
+# Lower score bounds of the tiers the lead-finder widget colours leads by
+SCORE_TIERS = (("hot", 0.8), ("warm", 0.6), ("cold", 0.0))
+
+HISTOGRAM_BINS = 10
+
+
+def score_tier(score: float) -> str:
+    """Return the hot/warm/cold tier of a lead score."""
+    for tier, lower in SCORE_TIERS:
+        if score >= lower:
+            return tier
+    return SCORE_TIERS[-1][0]
+
+
+def score_bin(score: float) -> int:
+    """Return the histogram bin of a lead score in [0, 1]."""
+    return min(max(int(score * HISTOGRAM_BINS), 0), HISTOGRAM_BINS - 1)
+
+
+class LeadMetrics:
+    """Streaming aggregate of lead counts, breakdowns and score distribution."""
+
+    __slots__ = ("count", "score_total", "platforms", "industries", "locations", "tiers", "histogram")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.score_total = 0.0
+        self.platforms: Counter[str] = Counter()
+        self.industries: Counter[str] = Counter()
+        self.locations: Counter[str] = Counter()
+        self.tiers: Counter[str] = Counter()
+        self.histogram: List[int] = [0] * HISTOGRAM_BINS
+
+    @classmethod
+    def from_leads(cls, leads: Iterable[Dict[str, Any]]) -> LeadMetrics:
+        """Aggregate ``leads`` in one pass."""
+        metrics = cls()
+        for lead in leads:
+            metrics.add(lead)
+        return metrics
+
+    @classmethod
+    def from_columns(
+        cls,
+        scores: np.ndarray,
+        platforms: Dict[str, int],
+        industries: Dict[str, int],
+        locations: Dict[str, int],
+    ) -> LeadMetrics:
+        """Build an aggregate from a score array and precomputed value counts."""
+        metrics = cls()
+        metrics.count = len(scores)
+        metrics.score_total = float(scores.sum())
+        metrics.platforms.update(platforms)
+        metrics.industries.update(industries)
+        metrics.locations.update(locations)
+        remaining = np.ones(len(scores), dtype=bool)
+        for tier, lower in SCORE_TIERS:
+            in_tier = remaining & (scores >= lower)
+            metrics.tiers[tier] = int(in_tier.sum())
+            remaining &= ~in_tier
+        bins = np.clip((scores * HISTOGRAM_BINS).astype(np.intp), 0, HISTOGRAM_BINS - 1)
+        metrics.histogram = np.bincount(bins, minlength=HISTOGRAM_BINS).tolist()
+        return metrics
+
+    def add(self, lead: Dict[str, Any]) -> None:
+        """Fold one lead into the aggregate."""
+        self.add_values(lead["lead_score"], lead["source_platform"], lead["industry"], lead["location"])
+
+    def add_values(self, score: float, platform: str, industry: str, location: str) -> None:
+        """Fold one lead, given as its aggregated fields, into the aggregate."""
+        self.count += 1
+        self.score_total += score
+        self.platforms[platform] += 1
+        self.industries[industry] += 1
+        self.locations[location] += 1
+        self.tiers[score_tier(score)] += 1
+        self.histogram[score_bin(score)] += 1
+
+    @property
+    def average_score(self) -> float:
+        return self.score_total / self.count if self.count else 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Render the aggregate in the shape of the ``metrics`` payload."""
+        platforms = {platform: self.platforms.get(platform, 0) for platform in PLATFORMS}
+        platforms.update(self.platforms)
+        return {
+            "qualified_leads_found": self.count,
+            "average_lead_score": self.average_score,
+            "platform_breakdown": platforms,
+            "industry_breakdown": dict(self.industries),
+            "geographic_distribution": dict(self.locations),
+            "score_tiers": {tier: self.tiers.get(tier, 0) for tier, _ in SCORE_TIERS},
+            "score_histogram": list(self.histogram),
+        }
@@ -0,0 +1,913 @@
+"""In-memory lead store with secondary indexes.
+
+The store is built once at startup. Leads are kept column by column (pooled
+strings, packed text and typed numeric arrays) rather than as nested dicts, and
+every indexed field keeps a posting list of row numbers in insertion order, so a
+search intersects the (short) lists for the requested filters instead of
+rebuilding and scanning the whole corpus. Titles and locations can also be
+matched approximately through trigram indexes over their keys, and the lead's
+post, pain points, sought solutions, title, location and company news are
+searchable through a BM25 full-text index (see ``text_index.py``).
+
+A store can be saved as a snapshot of its column and index arrays and opened
+again memory-mapped (see ``snapshot.py``), which takes milliseconds however
+many leads it holds. Leads added to an opened store are appended to a log next
+to the snapshot, which ``refresh`` reads to pick up leads that other
+processes, such as other server workers or an ingestion run, have added.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+import json
+import os
+import random
+import re
+import time
+
+import numpy as np
+
+from columns import ArrayColumn, KeyIndex, ListColumn, Postings, StringPool, TextColumn
+from lead_metrics import LeadMetrics
+from snapshot import AppendLog, exclusive, read_snapshot, snapshot_exists, write_snapshot
+from text_index import BM25Index, TrigramIndex
+
+# Bumped whenever the snapshot layout changes
+SNAPSHOT_VERSION = 1
+# Layout of a store's data directory
+SNAPSHOT_DIR = "snapshot"
+APPEND_LOG = "appended.jsonl"
+LOCK_FILE = ".lock"
+
+# Fields with a secondary index
+INDEXED_FIELDS = ("industry", "location", "source_platform", "title", "company_size", "company_stage")
+
+# Indexed fields whose keys can also be matched approximately
+FUZZY_FIELDS = ("title", "location")
+
+# Full-text fields and the weight of a term occurring in each
+TEXT_FIELD_WEIGHTS = {
+    "source_content": 1,
+    "pain_points": 2,
+    "solution_seeking": 2,
+    "title": 1,
+    "location": 1,
+    "recent_news": 1,
+}
+
+# Funding stages in order
+COMPANY_STAGES = ("pre-seed", "seed") + tuple(f"series {letter}" for letter in "abcdefgh")
+_STAGE = re.compile(r"\b(pre-?seed|seed|series [a-h])\b(\s*\+)?")
+
+# Employee counts of company size words
+COMPANY_SIZE_WORDS = {
+    "startup": (1, 50),
+    "small": (1, 200),
+    "smb": (1, 200),
+    "medium": (201, 1000),
+    "mid-size": (201, 1000),
+    "midsize": (201, 1000),
+    "mid-market": (201, 1000),
+    "large": (1001, float("inf")),
+    "enterprise": (1001, float("inf")),
+}
+_SIZE_NUMBER = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*(k)?")
+_SIZE_BELOW = re.compile(r"^(?:under|below|less than|fewer than|up to|<=?)")
+_SIZE_ABOVE = re.compile(r"^(?:over|above|more than|greater than|>=?)|\+$")
+
+
+def normalize_key(value: str) -> str:
+    """Normalize a user- or data-supplied value into an index key."""
+    return " ".join(value.split()).casefold()
+
+
+def location_keys(location: str) -> List[str]:
+    """Index keys for a location: the full value plus each comma-separated part.
+
+    ``"Austin, TX"`` is reachable through ``"austin, tx"``, ``"austin"`` and ``"tx"``.
+    """
+    full = normalize_key(location)
+    keys = [full]
+    for part in full.split(","):
+        part = part.strip()
+        if part and part not in keys:
+            keys.append(part)
+    return keys
+
+
+def stage_keys(text: str) -> List[str]:
+    """Funding stages named by a query such as "Series A", "Seed to Series B" or "Series C+"."""
+    found = [
+        (COMPANY_STAGES.index(match.group(1).replace("preseed", "pre-seed")), bool(match.group(2)))
+        for match in _STAGE.finditer(normalize_key(text))
+    ]
+    if not found:
+        return []
+    stages = [stage for stage, _ in found]
+    if len(found) == 1 and found[0][1]:
+        return list(COMPANY_STAGES[stages[0]:])
+    if len(found) == 2:
+        return list(COMPANY_STAGES[min(stages):max(stages) + 1])
+    return [COMPANY_STAGES[stage] for stage in sorted(set(stages))]
+
+
+def size_range(text: str) -> Tuple[float, float] | None:
+    """The employee counts a company size such as "51-200", "1000+", "under 50" or "small" covers."""
+    key = normalize_key(text)
+    if key in COMPANY_SIZE_WORDS:
+        return COMPANY_SIZE_WORDS[key]
+    numbers = [
+        float(number.replace(",", "")) * (1000 if thousands else 1)
+        for number, thousands in _SIZE_NUMBER.findall(key)
+    ]
+    if len(numbers) >= 2:
+        return min(numbers[:2]), max(numbers[:2])
+    if len(numbers) == 1:
+        if _SIZE_ABOVE.search(key):
+            return numbers[0], float("inf")
+        if _SIZE_BELOW.search(key):
+            return 1, numbers[0]
+        return numbers[0], numbers[0]
+    return None
+
+
+def size_keys(text: str, keys: Iterable[str]) -> List[str]:
+    """The company size ``keys`` whose range overlaps the one ``text`` asks for.
+
+    An unparseable request only matches its own key.
+    """
+    wanted = size_range(text)
+    if wanted is None:
+        key = normalize_key(text)
+        return [key] if key in keys else []
+    low, high = wanted
+    matched = []
+    for key in keys:
+        covered = size_range(key)
+        if covered is not None and covered[0] <= high and low <= covered[1]:
+            matched.append(key)
+    return matched
+
+
+def _company_stage(news: Iterable[str] | None) -> str | None:
+    """The latest funding stage mentioned in a company's news, e.g. "Series B funding"."""
+    stages = [
+        COMPANY_STAGES.index(match.group(1).replace("preseed", "pre-seed"))
+        for item in news or ()
+        for match in _STAGE.finditer(normalize_key(item))
+    ]
+    return COMPANY_STAGES[max(stages)] if stages else None
+
+
+def _field_keys(lead: Dict[str, Any], field: str) -> List[str]:
+    """Extract the index keys of ``field`` from a lead record."""
+    if field == "company_stage":
+        stage = _company_stage((lead.get("company_insights") or {}).get("recent_news"))
+        return [stage] if stage else []
+    if field == "company_size":
+        value = (lead.get("company_insights") or {}).get("size")
+    else:
+        value = lead.get(field)
+    if not value:
+        return []
+    if field == "location":
+        return location_keys(value)
+    return [normalize_key(value)]
+
+
+def _union(postings: List[np.ndarray], rows: int) -> np.ndarray:
+    """Merge ascending posting lists over ``rows`` rows into one without duplicates.
+
+    Long lists are merged through a row bitmap, short ones by sorting.
+    """
+    if not postings:
+        return _EMPTY_POSTING
+    if len(postings) == 1:
+        return postings[0]
+    if sum(len(posting) for posting in postings) * 16 >= rows:
+        seen = np.zeros(rows, dtype=bool)
+        for posting in postings:
+            seen[posting] = True
+        return np.flatnonzero(seen).astype(np.uint32)
+    return np.unique(np.concatenate(postings))
+
+
+def _intersect(postings: List[np.ndarray], limit: int | None) -> np.ndarray:
+    """Intersect ascending posting lists, shortest first, keeping the first ``limit`` rows.
+
+    The surviving rows are located in each longer list by a vectorized binary
+    search, so the cost is O(len(shortest) * log(len(longest))) and a
+    memory-mapped list only has the pages along the search paths read.
+    """
+    postings = sorted(postings, key=len)
+    result = postings[0]
+    for other in postings[1:]:
+        if not len(result):
+            break
+        if not len(other):
+            return _EMPTY_POSTING
+        positions = np.minimum(np.searchsorted(other, result), len(other) - 1)
+        result = result[other[positions] == result]
+    return result[:limit]
+
+
+_EMPTY_POSTING = np.empty(0, dtype=np.uint32)
+
+# Column layout: strings repeated across leads are pooled, free text is packed,
+# and numeric fields live in typed arrays
+CATEGORICAL_COLUMNS = (
+    "industry", "location", "source_platform", "title", "company",
+    "intent_level", "urgency_level", "company_industry", "company_size", "revenue",
+)
+TEXT_COLUMNS = ("id", "prospect_name", "source_url", "source_content", "email", "phone", "social_profiles")
+NUMERIC_COLUMNS = (
+    "lead_score", "intent_strength", "company_fit", "role_relevance", "engagement_level",
+    "timing_signals", "confidence", "email_confidence", "discovered_at",
+)
+LIST_COLUMNS = ("solution_seeking", "pain_points", "technologies", "recent_news")
+
+SCORE_COMPONENTS = ("intent_strength", "company_fit", "role_relevance", "engagement_level", "timing_signals")
+
+
+def parse_timestamp(value: str | None) -> float:
+    """Convert an ISO 8601 timestamp to epoch seconds; naive values are UTC, missing ones now."""
+    if not value:
+        return time.time()
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def format_timestamp(seconds: float) -> str:
+    """Render epoch seconds as an ISO 8601 UTC timestamp."""
+    return datetime.fromtimestamp(int(seconds), timezone.utc).isoformat()
+
+
+def _flatten(lead: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a nested lead record into its column values."""
+    breakdown = lead.get("score_breakdown") or {}
+    intent = lead.get("intent_analysis") or {}
+    contact = lead.get("contact_info") or {}
+    insights = lead.get("company_insights") or {}
+    return {
+        "id": lead["id"],
+        "prospect_name": lead.get("prospect_name"),
+        "company": lead.get("company"),
+        "title": lead.get("title"),
+        "industry": lead.get("industry"),
+        "location": lead.get("location"),
+        "source_platform": lead.get("source_platform"),
+        "source_url": lead.get("source_url"),
+        "source_content": lead.get("source_content"),
+        "discovered_at": parse_timestamp(lead.get("discovered_at")),
+        "lead_score": lead.get("lead_score", 0.0),
+        **{component: breakdown.get(component, 0.0) for component in SCORE_COMPONENTS},
+        "has_intent": intent.get("has_intent", False),
+        "confidence": intent.get("confidence", 0.0),
+        "intent_level": intent.get("intent_level"),
+        "urgency_level": intent.get("urgency_level"),
+        "solution_seeking": intent.get("solution_seeking"),
+        "pain_points": intent.get("pain_points"),
+        "email": contact.get("email"),
+        "email_confidence": contact.get("email_confidence", 0.0),
+        "phone": contact.get("phone"),
+        "social_profiles": json.dumps(contact.get("social_profiles") or {}, separators=(",", ":")),
+        "company_industry": insights.get("industry"),
+        "company_size": insights.get("size"),
+        "revenue": insights.get("revenue"),
+        "technologies": insights.get("technologies"),
+        "recent_news": insights.get("recent_news"),
+    }
+
+
+def _text_fields(values: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """The weighted full-text fields of a flattened lead."""
+    fields = []
+    for name, weight in TEXT_FIELD_WEIGHTS.items():
+        value = values[name]
+        if value:
+            fields.append((value if isinstance(value, str) else " ".join(value), weight))
+    return fields
+
+
+class LeadStore:
+    """Column-oriented lead records plus posting-list indexes over the searchable fields.
+
+    Leads go in as nested dicts and are only rebuilt as dicts for the rows a
+    response actually returns.
+    """
+
+    def __init__(self, leads: Iterable[Dict[str, Any]] = ()) -> None:
+        self._attach({}, {})
+        for lead in leads:
+            self.add(lead)
+
+    def _attach(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+        """Set up the columns and indexes on top of snapshot ``arrays`` (none for an empty store)."""
+        base = arrays.get
+        self._pool = StringPool(meta.get("strings", ("",)))
+        self._categorical = {name: ArrayColumn("I", base(f"categorical.{name}")) for name in CATEGORICAL_COLUMNS}
+        self._text = {
+            name: TextColumn(base(f"text.{name}.data"), base(f"text.{name}.offsets")) for name in TEXT_COLUMNS
+        }
+        self._numeric = {name: ArrayColumn("d", base(f"numeric.{name}")) for name in NUMERIC_COLUMNS}
+        self._lists = {
+            name: ListColumn(self._pool, base(f"lists.{name}.codes"), base(f"lists.{name}.offsets"))
+            for name in LIST_COLUMNS
+        }
+        self._has_intent = ArrayColumn("b", base("has_intent"))
+        self._rows_by_id = KeyIndex(self._text["id"], base("ids.hashes"), base("ids.rows"))
+        spans = meta.get("index_spans", {})
+        self._indexes = {field: Postings("I", base(f"index.{field}"), spans.get(field)) for field in INDEXED_FIELDS}
+        self._fuzzy: Dict[str, TrigramIndex] = {field: TrigramIndex() for field in FUZZY_FIELDS}
+        for field, trigram_index in self._fuzzy.items():
+            for key in self._indexes[field].keys():
+                trigram_index.add(key)
+        if "text_index" in meta:
+            text_arrays = {name: base(f"text_index.{name}") for name in ("rows", "frequencies", "lengths")}
+            self._text_index = BM25Index.from_arrays(text_arrays, meta["text_index"])
+        else:
+            self._text_index = BM25Index()
+        # Running aggregate over every stored lead
+        self.totals = self.summarize(range(len(self)), self.numeric("lead_score")) if len(self) else LeadMetrics()
+        self._listeners: List[Callable[[int], None]] = []
+        self._log: AppendLog | None = None
+
+    @classmethod
+    def open(cls, path: str) -> LeadStore:
+        """Open the store saved in data directory ``path``, memory-mapping its snapshot.
+
+        Leads logged since the snapshot was written are replayed, and leads
+        added from now on are appended to the log.
+        """
+        arrays, meta = read_snapshot(os.path.join(path, SNAPSHOT_DIR))
+        if meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Lead snapshot at {path} has version {meta.get('version')}, expected {SNAPSHOT_VERSION}")
+        store = cls.__new__(cls)
+        store._attach(arrays, meta)
+        store._log = AppendLog(os.path.join(path, APPEND_LOG))
+        store.refresh()
+        return store
+
+    def refresh(self) -> int:
+        """Add the leads logged since the last read, e.g. by other processes; returns how many.
+
+        Costs one ``stat`` call when nothing was logged.
+        """
+        log = self._log
+        if log is None or not log.has_new():
+            return 0
+        added = 0
+        for lead in log.read_new():
+            # Our own leads, or one logged by two processes at once
+            if lead["id"] in self:
+                continue
+            self.add(lead, log=False)
+            added += 1
+        return added
+
+    def save(self, path: str) -> None:
+        """Write every lead to a new snapshot in data directory ``path`` and empty its log.
+
+        Saving to the directory the store was opened from compacts the log
+        into the snapshot.
+        """
+        arrays: Dict[str, np.ndarray] = {}
+        for name, column in self._categorical.items():
+            arrays[f"categorical.{name}"] = column.array()
+        for name, text in self._text.items():
+            arrays[f"text.{name}.data"], arrays[f"text.{name}.offsets"] = text.arrays()
+        for name, column in self._numeric.items():
+            arrays[f"numeric.{name}"] = column.array()
+        for name, values in self._lists.items():
+            arrays[f"lists.{name}.codes"], arrays[f"lists.{name}.offsets"] = values.arrays()
+        arrays["has_intent"] = self._has_intent.array()
+        arrays["ids.hashes"], arrays["ids.rows"] = self._rows_by_id.arrays()
+        spans = {}
+        for field, postings in self._indexes.items():
+            arrays[f"index.{field}"], spans[field] = postings.arrays()
+        text_arrays, text_meta = self._text_index.arrays()
+        arrays.update({f"text_index.{name}": values for name, values in text_arrays.items()})
+        os.makedirs(path, exist_ok=True)
+        write_snapshot(os.path.join(path, SNAPSHOT_DIR), arrays, {
+            "version": SNAPSHOT_VERSION,
+            "count": len(self),
+            "strings": self._pool.strings(),
+            "index_spans": spans,
+            "text_index": text_meta,
+        })
+        AppendLog(os.path.join(path, APPEND_LOG)).clear()
+
+    def __len__(self) -> int:
+        return len(self._has_intent)
+
+    def __contains__(self, lead_id: str) -> bool:
+        return lead_id in self._rows_by_id
+
+    def add(self, lead: Dict[str, Any], *, log: bool = True) -> int:
+        """Append a lead and index it, returning its row number.
+
+        Leads are also written to the snapshot's log, unless ``log`` is false.
+        """
+        lead_id = lead["id"]
+        if lead_id in self._rows_by_id:
+            raise ValueError(f"Duplicate lead id: {lead_id}")
+        row = len(self)
+        values = _flatten(lead)
+        for name, column in self._categorical.items():
+            column.append(self._pool.code(values[name]))
+        for name, column in self._text.items():
+            column.append(values[name])
+        for name, column in self._numeric.items():
+            column.append(values[name])
+        for name, column in self._lists.items():
+            column.append(values[name])
+        self._has_intent.append(bool(values["has_intent"]))
+        self._rows_by_id.add(lead_id, row)
+        for field, index in self._indexes.items():
+            for key in _field_keys(lead, field):
+                if index.append(key, row) and field in self._fuzzy:
+                    self._fuzzy[field].add(key)
+        self._text_index.add(row, _text_fields(values))
+        self.totals.add(lead)
+        if log and self._log is not None:
+            self._log.append(lead)
+        for listener in self._listeners:
+            listener(row)
+        return row
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        """Call ``listener`` with the row of every lead added, e.g. to drop caches."""
+        self._listeners.append(listener)
+
+    def lead(self, row: int, score: float | None = None) -> Dict[str, Any]:
+        """Rebuild the nested lead record stored at ``row``.
+
+        ``score`` replaces the stored ``lead_score``, e.g. with a request-weighted one.
+        """
+        pool = self._pool
+        cat = {name: pool[column[row]] for name, column in self._categorical.items()}
+        text = {name: column[row] for name, column in self._text.items()}
+        num = {name: column[row] for name, column in self._numeric.items()}
+        lists = {name: column[row] for name, column in self._lists.items()}
+        return {
+            "id": text["id"],
+            "prospect_name": text["prospect_name"],
+            "company": cat["company"],
+            "title": cat["title"],
+            "industry": cat["industry"],
+            "location": cat["location"],
+            "source_platform": cat["source_platform"],
+            "source_url": text["source_url"],
+            "source_content": text["source_content"],
+            "discovered_at": format_timestamp(num["discovered_at"]),
+            "lead_score": num["lead_score"] if score is None else round(float(score), 2),
+            "score_breakdown": {component: num[component] for component in SCORE_COMPONENTS},
+            "intent_analysis": {
+                "has_intent": bool(self._has_intent[row]),
+                "confidence": num["confidence"],
+                "intent_level": cat["intent_level"],
+                "urgency_level": cat["urgency_level"],
+                "solution_seeking": lists["solution_seeking"],
+                "pain_points": lists["pain_points"],
+            },
+            "contact_info": {
+                "email": text["email"],
+                "email_confidence": num["email_confidence"],
+                "phone": text["phone"],
+                "social_profiles": json.loads(text["social_profiles"]),
+            },
+            "company_insights": {
+                "industry": cat["company_industry"],
+                "size": cat["company_size"],
+                "revenue": cat["revenue"],
+                "technologies": lists["technologies"],
+                "recent_news": lists["recent_news"],
+            },
+        }
+
+    def row(self, lead_id: str) -> int | None:
+        """Return the row of a lead by its id, or ``None`` if it is unknown."""
+        return self._rows_by_id.get(lead_id)
+
+    def get(self, lead_id: str) -> Dict[str, Any] | None:
+        """Return a lead by its id, or ``None`` if it is unknown."""
+        row = self._rows_by_id.get(lead_id)
+        return None if row is None else self.lead(row)
+
+    def posting(self, field: str, value: str) -> np.ndarray:
+        """Return the ascending row numbers whose ``field`` matches ``value``."""
+        return self._indexes[field].get(normalize_key(value))
+
+    def fuzzy_keys(self, field: str, value: str) -> List[str]:
+        """Return the keys of a ``FUZZY_FIELDS`` field approximately matching ``value``."""
+        return self._fuzzy[field].lookup(value)
+
+    def fuzzy_posting(self, field: str, values: Sequence[str]) -> np.ndarray:
+        """Return the ascending rows whose ``field`` approximately matches any of ``values``."""
+        index = self._indexes[field]
+        return _union([index.get(key) for value in values for key in self.fuzzy_keys(field, value)], len(self))
+
+    def size_posting(self, company_size: str) -> np.ndarray:
+        """Return the ascending rows of companies whose size range overlaps ``company_size``."""
+        index = self._indexes["company_size"]
+        return _union([index.get(key) for key in size_keys(company_size, index.keys())], len(self))
+
+    def stage_posting(self, company_stage: str) -> np.ndarray:
+        """Return the ascending rows of companies at a funding stage named by ``company_stage``."""
+        index = self._indexes["company_stage"]
+        return _union([index.get(stage) for stage in stage_keys(company_stage) if stage in index], len(self))
+
+    def search(
+        self,
+        *,
+        industry: str | None = None,
+        location: str | None = None,
+        source_platform: str | None = None,
+        title: str | None = None,
+        company_size: str | None = None,
+        region: str | None = None,
+        roles: Sequence[str] | None = None,
+        company_stage: str | None = None,
+        limit: int | None = None,
+    ) -> Sequence[int]:
+        """Return the row numbers matching every given filter, in insertion order.
+
+        ``region`` and ``roles`` match locations and titles approximately (any
+        of the roles may match); ``company_stage`` accepts ranges such as "Seed
+        to Series B", and ``company_size`` matches every size bucket its range
+        overlaps, so "1-500" finds "1-50", "51-200" and "201-1000". Work is
+        bounded by the shortest posting list involved.
+        """
+        filters = {
+            "industry": industry,
+            "location": location,
+            "source_platform": source_platform,
+            "title": title,
+        }
+        postings = [self.posting(field, value) for field, value in filters.items() if value]
+        if company_size:
+            postings.append(self.size_posting(company_size))
+        if region:
+            postings.append(self.fuzzy_posting("location", [region]))
+        if roles:
+            postings.append(self.fuzzy_posting("title", roles))
+        if company_stage:
+            postings.append(self.stage_posting(company_stage))
+        if not postings:
+            total = len(self)
+            return range(total if limit is None else min(limit, total))
+        return _intersect(postings, limit)
+
+    def text_search(self, query: str, rows: Sequence[int] | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the ascending rows whose text matches ``query``, with their BM25 relevance.
+
+        ``rows``, if given, restricts the result to those (ascending) rows.
+        """
+        return self._text_index.search(query, rows)
+
+    def leads(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        """Materialize the leads at ``rows``."""
+        return [self.lead(row) for row in rows]
+
+    def summarize(self, rows: Sequence[int], scores: np.ndarray | None = None) -> LeadMetrics:
+        """Aggregate the leads at ``rows`` straight from the columns.
+
+        ``scores``, aligned with ``rows``, replaces the stored lead scores. The
+        running total is reused when ``rows`` covers the whole store unrescored.
+        """
+        if scores is None and len(rows) == len(self):
+            return self.totals
+        index = _row_index(rows)
+        if scores is None:
+            scores = self._numeric["lead_score"].array()[index]
+        return LeadMetrics.from_columns(
+            scores,
+            platforms=self._value_counts("source_platform", index),
+            industries=self._value_counts("industry", index),
+            locations=self._value_counts("location", index),
+        )
+
+    def value_counts(self, column: str, rows: Sequence[int]) -> Dict[str, int]:
+        """Count the values of a categorical column over ``rows``."""
+        return self._value_counts(column, _row_index(rows))
+
+    def text_values(self, column: str, rows: Iterable[int]) -> List[str]:
+        """Return the values of a text column at ``rows``."""
+        text = self._text[column]
+        return [text[row] for row in rows]
+
+    def categorical_values(self, column: str, rows: Iterable[int]) -> List[str]:
+        """Return the values of a categorical column at ``rows``."""
+        pool = self._pool
+        codes = self._categorical[column]
+        return [pool[codes[row]] for row in rows]
+
+    def list_values(self, column: str, rows: Iterable[int]) -> List[List[str]]:
+        """Return the values of a list column at ``rows``."""
+        values = self._lists[column]
+        return [values[row] for row in rows]
+
+    def _value_counts(self, column: str, index: Any) -> Dict[str, int]:
+        """Count the values of a pooled column over the selected rows."""
+        codes = self._categorical[column].array()[index]
+        counts = np.bincount(codes)
+        return {self._pool[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+    def numeric(self, column: str) -> np.ndarray:
+        """Return a numeric column for every row as a read-only NumPy array."""
+        return self._numeric[column].array()
+
+    def score_components(self, rows: Sequence[int]) -> np.ndarray:
+        """Return the score breakdown of ``rows`` as an ``(len(rows), 5)`` matrix."""
+        index = _row_index(rows)
+        return np.column_stack([
+            self._numeric[component].array()[index]
+            for component in SCORE_COMPONENTS
+        ])
+
+
+def _row_index(rows: Sequence[int]) -> Any:
+    """Turn a row sequence into a NumPy index, keeping ranges as cheap slices."""
+    if isinstance(rows, range):
+        return slice(rows.start, rows.stop, rows.step)
+    return np.asarray(rows, dtype=np.intp)
+
+
+# Demo leads shown by default
+SEED_LEADS: List[Dict[str, Any]] = [
+    {
+        "id": "lead-001",
+        "prospect_name": "Sarah Johnson",
+        "company": "TechCorp Solutions",
+        "title": "VP of Marketing",
+        "industry": "Technology",
+        "location": "San Francisco, CA",
+        "source_platform": "LinkedIn",
+        "source_url": "https://linkedin.com/posts/sarah-johnson",
+        "source_content": "Looking for a great marketing automation platform to streamline our marketing operations",
+        "lead_score": 0.85,
+        "score_breakdown": {
+            "intent_strength": 0.9,
+            "company_fit": 0.8,
+            "role_relevance": 0.85,
+            "engagement_level": 0.8,
+            "timing_signals": 0.9
+        },
+        "intent_analysis": {
+            "has_intent": True,
+            "confidence": 0.85,
+            "intent_level": "high",
+            "urgency_level": "high",
+            "solution_seeking": ["marketing automation", "workflow tools"],
+            "pain_points": ["manual processes", "data silos"]
+        },
+        "contact_info": {
+            "email": "sarah.johnson@techcorp.com",
+            "email_confidence": 0.9,
+            "phone": "+1-555-0123",
+            "social_profiles": {
+                "linkedin": "https://linkedin.com/in/sarah-johnson",
+                "twitter": "@sarahj_tech"
+            }
+        },
+        "company_insights": {
+            "industry": "Technology",
+            "size": "201-1000",
+            "revenue": "$50M-$100M",
+            "technologies": ["Salesforce", "HubSpot", "Slack"],
+            "recent_news": ["Series B funding", "New product launch"]
+        }
+    },
+    {
+        "id": "lead-002",
+        "prospect_name": "Michael Chen",
+        "company": "GrowthCo Inc",
+        "title": "Head of Sales",
+        "industry": "SaaS",
+        "location": "Austin, TX",
+        "source_platform": "Reddit",
+        "source_url": "https://reddit.com/r/sales/comments/xyz",
+        "source_content": "Need help with our sales prospecting, the team is still building lists by hand",
+        "lead_score": 0.78,
+        "score_breakdown": {
+            "intent_strength": 0.8,
+            "company_fit": 0.75,
+            "role_relevance": 0.8,
+            "engagement_level": 0.7,
+            "timing_signals": 0.8
+        },
+        "intent_analysis": {
+            "has_intent": True,
+            "confidence": 0.78,
+            "intent_level": "medium",
+            "urgency_level": "medium",
+            "solution_seeking": ["sales automation", "lead generation"],
+            "pain_points": ["low conversion rates", "manual prospecting"]
+        },
+        "contact_info": {
+            "email": "michael.chen@growthco.com",
+            "email_confidence": 0.85,
+            "phone": "+1-555-0456",
+            "social_profiles": {
+                "linkedin": "https://linkedin.com/in/michael-chen",
+                "twitter": "@mchen_sales"
+            }
+        },
+        "company_insights": {
+            "industry": "SaaS",
+            "size": "51-200",
+            "revenue": "$10M-$50M",
+            "technologies": ["Pipedrive", "Zoom", "Calendly"],
+            "recent_news": ["Team expansion", "Product update"]
+        }
+    },
+    {
+        "id": "lead-003",
+        "prospect_name": "Emily Rodriguez",
+        "company": "HealthTech Solutions",
+        "title": "Marketing Director",
+        "industry": "Healthcare",
+        "location": "Boston, MA",
+        "source_platform": "Twitter",
+        "source_url": "https://twitter.com/emily_health/status/123",
+        "source_content": "Seeking recommendations for campaign analytics tools that can prove ROI",
+        "lead_score": 0.72,
+        "score_breakdown": {
+            "intent_strength": 0.7,
+            "company_fit": 0.75,
+            "role_relevance": 0.7,
+            "engagement_level": 0.75,
+            "timing_signals": 0.65
+        },
+        "intent_analysis": {
+            "has_intent": True,
+            "confidence": 0.72,
+            "intent_level": "medium",
+            "urgency_level": "low",
+            "solution_seeking": ["campaign analytics", "attribution"],
+            "pain_points": ["campaign tracking", "ROI measurement"]
+        },
+        "contact_info": {
+            "email": "emily.rodriguez@healthtech.com",
+            "email_confidence": 0.8,
+            "phone": "+1-555-0789",
+            "social_profiles": {
+                "linkedin": "https://linkedin.com/in/emily-rodriguez",
+                "twitter": "@emily_health"
+            }
+        },
+        "company_insights": {
+            "industry": "Healthcare",
+            "size": "201-1000",
+            "revenue": "$100M-$500M",
+            "technologies": ["Epic", "Salesforce", "Tableau"],
+            "recent_news": ["FDA approval", "Partnership announcement"]
+        }
+    },
+]
+
+
+# Vocabulary for synthetic corpora
+_FIRST_NAMES = ["Sarah", "Michael", "Emily", "David", "Priya", "James", "Olivia", "Carlos", "Aisha", "Daniel",
+                "Mei", "Lucas", "Hannah", "Omar", "Grace", "Noah"]
+_LAST_NAMES = ["Johnson", "Chen", "Rodriguez", "Patel", "Kim", "Nguyen", "Garcia", "Smith", "Okafor", "Brown",
+               "Muller", "Rossi", "Cohen", "Silva", "Walker", "Tanaka"]
+_COMPANY_PREFIXES = ["Tech", "Growth", "Health", "Data", "Cloud", "Fin", "Retail", "Bright", "Blue", "North"]
+_COMPANY_SUFFIXES = ["Corp", "Co", "Labs", "Solutions", "Systems", "Works", "Analytics", "Partners"]
+_TITLES = ["VP of Marketing", "Head of Sales", "Marketing Director", "CEO", "CTO", "VP of Sales",
+           "Head of Marketing", "Sales Director", "Head of Growth", "COO", "RevOps Manager"]
+_INDUSTRIES = ["Technology", "SaaS", "Healthcare", "FinTech", "E-commerce", "Manufacturing", "Education",
+               "Real Estate"]
+_LOCATIONS = ["San Francisco, CA", "Austin, TX", "Boston, MA", "Dallas, TX", "New York, NY", "Seattle, WA",
+              "Chicago, IL", "Denver, CO", "Atlanta, GA", "Miami, FL", "Los Angeles, CA", "Toronto, ON"]
+_PLATFORMS = ["LinkedIn", "Reddit", "Twitter"]
+_SIZES = ["1-50", "51-200", "201-1000", "1000+"]
+_REVENUES = ["$1M-$10M", "$10M-$50M", "$50M-$100M", "$100M-$500M"]
+_TECHNOLOGIES = ["Salesforce", "HubSpot", "Slack", "Pipedrive", "Zoom", "Calendly", "Tableau", "Stripe",
+                 "Zendesk", "Snowflake"]
+_NEWS = ["Series A funding", "Series B funding", "New product launch", "Team expansion", "Product update",
+         "Partnership announcement", "New office opening", "Actively hiring"]
+_SOLUTIONS = ["marketing automation", "sales automation", "lead generation", "CRM software",
+              "campaign analytics", "data integration", "customer support tools"]
+_PAIN_POINTS = ["manual processes", "data silos", "low conversion rates", "manual prospecting",
+                "campaign tracking", "ROI measurement", "slow onboarding", "pipeline visibility"]
+_CONTENT_TEMPLATES = [
+    "Looking for a great {solution} to fix our {pain}",
+    "Need help with {solution}, {pain} is killing us",
+    "Seeking recommendations for {solution} tools",
+    "We are expanding the team and evaluating {solution} this quarter",
+    "Anyone switched {solution} vendors recently? Struggling with {pain}",
+]
+_URL_TEMPLATES = {
+    "LinkedIn": "https://linkedin.com/posts/{handle}-{n}",
+    "Reddit": "https://reddit.com/r/sales/comments/{n:x}",
+    "Twitter": "https://twitter.com/{handle}/status/{n}",
+}
+
+
+def _intent_level(confidence: float) -> str:
+    if confidence >= 0.8:
+        return "high"
+    if confidence >= 0.6:
+        return "medium"
+    return "low"
+
+
+def synthetic_leads(
+    count: int,
+    seed: int = 0,
+    now: float | None = None,
+    history_days: int = 120,
+) -> Iterator[Dict[str, Any]]:
+    """Yield ``count`` varied, deterministic leads for load testing and demos.
+
+    Discovery times fall in the ``history_days`` before ``now``, denser towards
+    the present so the trend dashboard shows growth.
+    """
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+    for n in range(count):
+        first = rng.choice(_FIRST_NAMES)
+        last = rng.choice(_LAST_NAMES)
+        handle = f"{first}-{last}".lower()
+        company = rng.choice(_COMPANY_PREFIXES) + rng.choice(_COMPANY_SUFFIXES)
+        domain = company.lower() + ".com"
+        industry = rng.choice(_INDUSTRIES)
+        platform = rng.choice(_PLATFORMS)
+        solution = rng.choice(_SOLUTIONS)
+        pain_points = rng.sample(_PAIN_POINTS, 2)
+        breakdown = {
+            "intent_strength": round(rng.uniform(0.3, 1.0), 2),
+            "company_fit": round(rng.uniform(0.3, 1.0), 2),
+            "role_relevance": round(rng.uniform(0.3, 1.0), 2),
+            "engagement_level": round(rng.uniform(0.3, 1.0), 2),
+            "timing_signals": round(rng.uniform(0.3, 1.0), 2),
+        }
+        score = round(sum(breakdown.values()) / len(breakdown), 2)
+        yield {
+            "id": f"lead-{n + 1000:07d}",
+            "prospect_name": f"{first} {last}",
+            "company": company,
+            "title": rng.choice(_TITLES),
+            "industry": industry,
+            "location": rng.choice(_LOCATIONS),
+            "source_platform": platform,
+            "source_url": _URL_TEMPLATES[platform].format(handle=handle, n=n),
+            "source_content": rng.choice(_CONTENT_TEMPLATES).format(solution=solution, pain=pain_points[0]),
+            "discovered_at": format_timestamp(now - rng.triangular(0, history_days, 0) * 86400),
+            "lead_score": score,
+            "score_breakdown": breakdown,
+            "intent_analysis": {
+                "has_intent": score >= 0.5,
+                "confidence": score,
+                "intent_level": _intent_level(score),
+                "urgency_level": _intent_level(breakdown["timing_signals"]),
+                "solution_seeking": [solution],
+                "pain_points": pain_points,
+            },
+            "contact_info": {
+                "email": f"{first}.{last}@{domain}".lower(),
+                "email_confidence": round(rng.uniform(0.5, 0.95), 2),
+                "phone": f"+1-555-{rng.randrange(10000):04d}",
+                "social_profiles": {
+                    "linkedin": f"https://linkedin.com/in/{handle}",
+                    "twitter": f"@{first[0].lower()}{last.lower()}",
+                },
+            },
+            "company_insights": {
+                "industry": industry,
+                "size": rng.choice(_SIZES),
+                "revenue": rng.choice(_REVENUES),
+                "technologies": rng.sample(_TECHNOLOGIES, 3),
+                "recent_news": rng.sample(_NEWS, 2),
+            },
+        }
+
+
+def build_default_store() -> LeadStore:
+    """Build the startup store: the demo leads plus an optional synthetic corpus.
+
+    Set ``LEAD_CORPUS_SIZE`` to load that many synthetic leads after the demo ones.
+    Set ``LEAD_STORE_PATH`` to keep the store in that data directory: an
+    existing snapshot there is opened memory-mapped instead of building the
+    store, otherwise the built store is saved there first. Server workers
+    starting together build it only once.
+    """
+    path = os.getenv("LEAD_STORE_PATH")
+    if not path:
+        return _build_store()
+    os.makedirs(path, exist_ok=True)
+    with exclusive(os.path.join(path, LOCK_FILE)):
+        if not snapshot_exists(os.path.join(path, SNAPSHOT_DIR)):
+            _build_store().save(path)
+    return LeadStore.open(path)
+
+
+def _build_store() -> LeadStore:
+    store = LeadStore(SEED_LEADS)
+    for lead in synthetic_leads(int(os.getenv("LEAD_CORPUS_SIZE", "0"))):
+        store.add(lead)
+    return store
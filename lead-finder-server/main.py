@@ -9,12 +9,37 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal, Sequence, Tuple
+import asyncio
+import contextlib
+import json
+import logging
 import os
+import time
 
 import mcp.types as types
+import numpy as np
 from mcp.server.fastmcp import FastMCP
-from pydantic import BaseModel, Field, ValidationError
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from sse_starlette.sse import AppStatus
+
+from admission import HEAVY, LIGHT, AdmissionController, AdmissionMiddleware, TokenBuckets
+from caching import SharedCache, SingleFlight, TTLCache
+from crm_export import ADAPTERS, CRMError, CRMExporter
+from enrichment import EnrichmentPipeline, default_providers
+from enrichment_cache import EnrichmentCache
+from entity_resolution import open_entity_index
+from instrumentation import SIZE_BUCKETS, HTTPMetricsMiddleware, Metrics, SlowRequestProfiler
+from jobs import BULK, COMPLETED, FAILED, INTERACTIVE, Job, JobBoard, JobScheduler
+from lead_metrics import LeadMetrics
+from lead_store import build_default_store, normalize_key
+from payloads import CompressionMiddleware, project_search_result
+from scoring import LeadScorer, decode_cursor, encode_cursor, top_k
+from text_index import tokenize
+from trends import TrendRollups
+from vector_index import open_vector_index
+
+logger = logging.getLogger(__name__)
 
 # Configuration - use environment variable for widget base URL
 # For development: http://localhost:4444
@@ -32,6 +57,8 @@ class LeadFinderWidget:
     invoked: str
     html: str
     response_text: str
+    # Tools that write to external systems are not read-only
+    read_only: bool = True
 
 
 def create_widget_html(component_name: str, root_id: str) -> str:
@@ -66,49 +93,150 @@ widgets: List[LeadFinderWidget] = [
         identifier="export-to-crm",
         title="Export to CRM",
         template_uri="ui://widget/crm-export.html",
-        invoking="Preparing CRM export",
-        invoked="Export ready",
+        invoking="Exporting leads to CRM",
+        invoked="Export finished",
         html=create_widget_html("crm-export", "crm-export-root"),
-        response_text="CRM export prepared!",
+        response_text="CRM export finished!",
+        read_only=False,
     ),
 ]
 
 MIME_TYPE = "text/html+skybridge"
 
-WIDGETS_BY_ID: Dict[str, LeadFinderWidget] = {w.identifier: w for w in widgets}
-WIDGETS_BY_URI: Dict[str, LeadFinderWidget] = {w.template_uri: w for w in widgets}
-
 
 # Input schemas
+# These models are the single source of truth for both validation and the
+# JSON schemas advertised by tools/list (see _tool_input_schema).
 class LeadSearchInput(BaseModel):
     """Input schema for find_business_leads tool."""
-    region: str | None = Field(None, description="Geographic region to target")
-    industry: str | None = Field(None, description="Industry or sector to focus on")
-    contact_roles: List[str] | None = Field(None, description="Target contact roles/titles")
-    company_stage: str | None = Field(None, description="Company funding stage")
-    company_size: str | None = Field(None, description="Company size range")
-    intent_signals: List[str] | None = Field(None, description="Purchase intent signals to detect")
-    output: str = Field(default="summary", description="Output format: summary, detailed_table, compact_list")
-    limit: int = Field(default=20, description="Maximum number of leads to return")
+    model_config = ConfigDict(extra="forbid")
+
+    region: str | None = Field(
+        None,
+        description="Geographic region to target (e.g., 'Dallas, TX', 'San Francisco Bay Area')",
+    )
+    industry: str | None = Field(
+        None,
+        description="Industry or sector to focus on (e.g., 'B2B SaaS', 'Healthcare', 'FinTech')",
+    )
+    contact_roles: List[str] | None = Field(
+        None,
+        description="Target contact roles/titles (e.g., 'CEO', 'VP Sales', 'Head of Marketing')",
+    )
+    company_stage: str | None = Field(
+        None,
+        description="Company funding stage (e.g., 'Seed to Series B', 'Series C+', 'Pre-seed')",
+    )
+    company_size: str | None = Field(
+        None,
+        description="Company size range, matching every overlapping size bucket (e.g., '1-50', '51-200', '1-500', 'under 200', '1000+')",
+    )
+    intent_signals: List[str] | None = Field(
+        None,
+        description="Purchase intent signals to detect (e.g., 'actively hiring', 'recently funded', 'expanding team')",
+    )
+    keywords: str | None = Field(
+        None,
+        description="Free-text query matched against what prospects posted, their pain points and needs "
+                    "(e.g., 'manual prospecting CRM')",
+    )
+    output: Literal["summary", "detailed_table", "compact_list"] = Field(
+        default="summary",
+        description="Output format preference",
+    )
+    limit: int = Field(default=20, ge=1, le=100, description="Maximum number of leads to return")
+    cursor: str | None = Field(
+        None,
+        description="next_cursor from a previous response with the same filters, to fetch the next page",
+    )
+
+    def cache_key(self) -> Tuple[Any, ...]:
+        """Canonical form of the query for result caching.
+
+        Strings are case-folded, lists are sorted and de-duplicated, and
+        ``output`` is left out because it only changes presentation.
+        """
+        def text(value: str | None) -> str | None:
+            return normalize_key(value) if value else None
+
+        def terms(values: List[str] | None) -> Tuple[str, ...]:
+            return tuple(sorted({normalize_key(value) for value in values or ()}))
+
+        return (
+            text(self.region),
+            text(self.industry),
+            terms(self.contact_roles),
+            text(self.company_stage),
+            text(self.company_size),
+            terms(self.intent_signals),
+            text(self.keywords),
+            self.limit,
+            self.cursor,
+        )
+
+
+class TrendAnalysisInput(BaseModel):
+    """Input schema for analyze_lead_trends tool."""
+    model_config = ConfigDict(extra="forbid")
+
+    time_range: Literal["7d", "30d", "90d"] = Field(default="30d", description="Time range: 7d, 30d, 90d")
 
 
 class EnrichmentInput(BaseModel):
     """Input schema for enrich_prospect_data tool."""
+    model_config = ConfigDict(extra="forbid")
+
     prospect_ids: List[str] = Field(..., description="IDs of prospects to enrich")
-    enrichment_level: str = Field(
+    enrichment_level: Literal["basic", "standard", "premium"] = Field(
         default="standard",
         description="Enrichment level: basic, standard, premium"
     )
-    include_contact_info: bool = Field(default=True)
-    include_company_insights: bool = Field(default=True)
+    include_contact_info: bool = Field(default=True, description="Include contact details")
+    include_company_insights: bool = Field(default=True, description="Include company insights")
 
 
 class CRMExportInput(BaseModel):
     """Input schema for export_to_crm tool."""
+    model_config = ConfigDict(extra="forbid")
+
     lead_ids: List[str] = Field(..., description="Lead IDs to export")
-    crm_system: str = Field(..., description="CRM: salesforce, hubspot, pipedrive")
+    crm_system: Literal["salesforce", "hubspot", "pipedrive"] = Field(..., description="Target CRM system")
     create_tasks: bool = Field(default=True, description="Create follow-up tasks")
-    set_reminders: bool = Field(default=True, description="Set reminders")
+    set_reminders: bool = Field(default=True, description="Set follow-up reminders")
+
+
+class JobStatusInput(BaseModel):
+    """Input schema for get_job_status tool."""
+    model_config = ConfigDict(extra="forbid")
+
+    job_id: str = Field(..., description="ID of a job returned by a tool that ran in the background")
+    cancel: bool = Field(default=False, description="Cancel the job if it has not finished")
+
+
+def _tool_input_schema(model: type[BaseModel]) -> Dict[str, Any]:
+    """Derive a tool inputSchema from an input model.
+
+    Pydantic's schema is trimmed to what MCP clients expect: no titles,
+    optional fields as their plain type rather than ``anyOf`` with null,
+    and no ``null`` defaults.
+    """
+    schema = model.model_json_schema()
+    properties = {}
+    for name, prop in schema["properties"].items():
+        prop = {key: value for key, value in prop.items() if key != "title"}
+        variants = prop.pop("anyOf", None)
+        if variants is not None:
+            non_null = [variant for variant in variants if variant.get("type") != "null"]
+            prop = {**non_null[0], **prop} if len(non_null) == 1 else {"anyOf": non_null, **prop}
+        if prop.get("default", ...) is None:
+            del prop["default"]
+        properties[name] = prop
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": schema.get("required", []),
+        "additionalProperties": False,
+    }
 
 
 # Initialize FastMCP server
@@ -117,156 +245,372 @@ mcp = FastMCP(
     sse_path="/mcp",
     message_path="/mcp/messages",
     stateless_http=True,
+    # Plain JSON responses rather than one-event streams, so they can be compressed
+    json_response=os.getenv("MCP_JSON_RESPONSE", "true").lower() == "true",
 )
 
 
-# Mock data generator
-def generate_mock_leads(
-    search_terms: List[str],
-    industry_focus: str | None = None,
-    max_leads: int = 50
-) -> List[Dict[str, Any]]:
-    """Generate mock lead data for demonstration."""
-    mock_leads = [
-        {
-            "id": "lead-001",
-            "prospect_name": "Sarah Johnson",
-            "company": "TechCorp Solutions",
-            "title": "VP of Marketing",
-            "industry": "Technology",
-            "location": "San Francisco, CA",
-            "source_platform": "LinkedIn",
-            "source_url": "https://linkedin.com/posts/sarah-johnson",
-            "source_content": f"Looking for a great {search_terms[0] if search_terms else 'solution'} to streamline our marketing operations",
-            "lead_score": 0.85,
-            "score_breakdown": {
-                "intent_strength": 0.9,
-                "company_fit": 0.8,
-                "role_relevance": 0.85,
-                "engagement_level": 0.8,
-                "timing_signals": 0.9
-            },
-            "intent_analysis": {
-                "has_intent": True,
-                "confidence": 0.85,
-                "intent_level": "high",
-                "urgency_level": "high",
-                "solution_seeking": search_terms[:2],
-                "pain_points": ["manual processes", "data silos"]
-            },
-            "contact_info": {
-                "email": "sarah.johnson@techcorp.com",
-                "email_confidence": 0.9,
-                "phone": "+1-555-0123",
-                "social_profiles": {
-                    "linkedin": "https://linkedin.com/in/sarah-johnson",
-                    "twitter": "@sarahj_tech"
-                }
-            },
-            "company_insights": {
-                "industry": "Technology",
-                "size": "201-1000",
-                "revenue": "$50M-$100M",
-                "technologies": ["Salesforce", "HubSpot", "Slack"],
-                "recent_news": ["Series B funding", "New product launch"]
-            }
-        },
-        {
-            "id": "lead-002",
-            "prospect_name": "Michael Chen",
-            "company": "GrowthCo Inc",
-            "title": "Head of Sales",
-            "industry": "SaaS",
-            "location": "Austin, TX",
-            "source_platform": "Reddit",
-            "source_url": "https://reddit.com/r/sales/comments/xyz",
-            "source_content": f"Need help with {search_terms[0] if search_terms else 'our processes'}",
-            "lead_score": 0.78,
-            "score_breakdown": {
-                "intent_strength": 0.8,
-                "company_fit": 0.75,
-                "role_relevance": 0.8,
-                "engagement_level": 0.7,
-                "timing_signals": 0.8
-            },
-            "intent_analysis": {
-                "has_intent": True,
-                "confidence": 0.78,
-                "intent_level": "medium",
-                "urgency_level": "medium",
-                "solution_seeking": search_terms[:2],
-                "pain_points": ["low conversion rates", "manual prospecting"]
-            },
-            "contact_info": {
-                "email": "michael.chen@growthco.com",
-                "email_confidence": 0.85,
-                "phone": "+1-555-0456",
-                "social_profiles": {
-                    "linkedin": "https://linkedin.com/in/michael-chen",
-                    "twitter": "@mchen_sales"
-                }
-            },
-            "company_insights": {
-                "industry": "SaaS",
-                "size": "51-200",
-                "revenue": "$10M-$50M",
-                "technologies": ["Pipedrive", "Zoom", "Calendly"],
-                "recent_news": ["Team expansion", "Product update"]
-            }
-        },
-        {
-            "id": "lead-003",
-            "prospect_name": "Emily Rodriguez",
-            "company": "HealthTech Solutions",
-            "title": "Marketing Director",
-            "industry": "Healthcare",
-            "location": "Boston, MA",
-            "source_platform": "Twitter",
-            "source_url": "https://twitter.com/emily_health/status/123",
-            "source_content": f"Seeking recommendations for {search_terms[0] if search_terms else 'tools'}",
-            "lead_score": 0.72,
-            "score_breakdown": {
-                "intent_strength": 0.7,
-                "company_fit": 0.75,
-                "role_relevance": 0.7,
-                "engagement_level": 0.75,
-                "timing_signals": 0.65
-            },
-            "intent_analysis": {
-                "has_intent": True,
-                "confidence": 0.72,
-                "intent_level": "medium",
-                "urgency_level": "low",
-                "solution_seeking": search_terms[:2],
-                "pain_points": ["campaign tracking", "ROI measurement"]
-            },
-            "contact_info": {
-                "email": "emily.rodriguez@healthtech.com",
-                "email_confidence": 0.8,
-                "phone": "+1-555-0789",
-                "social_profiles": {
-                    "linkedin": "https://linkedin.com/in/emily-rodriguez",
-                    "twitter": "@emily_health"
-                }
-            },
-            "company_insights": {
-                "industry": "Healthcare",
-                "size": "201-1000",
-                "revenue": "$100M-$500M",
-                "technologies": ["Epic", "Salesforce", "Tableau"],
-                "recent_news": ["FDA approval", "Partnership announcement"]
-            }
-        }
-    ]
+# Data directory shared by every worker on the machine: the lead snapshot and
+# its log, the vector index, and the shared cache and job files. Without it each
+# worker keeps everything in its own memory.
+DATA_DIR = os.getenv("LEAD_STORE_PATH") or None
+
+
+def _data_path(env: str, name: str) -> str | None:
+    """Path from environment variable ``env``, defaulting to ``name`` in the data directory."""
+    return os.getenv(env) or (os.path.join(DATA_DIR, name) if DATA_DIR else None)
+
+
+# Lead data, built or opened from its snapshot once at startup. Workers share the
+# memory-mapped snapshot and pick up each other's new leads from its log.
+LEAD_STORE = build_default_store()
+LEAD_SCORER = LeadScorer()
+
+# Leads of one prospect across platforms, merged as they are added; searches and
+# exports return one combined lead per prospect. Saved next to the lead snapshot
+# unless ENTITY_INDEX_PATH says otherwise, so workers memory-map it instead of
+# resolving every lead at startup
+ENTITIES = open_entity_index(
+    LEAD_STORE,
+    _data_path("ENTITY_INDEX_PATH", "entities"),
+    threshold=float(os.getenv("ENTITY_MATCH_THRESHOLD", "0.7")),
+) if os.getenv("ENTITY_RESOLUTION", "true").lower() == "true" else None
+
+# Recent find-business-leads results, dropped whenever the lead store changes
+SEARCH_CACHE: TTLCache[Dict[str, Any]] = TTLCache(
+    max_entries=int(os.getenv("SEARCH_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "300")),
+)
+LEAD_STORE.add_listener(lambda row: SEARCH_CACHE.clear())
+# Second tier shared with the other workers, keyed by the store size so that
+# results computed before leads were added are never served
+_shared_search_cache_path = _data_path("SEARCH_CACHE_PATH", "search_cache.sqlite")
+SHARED_SEARCH_CACHE = SharedCache(
+    _shared_search_cache_path,
+    ttl=SEARCH_CACHE.ttl,
+    max_entries=int(os.getenv("SHARED_SEARCH_CACHE_SIZE", "10000")),
+) if _shared_search_cache_path else None
+
+# Semantic index of what prospects wrote, for matching intent signals; saved next
+# to the lead snapshot unless VECTOR_INDEX_PATH says otherwise
+VECTOR_INDEX = open_vector_index(
+    LEAD_STORE,
+    _data_path("VECTOR_INDEX_PATH", "vectors"),
+    nprobe=int(os.getenv("VECTOR_NPROBE", "32")),
+)
+INTENT_MATCH_LIMIT = int(os.getenv("INTENT_MATCH_LIMIT", "1000"))
+
+# Per-day lead and conversion rollups behind analyze-lead-trends, backfilled in a
+# background thread once the server is up
+TREND_ROLLUPS = TrendRollups(LEAD_STORE)
+
+# Prospect enrichment through (simulated) data providers
+ENRICHMENT_CACHE = EnrichmentCache(
+    max_entries=int(os.getenv("ENRICHMENT_CACHE_SIZE", "100000")),
+    failure_ttl=float(os.getenv("ENRICHMENT_FAILURE_TTL", "60")),
+    path=_data_path("ENRICHMENT_CACHE_PATH", "enrichment.sqlite"),
+)
+ENRICHMENT_PIPELINE = EnrichmentPipeline(
+    default_providers(LEAD_STORE),
+    max_concurrency=int(os.getenv("ENRICHMENT_CONCURRENCY", "32")),
+    deadline=float(os.getenv("ENRICHMENT_DEADLINE", "5")),
+    cache=ENRICHMENT_CACHE,
+)
+CRM_EXPORTER = CRMExporter.from_env(LEAD_STORE, ENTITIES)
+CRM_EXPORTER.add_listener(TREND_ROLLUPS.record_conversions)
+# Large exports make thousands of CRM calls; don't log each one
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Background jobs for exports and searches too large to answer within a tool call.
+# Exports are capped below the total so interactive searches always get a slot.
+# Jobs are published to a shared board so any worker can answer a status poll.
+_job_board_path = _data_path("JOB_BOARD_PATH", "jobs.sqlite")
+JOB_SCHEDULER = JobScheduler(
+    max_concurrency=int(os.getenv("JOB_CONCURRENCY", "4")),
+    kind_limits={"export-to-crm": int(os.getenv("JOB_EXPORT_CONCURRENCY", "2"))},
+    board=JobBoard(_job_board_path) if _job_board_path else None,
+)
+EXPORT_JOB_THRESHOLD = int(os.getenv("EXPORT_JOB_THRESHOLD", "200"))
+SEARCH_JOB_THRESHOLD = int(os.getenv("SEARCH_JOB_THRESHOLD", "50000"))
+# Smaller searches take a few milliseconds and are scored on the event loop
+SEARCH_THREAD_THRESHOLD = int(os.getenv("SEARCH_THREAD_THRESHOLD", "20000"))
+
+# Identical read-only tool calls in flight at the same time share one computation;
+# a call only joins one that started less than COALESCE_WINDOW_MS ago (0 = off)
+TOOL_CALLS: SingleFlight[types.ServerResult] = SingleFlight(
+    window=float(os.getenv("COALESCE_WINDOW_MS", "1000")) / 1000,
+)
+COALESCED_TOOLS = frozenset({"find-business-leads", "analyze-lead-trends", "enrich-prospect-data"})
+
+# Request metrics, exposed in the Prometheus format on /metrics
+METRICS = Metrics()
+REQUEST_SECONDS = METRICS.histogram(
+    "mcp_request_duration_seconds", "Time to handle an MCP request, by tool and outcome",
+    ("method", "tool", "outcome"),
+)
+TOOL_ERRORS = METRICS.counter(
+    "mcp_tool_errors_total", "Tool calls that failed, by exception type", ("tool", "error"),
+)
+SEARCH_STAGE_SECONDS = METRICS.histogram(
+    "lead_search_stage_seconds", "Time spent in each stage of a lead search", ("stage",),
+)
+HTTP_SECONDS = METRICS.histogram("http_request_duration_seconds", "Time to answer an HTTP request", ("path",))
+HTTP_BODY_BYTES = METRICS.histogram(
+    "http_body_bytes", "Size of HTTP request and response bodies", ("path", "direction"), SIZE_BUCKETS,
+)
+METRICS.gauge("lead_store_leads", "Leads in the store", lambda: {(): len(LEAD_STORE)})
+if ENTITIES is not None:
+    METRICS.gauge("lead_entities", "Prospects the stored leads resolve to", lambda: {(): len(ENTITIES)})
+METRICS.gauge(
+    "search_cache_lookups_total", "find-business-leads result cache lookups, by tier and result",
+    lambda: {
+        ("local", "hit"): SEARCH_CACHE.hits,
+        ("local", "miss"): SEARCH_CACHE.misses,
+        **({("shared", "hit"): SHARED_SEARCH_CACHE.hits, ("shared", "miss"): SHARED_SEARCH_CACHE.misses}
+           if SHARED_SEARCH_CACHE else {}),
+    },
+    ("tier", "result"),
+    kind="counter",
+)
+METRICS.gauge(
+    "tool_call_coalescing_total", "Coalesced tool calls, by whether they computed or joined a result",
+    lambda: {("computed",): TOOL_CALLS.computed, ("joined",): TOOL_CALLS.joined},
+    ("result",),
+    kind="counter",
+)
+METRICS.gauge(
+    "background_jobs", "Background jobs kept by this worker, by status",
+    lambda: {(status,): count for status, count in JOB_SCHEDULER.stats()["jobs"].items()},
+    ("status",),
+)
+
+# Admission control on /mcp: a cap on requests running at once, overall and per tool,
+# with a bounded queue served listing calls first; requests that cannot get a slot
+# in time are shed with 503. Per-client rate limits are off unless CLIENT_RATE_LIMIT is set.
+def _tool_limits(spec: str) -> Dict[str, int]:
+    """Parse ``tool=limit`` pairs separated by commas."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, limit = item.partition("=")
+        limits[name.strip()] = int(limit)
+    return limits
+
+
+ADMISSION = AdmissionController(
+    max_concurrency=int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64")),
+    kind_limits=_tool_limits(os.getenv(
+        "ADMISSION_TOOL_LIMITS",
+        "find-business-leads=16,analyze-lead-trends=16,enrich-prospect-data=8,export-to-crm=4",
+    )),
+    queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "256")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "2000")) / 1000,
+)
+CLIENT_BUCKETS = TokenBuckets(
+    rate=float(os.environ["CLIENT_RATE_LIMIT"]),
+    burst=int(os.getenv("CLIENT_RATE_BURST", "40")),
+) if float(os.getenv("CLIENT_RATE_LIMIT") or 0) > 0 else None
+# Tools cheap enough to be queued with the listing calls
+LIGHT_TOOLS = frozenset({"get-job-status"})
+ADMISSION_METHODS = frozenset({
+    "initialize", "ping", "tools/list", "resources/list", "resources/templates/list", "resources/read",
+})
+ADMISSION_DECISIONS = METRICS.counter(
+    "admission_decisions_total",
+    "Admission decisions on /mcp requests, by kind: admitted, queued, rate_limited, queue_full or queue_timeout",
+    ("kind", "decision"),
+)
+ADMISSION_WAIT_SECONDS = METRICS.histogram(
+    "admission_queue_wait_seconds", "Time queued /mcp requests waited for a slot", ("kind",),
+)
+METRICS.gauge(
+    "admission_running", "/mcp requests running, by kind",
+    lambda: {(kind,): count for kind, count in ADMISSION.running.items()},
+    ("kind",),
+)
+METRICS.gauge(
+    "admission_queued", "/mcp requests waiting for a slot, by priority",
+    lambda: {(str(priority),): count for priority, count in ADMISSION.stats()["queued"].items()},
+    ("priority",),
+)
+
+
+# Opt-in: sample the event loop's stack and keep profiles of requests slower than this
+PROFILER = SlowRequestProfiler(
+    threshold=float(os.environ["PROFILE_SLOW_REQUESTS_MS"]) / 1000,
+    interval=float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000,
+) if os.getenv("PROFILE_SLOW_REQUESTS_MS") else None
+
+
+def _match_rows(payload: LeadSearchInput) -> Tuple[Sequence[int], np.ndarray | None]:
+    """Look up the rows matching a search's filters, with their relevance to its keywords and intent signals.
+
+    Keywords must occur in a lead's text (BM25); keywords made only of stop
+    words ("the") filter nothing. Intent signals only rank:
+    the ``INTENT_MATCH_LIMIT`` leads most similar to them get their similarity
+    added to the relevance, and every other match is kept with none.
+    """
+    started = time.perf_counter()
+    rows = LEAD_STORE.search(
+        industry=payload.industry,
+        company_size=payload.company_size,
+        region=payload.region,
+        roles=payload.contact_roles,
+        company_stage=payload.company_stage,
+    )
+    relevance = None
+    if payload.keywords and tokenize(payload.keywords):
+        rows, relevance = LEAD_STORE.text_search(payload.keywords, rows)
+        if len(relevance):
+            relevance = relevance / relevance.max()
+    if payload.intent_signals:
+        intent_rows, similarity = VECTOR_INDEX.search(payload.intent_signals, rows, k=INTENT_MATCH_LIMIT)
+        boost = np.zeros(len(rows))
+        boost[np.searchsorted(rows, intent_rows)] = similarity
+        relevance = boost if relevance is None else relevance + boost
+    SEARCH_STAGE_SECONDS.observe(time.perf_counter() - started, "search")
+    return rows, relevance
+
+
+def _cached_search(cache_key: Tuple[Any, ...]) -> Dict[str, Any] | None:
+    """Cached result of a search, from this worker's cache or the shared one."""
+    result = SEARCH_CACHE.get(cache_key)
+    if result is None and SHARED_SEARCH_CACHE is not None:
+        result = SHARED_SEARCH_CACHE.get(json.dumps([len(LEAD_STORE), *cache_key]))
+        if result is not None:
+            SEARCH_CACHE.set(cache_key, result)
+    return result
+
+
+def _cache_search(cache_key: Tuple[Any, ...], result: Dict[str, Any]) -> None:
+    SEARCH_CACHE.set(cache_key, result)
+    if SHARED_SEARCH_CACHE is not None:
+        SHARED_SEARCH_CACHE.set(json.dumps([len(LEAD_STORE), *cache_key]), result)
+
+
+def _search_leads(
+    payload: LeadSearchInput,
+    matched: Tuple[Sequence[int], np.ndarray | None] | None = None,
+) -> Dict[str, Any]:
+    """Run a lead search: filter, score, keep one lead per prospect, select the requested page and aggregate metrics."""
+    # Look up matching leads
+    matched_rows, relevance = matched if matched is not None else _match_rows(payload)
     
-    # Filter by industry if specified
-    if industry_focus:
-        mock_leads = [
-            lead for lead in mock_leads 
-            if lead["industry"].lower() == industry_focus.lower()
-        ]
+    # Score every candidate for this request and keep the best
+    started = time.perf_counter()
+    scores = LEAD_SCORER.score(
+        LEAD_STORE,
+        matched_rows,
+        contact_roles=payload.contact_roles,
+        intent_signals=payload.intent_signals,
+    )
+    ranks = LEAD_SCORER.rank(scores, relevance)
+    if ENTITIES is not None:
+        # One lead per prospect: the best-ranked of its leads
+        keep = ENTITIES.collapse(matched_rows, ranks)
+        if len(keep) < len(matched_rows):
+            matched_rows, scores, ranks = np.asarray(matched_rows)[keep], scores[keep], ranks[keep]
+    after = decode_cursor(payload.cursor) if payload.cursor else None
+    top, remaining = top_k(ranks, payload.limit, after)
+    materialize = ENTITIES.lead if ENTITIES is not None else LEAD_STORE.lead
+    leads = [materialize(matched_rows[i], score=scores[i]) for i in top]
+    next_cursor = encode_cursor(ranks[top[-1]], top[-1]) if remaining > len(top) else None
+    scored = time.perf_counter()
+    SEARCH_STAGE_SECONDS.observe(scored - started, "scoring")
+    
+    # Calculate metrics for the returned page and the full match set
+    page_metrics = LeadMetrics.from_leads(leads)
+    metrics = {
+        "total_conversations_analyzed": page_metrics.count * 3,
+        **page_metrics.as_dict(),
+        "matched_set": LEAD_STORE.summarize(matched_rows, scores).as_dict(),
+    }
+    SEARCH_STAGE_SECONDS.observe(time.perf_counter() - scored, "metrics")
     
-    return mock_leads[:max_leads]
+    return {
+        "leads": leads,
+        "metrics": metrics,
+        "next_cursor": next_cursor,
+        "generated_at": datetime.now().isoformat(),
+    }
+
+
+def _search_response(payload: LeadSearchInput, result: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Text and structured content of a find-business-leads result, in the requested output mode."""
+    result = project_search_result(result, payload.output)
+    text = (
+        f"Found {len(result['leads'])} high-quality business leads with an average score "
+        f"of {result['metrics']['average_lead_score']:.2f}"
+    )
+    return text, {
+        "leads": result["leads"],
+        "metrics": result["metrics"],
+        "search_parameters": {
+            "region": payload.region,
+            "industry": payload.industry,
+            "contact_roles": payload.contact_roles,
+            "company_stage": payload.company_stage,
+            "company_size": payload.company_size,
+            "intent_signals": payload.intent_signals,
+            "keywords": payload.keywords,
+            "output": payload.output,
+            "limit": payload.limit,
+            "cursor": payload.cursor
+        },
+        "next_cursor": result["next_cursor"],
+        "generated_at": result["generated_at"]
+    }
+
+
+def _export_response(payload: CRMExportInput, report: Dict[str, Any] | None = None) -> Tuple[str, Dict[str, Any]]:
+    """Text and structured content of an export-to-crm result; no report while it is queued."""
+    label = ADAPTERS[payload.crm_system].label
+    if report is None:
+        text = f"Queued {len(payload.lead_ids)} leads for export to {label}"
+    else:
+        text = f"Exported {report['exported']} of {len(payload.lead_ids)} leads to {label}"
+        if report["failed"] or report["missing"]:
+            text += f" ({report['failed']} rejected, {report['missing']} not found)"
+        if report["merged"]:
+            text += f"; {report['merged']} were duplicates of other leads exported"
+    return text, {
+        "export_config": {
+            "crm_system": payload.crm_system,
+            "lead_count": len(payload.lead_ids),
+            "create_tasks": payload.create_tasks,
+            "set_reminders": payload.set_reminders
+        },
+        "export_options": {
+            "crm_systems": ["Salesforce", "HubSpot", "Pipedrive"],
+            "formats": ["CSV", "JSON", "CRM Native"],
+            "fields": ["Contact Info", "Company Data", "Lead Score", "Intent Analysis"],
+            "automation": ["Create Tasks", "Set Reminders", "Assign Owner"]
+        },
+        "export_status": report["status"] if report else "queued",
+        "export_result": report,
+        "lead_ids": payload.lead_ids
+    }
+
+
+def _job_response(
+    job: Job,
+    text: str,
+    content: Dict[str, Any] | None = None,
+    meta: Dict[str, Any] | None = None,
+) -> types.ServerResult:
+    """Answer a tool call that was handed to the job scheduler."""
+    return types.ServerResult(
+        types.CallToolResult(
+            content=[
+                types.TextContent(
+                    type="text",
+                    text=f"{text}. Running in the background as job {job.id}; "
+                         "call get-job-status with this job_id for progress and results.",
+                )
+            ],
+            structuredContent={**(content or {}), "job": job.as_dict()},
+            _meta=meta,
+        )
+    )
 
 
 def _resource_description(widget: LeadFinderWidget) -> str:
@@ -284,8 +628,8 @@ def _tool_meta(widget: LeadFinderWidget) -> Dict[str, Any]:
         "openai/resultCanProduceWidget": True,
         "annotations": {
             "destructiveHint": False,
-            "openWorldHint": False,
-            "readOnlyHint": True,
+            "openWorldHint": not widget.read_only,
+            "readOnlyHint": widget.read_only,
         }
     }
 
@@ -303,159 +647,162 @@ def _embedded_widget_resource(widget: LeadFinderWidget) -> types.EmbeddedResourc
     )
 
 
-# MCP Protocol Handlers
-@mcp._mcp_server.list_tools()
-async def _list_tools() -> List[types.Tool]:
-    """List all available tools."""
-    tools = []
-    
-    # Find business leads tool
-    tools.append(types.Tool(
+
+@dataclass(frozen=True)
+class WidgetPayloads:
+    """Protocol payloads for a widget, built once at startup and shared by every response."""
+    tool_meta: Dict[str, Any]
+    result_meta: Dict[str, Any]
+    resource: types.Resource
+    resource_template: types.ResourceTemplate
+    read_result: types.ServerResult
+
+
+def _build_widget_payloads(widget: LeadFinderWidget) -> WidgetPayloads:
+    """Build every payload that depends only on a widget's static definition."""
+    tool_meta = _tool_meta(widget)
+    return WidgetPayloads(
+        tool_meta=tool_meta,
+        result_meta={
+            "openai.com/widget": _embedded_widget_resource(widget).model_dump(mode="json"),
+            "openai/outputTemplate": widget.template_uri,
+            "openai/widgetAccessible": True,
+            "openai/resultCanProduceWidget": True,
+        },
+        resource=types.Resource(
+            name=widget.title,
+            title=widget.title,
+            uri=widget.template_uri,
+            description=_resource_description(widget),
+            mimeType=MIME_TYPE,
+            _meta=tool_meta,
+        ),
+        resource_template=types.ResourceTemplate(
+            name=widget.title,
+            title=widget.title,
+            uriTemplate=widget.template_uri,
+            description=_resource_description(widget),
+            mimeType=MIME_TYPE,
+            _meta=tool_meta,
+        ),
+        read_result=types.ServerResult(
+            types.ReadResourceResult(
+                contents=[
+                    types.TextResourceContents(
+                        uri=widget.template_uri,
+                        mimeType=MIME_TYPE,
+                        text=widget.html,
+                        _meta=tool_meta,
+                    )
+                ]
+            )
+        ),
+    )
+
+
+WIDGET_PAYLOADS: Dict[str, WidgetPayloads] = {w.identifier: _build_widget_payloads(w) for w in widgets}
+WIDGET_PAYLOADS_BY_URI: Dict[str, WidgetPayloads] = {
+    w.template_uri: WIDGET_PAYLOADS[w.identifier] for w in widgets
+}
+WIDGET_RESOURCES: List[types.Resource] = [WIDGET_PAYLOADS[w.identifier].resource for w in widgets]
+WIDGET_RESOURCE_TEMPLATES: List[types.ResourceTemplate] = [
+    WIDGET_PAYLOADS[w.identifier].resource_template for w in widgets
+]
+
+
+@dataclass(frozen=True)
+class ToolDefinition:
+    """A tool exposed over MCP; tools that render a widget share its identifier."""
+    name: str
+    title: str
+    description: str
+    input_model: type[BaseModel]
+
+
+TOOL_DEFINITIONS: List[ToolDefinition] = [
+    ToolDefinition(
         name="find-business-leads",
         title="Find Business Leads",
         description="Find high-quality business leads by analyzing social media conversations for purchase intent signals",
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "region": {
-                    "type": "string",
-                    "description": "Geographic region to target (e.g., 'Dallas, TX', 'San Francisco Bay Area')"
-                },
-                "industry": {
-                    "type": "string",
-                    "description": "Industry or sector to focus on (e.g., 'B2B SaaS', 'Healthcare', 'FinTech')"
-                },
-                "contact_roles": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Target contact roles/titles (e.g., 'CEO', 'VP Sales', 'Head of Marketing')"
-                },
-                "company_stage": {
-                    "type": "string",
-                    "description": "Company funding stage (e.g., 'Seed to Series B', 'Series C+', 'Pre-seed')"
-                },
-                "company_size": {
-                    "type": "string",
-                    "description": "Company size range (e.g., '1-50', '51-200', '1-500')"
-                },
-                "intent_signals": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Purchase intent signals to detect (e.g., 'actively hiring', 'recently funded', 'expanding team')"
-                },
-                "output": {
-                    "type": "string",
-                    "enum": ["summary", "detailed_table", "compact_list"],
-                    "description": "Output format preference",
-                    "default": "summary"
-                },
-                "limit": {
-                    "type": "integer",
-                    "description": "Maximum number of leads to return",
-                    "default": 20,
-                    "minimum": 1,
-                    "maximum": 100
-                }
-            },
-            "required": [],
-            "additionalProperties": False
-        },
-        _meta=_tool_meta(WIDGETS_BY_ID["find-business-leads"]),
-    ))
-    
-    # Analyze trends tool
-    tools.append(types.Tool(
+        input_model=LeadSearchInput,
+    ),
+    ToolDefinition(
         name="analyze-lead-trends",
         title="Analyze Lead Trends",
         description="Show analytics dashboard with lead trends and metrics",
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "time_range": {
-                    "type": "string",
-                    "description": "Time range: 7d, 30d, 90d",
-                    "default": "30d"
-                }
-            },
-            "additionalProperties": False
-        },
-        _meta=_tool_meta(WIDGETS_BY_ID["analyze-lead-trends"]),
-    ))
-    
-    # Export to CRM tool
-    tools.append(types.Tool(
+        input_model=TrendAnalysisInput,
+    ),
+    ToolDefinition(
         name="export-to-crm",
         title="Export to CRM",
         description="Export leads to CRM systems like Salesforce, HubSpot, or Pipedrive",
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "lead_ids": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Lead IDs to export"
-                },
-                "crm_system": {
-                    "type": "string",
-                    "enum": ["salesforce", "hubspot", "pipedrive"],
-                    "description": "Target CRM system"
-                },
-                "create_tasks": {
-                    "type": "boolean",
-                    "description": "Create follow-up tasks",
-                    "default": True
-                },
-                "set_reminders": {
-                    "type": "boolean",
-                    "description": "Set follow-up reminders",
-                    "default": True
-                }
-            },
-            "required": ["lead_ids", "crm_system"],
-            "additionalProperties": False
-        },
-        _meta=_tool_meta(WIDGETS_BY_ID["export-to-crm"]),
-    ))
-    
-    return tools
+        input_model=CRMExportInput,
+    ),
+    ToolDefinition(
+        name="enrich-prospect-data",
+        title="Enrich Prospect Data",
+        description="Enrich prospects with contact details and company insights from data providers",
+        input_model=EnrichmentInput,
+    ),
+    ToolDefinition(
+        name="get-job-status",
+        title="Get Job Status",
+        description="Check the progress of a background export or search, fetch its results, or cancel it",
+        input_model=JobStatusInput,
+    ),
+]
+
+# Metadata for tools without a widget of their own that widgets may still call
+WIDGET_CALLABLE_TOOL_META: Dict[str, Any] = {
+    "openai/widgetAccessible": True,
+    "annotations": {
+        "destructiveHint": False,
+        "openWorldHint": False,
+        "readOnlyHint": True,
+    }
+}
+
+
+def _build_tool(definition: ToolDefinition) -> types.Tool:
+    """Build the tools/list entry for a tool from its input model and widget."""
+    payloads = WIDGET_PAYLOADS.get(definition.name)
+    return types.Tool(
+        name=definition.name,
+        title=definition.title,
+        description=definition.description,
+        inputSchema=_tool_input_schema(definition.input_model),
+        _meta=payloads.tool_meta if payloads else WIDGET_CALLABLE_TOOL_META,
+    )
+
+
+# The tools/list response never changes, so it is built once
+TOOLS_MANIFEST = types.ServerResult(
+    types.ListToolsResult(tools=[_build_tool(definition) for definition in TOOL_DEFINITIONS])
+)
+
+
+# MCP Protocol Handlers
+async def _list_tools(req: types.ListToolsRequest) -> types.ServerResult:
+    """List all available tools."""
+    return TOOLS_MANIFEST
 
 
 @mcp._mcp_server.list_resources()
 async def _list_resources() -> List[types.Resource]:
     """List all widget resources."""
-    return [
-        types.Resource(
-            name=widget.title,
-            title=widget.title,
-            uri=widget.template_uri,
-            description=_resource_description(widget),
-            mimeType=MIME_TYPE,
-            _meta=_tool_meta(widget),
-        )
-        for widget in widgets
-    ]
+    return WIDGET_RESOURCES
 
 
 @mcp._mcp_server.list_resource_templates()
 async def _list_resource_templates() -> List[types.ResourceTemplate]:
     """List all widget resource templates."""
-    return [
-        types.ResourceTemplate(
-            name=widget.title,
-            title=widget.title,
-            uriTemplate=widget.template_uri,
-            description=_resource_description(widget),
-            mimeType=MIME_TYPE,
-            _meta=_tool_meta(widget),
-        )
-        for widget in widgets
-    ]
+    return WIDGET_RESOURCE_TEMPLATES
 
 
 async def _handle_read_resource(req: types.ReadResourceRequest) -> types.ServerResult:
     """Handle resource read requests."""
-    widget = WIDGETS_BY_URI.get(str(req.params.uri))
-    if widget is None:
+    payloads = WIDGET_PAYLOADS_BY_URI.get(str(req.params.uri))
+    if payloads is None:
         return types.ServerResult(
             types.ReadResourceResult(
                 contents=[],
@@ -463,178 +810,187 @@ async def _handle_read_resource(req: types.ReadResourceRequest) -> types.ServerR
             )
         )
 
-    contents = [
-        types.TextResourceContents(
-            uri=widget.template_uri,
-            mimeType=MIME_TYPE,
-            text=widget.html,
-            _meta=_tool_meta(widget),
-        )
-    ]
-
-    return types.ServerResult(types.ReadResourceResult(contents=contents))
+    return payloads.read_result
 
 
 async def _call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
     """Handle tool call requests."""
     tool_name = req.params.name
     arguments = req.params.arguments or {}
+    # Pick up leads other workers or an ingestion run have added since
+    LEAD_STORE.refresh()
     
     try:
         if tool_name == "find-business-leads":
             # Validate and parse input
             payload = LeadSearchInput.model_validate(arguments)
             
-            # Generate search terms from the input
-            search_terms = []
-            if payload.industry:
-                search_terms.append(payload.industry)
-            if payload.intent_signals:
-                search_terms.extend(payload.intent_signals)
-            if not search_terms:
-                search_terms = ["business leads"]
-            
-            # Generate mock leads
-            leads = generate_mock_leads(
-                search_terms=search_terms,
-                industry_focus=payload.industry,
-                max_leads=payload.limit
+            # Identical queries within the TTL share one computed result
+            widget_payloads = WIDGET_PAYLOADS["find-business-leads"]
+            cache_key = payload.cache_key()
+            result = _cached_search(cache_key)
+            if result is None:
+                matched = _match_rows(payload)
+                matched_rows = matched[0]
+                if len(matched_rows) >= SEARCH_JOB_THRESHOLD:
+                    # Score very large candidate sets off the event loop, in the background
+                    async def run_search(job: Job) -> Tuple[str, Dict[str, Any]]:
+                        job.report(0, len(matched_rows))
+                        result = await asyncio.to_thread(_search_leads, payload, matched)
+                        _cache_search(cache_key, result)
+                        job.report(len(matched_rows))
+                        return _search_response(payload, result)
+
+                    job = JOB_SCHEDULER.submit(
+                        "find-business-leads",
+                        run_search,
+                        priority=INTERACTIVE,
+                        description=f"Search over {len(matched_rows)} leads",
+                    )
+                    return _job_response(job, f"Searching {len(matched_rows)} matching leads")
+                if len(matched_rows) >= SEARCH_THREAD_THRESHOLD:
+                    # Scored off the event loop, so identical calls arriving meanwhile join this one
+                    result = await asyncio.to_thread(_search_leads, payload, matched)
+                else:
+                    result = _search_leads(payload, matched)
+                _cache_search(cache_key, result)
+            started = time.perf_counter()
+            text, content = _search_response(payload, result)
+            response = types.ServerResult(
+                types.CallToolResult(
+                    content=[
+                        types.TextContent(
+                            type="text",
+                            text=text,
+                        )
+                    ],
+                    structuredContent=content,
+                    _meta=widget_payloads.result_meta,
+                )
             )
+            SEARCH_STAGE_SECONDS.observe(time.perf_counter() - started, "serialization")
             
-            # Calculate metrics
-            metrics = {
-                "total_conversations_analyzed": len(leads) * 3,
-                "qualified_leads_found": len(leads),
-                "average_lead_score": sum(l["lead_score"] for l in leads) / len(leads) if leads else 0,
-                "platform_breakdown": {
-                    "LinkedIn": len([l for l in leads if l["source_platform"] == "LinkedIn"]),
-                    "Reddit": len([l for l in leads if l["source_platform"] == "Reddit"]),
-                    "Twitter": len([l for l in leads if l["source_platform"] == "Twitter"])
-                },
-                "industry_breakdown": {
-                    industry: len([l for l in leads if l["industry"] == industry])
-                    for industry in set(l["industry"] for l in leads)
-                },
-                "geographic_distribution": {
-                    location: len([l for l in leads if l["location"] == location])
-                    for location in set(l["location"] for l in leads)
-                }
-            }
-            
-            widget = WIDGETS_BY_ID["find-business-leads"]
-            widget_resource = _embedded_widget_resource(widget)
+            return response
+        
+        elif tool_name == "analyze-lead-trends":
+            payload = TrendAnalysisInput.model_validate(arguments)
+            widget_payloads = WIDGET_PAYLOADS["analyze-lead-trends"]
+            dashboard = TREND_ROLLUPS.dashboard(payload.time_range)
+            if dashboard["status"] == "warming":
+                text = (f"Trend rollups are still being built from {dashboard['leads']} leads; "
+                        "try again in a few seconds")
+            else:
+                text = (f"Generated analytics dashboard for the last {payload.time_range}: "
+                        f"{dashboard['analytics']['total_leads']} leads")
             
             return types.ServerResult(
                 types.CallToolResult(
                     content=[
                         types.TextContent(
                             type="text",
-                            text=f"Found {len(leads)} high-quality business leads with an average score of {metrics['average_lead_score']:.2f}",
+                            text=text,
                         )
                     ],
-                    structuredContent={
-                        "leads": leads,
-                        "metrics": metrics,
-                        "search_parameters": {
-                            "region": payload.region,
-                            "industry": payload.industry,
-                            "contact_roles": payload.contact_roles,
-                            "company_stage": payload.company_stage,
-                            "company_size": payload.company_size,
-                            "intent_signals": payload.intent_signals,
-                            "output": payload.output,
-                            "limit": payload.limit
-                        },
-                        "generated_at": datetime.now().isoformat()
-                    },
-                    _meta={
-                        "openai.com/widget": widget_resource.model_dump(mode="json"),
-                        "openai/outputTemplate": widget.template_uri,
-                        "openai/widgetAccessible": True,
-                        "openai/resultCanProduceWidget": True,
-                    },
+                    structuredContent=dashboard,
+                    _meta=widget_payloads.result_meta,
                 )
             )
         
-        elif tool_name == "analyze-lead-trends":
-            widget = WIDGETS_BY_ID["analyze-lead-trends"]
-            widget_resource = _embedded_widget_resource(widget)
+        elif tool_name == "enrich-prospect-data":
+            payload = EnrichmentInput.model_validate(arguments)
+            report = await ENRICHMENT_PIPELINE.enrich(
+                payload.prospect_ids,
+                level=payload.enrichment_level,
+                include_contact_info=payload.include_contact_info,
+                include_company_insights=payload.include_company_insights,
+            )
+            summary = report["summary"]
+            text = f"Enriched {summary['complete']} of {summary['unique']} prospects"
+            if summary["partial"]:
+                text += f" ({summary['partial']} partially, some provider lookups did not finish)"
             
             return types.ServerResult(
                 types.CallToolResult(
                     content=[
                         types.TextContent(
                             type="text",
-                            text="Generated analytics dashboard with lead trends",
+                            text=text,
                         )
                     ],
-                    structuredContent={
-                        "analytics": {
-                            "total_leads": 150,
-                            "hot_leads": 45,
-                            "warm_leads": 78,
-                            "cold_leads": 27,
-                            "conversion_rate": 0.12,
-                            "avg_response_time": "2.3 days"
-                        },
-                        "trends": {
-                            "weekly_growth": 0.15,
-                            "monthly_growth": 0.23,
-                            "top_industries": ["Technology", "SaaS", "Healthcare"],
-                            "top_locations": ["San Francisco", "Austin", "Boston"]
-                        },
-                        "time_series": [
-                            {"date": "2025-09-07", "leads": 12, "conversions": 2},
-                            {"date": "2025-09-14", "leads": 18, "conversions": 3},
-                            {"date": "2025-09-21", "leads": 25, "conversions": 5},
-                            {"date": "2025-09-28", "leads": 30, "conversions": 6},
-                            {"date": "2025-10-05", "leads": 35, "conversions": 8},
-                        ]
-                    },
-                    _meta={
-                        "openai.com/widget": widget_resource.model_dump(mode="json"),
-                        "openai/outputTemplate": widget.template_uri,
-                        "openai/widgetAccessible": True,
-                        "openai/resultCanProduceWidget": True,
-                    },
+                    structuredContent=report,
                 )
             )
         
         elif tool_name == "export-to-crm":
             payload = CRMExportInput.model_validate(arguments)
-            widget = WIDGETS_BY_ID["export-to-crm"]
-            widget_resource = _embedded_widget_resource(widget)
+            widget_payloads = WIDGET_PAYLOADS["export-to-crm"]
+            CRM_EXPORTER.connection(payload.crm_system)
+            
+            async def run_export(job: Job | None = None) -> Tuple[str, Dict[str, Any]]:
+                report = await CRM_EXPORTER.export(
+                    payload.crm_system,
+                    payload.lead_ids,
+                    create_tasks=payload.create_tasks,
+                    set_reminders=payload.set_reminders,
+                    on_progress=job.report if job else None,
+                )
+                return _export_response(payload, report)
+            
+            # Large exports run in the background so the call returns right away
+            if len(payload.lead_ids) > EXPORT_JOB_THRESHOLD:
+                job = JOB_SCHEDULER.submit(
+                    "export-to-crm",
+                    run_export,
+                    priority=BULK,
+                    description=f"Export of {len(payload.lead_ids)} leads to {ADAPTERS[payload.crm_system].label}",
+                )
+                text, content = _export_response(payload)
+                return _job_response(job, text, content, widget_payloads.result_meta)
+            text, content = await run_export()
+            
+            return types.ServerResult(
+                types.CallToolResult(
+                    content=[
+                        types.TextContent(
+                            type="text",
+                            text=text,
+                        )
+                    ],
+                    structuredContent=content,
+                    _meta=widget_payloads.result_meta,
+                )
+            )
+        
+        elif tool_name == "get-job-status":
+            payload = JobStatusInput.model_validate(arguments)
+            job = JOB_SCHEDULER.cancel(payload.job_id) if payload.cancel else JOB_SCHEDULER.get(payload.job_id)
+            if job is None:
+                raise ValueError(f"Unknown or expired job: {payload.job_id}")
+            
+            # A finished job answers with its tool's result, rendered by the tool's widget
+            meta = None
+            if job.status == COMPLETED:
+                text, content = job.result
+                widget_payloads = WIDGET_PAYLOADS.get(job.kind)
+                meta = widget_payloads.result_meta if widget_payloads else None
+            else:
+                text = f"Job {job.id} ({job.description}) is {job.status}"
+                if job.total:
+                    text += f", {job.done} of {job.total} done"
+                if job.status == FAILED:
+                    text += f": {job.error}"
+                content = {}
             
             return types.ServerResult(
                 types.CallToolResult(
                     content=[
                         types.TextContent(
                             type="text",
-                            text=f"Prepared {len(payload.lead_ids)} leads for export to {payload.crm_system.title()}",
+                            text=text,
                         )
                     ],
-                    structuredContent={
-                        "export_config": {
-                            "crm_system": payload.crm_system,
-                            "lead_count": len(payload.lead_ids),
-                            "create_tasks": payload.create_tasks,
-                            "set_reminders": payload.set_reminders
-                        },
-                        "export_options": {
-                            "crm_systems": ["Salesforce", "HubSpot", "Pipedrive"],
-                            "formats": ["CSV", "JSON", "CRM Native"],
-                            "fields": ["Contact Info", "Company Data", "Lead Score", "Intent Analysis"],
-                            "automation": ["Create Tasks", "Set Reminders", "Assign Owner"]
-                        },
-                        "export_status": "ready",
-                        "lead_ids": payload.lead_ids
-                    },
-                    _meta={
-                        "openai.com/widget": widget_resource.model_dump(mode="json"),
-                        "openai/outputTemplate": widget.template_uri,
-                        "openai/widgetAccessible": True,
-                        "openai/resultCanProduceWidget": True,
-                    },
+                    structuredContent={**content, "job": job.as_dict()},
+                    _meta=meta,
                 )
             )
         
@@ -652,6 +1008,7 @@ async def _call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
             )
             
     except ValidationError as exc:
+        TOOL_ERRORS.inc(_tool_label(tool_name), "ValidationError")
         return types.ServerResult(
             types.CallToolResult(
                 content=[
@@ -664,6 +1021,12 @@ async def _call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
             )
         )
     except Exception as exc:
+        TOOL_ERRORS.inc(_tool_label(tool_name), type(exc).__name__)
+        if isinstance(exc, (ValueError, CRMError)):
+            # Expected failures: rejected input, or a CRM not configured or failing
+            logger.info("Tool %s failed: %s", tool_name, exc)
+        else:
+            logger.exception("Tool %s failed", tool_name)
         return types.ServerResult(
             types.CallToolResult(
                 content=[
@@ -677,38 +1040,176 @@ async def _call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
         )
 
 
+async def _coalesced_call_tool_request(req: types.CallToolRequest) -> types.ServerResult:
+    """Handle a tool call, sharing the computation of identical read-only calls in flight."""
+    if req.params.name not in COALESCED_TOOLS:
+        return await _call_tool_request(req)
+    key = (req.params.name, json.dumps(req.params.arguments or {}, sort_keys=True, default=str))
+    return await TOOL_CALLS.run(key, lambda: _call_tool_request(req))
+
+
+def _admission_kind(request: Any) -> Tuple[str, int]:
+    """Kind and priority of a JSON-RPC request body for admission control."""
+    if not isinstance(request, dict):
+        # Batches and malformed bodies
+        return "other", HEAVY
+    method = request.get("method")
+    if method == "tools/call":
+        params = request.get("params")
+        tool = _tool_label(str(params.get("name")) if isinstance(params, dict) else "")
+        return tool, LIGHT if tool in LIGHT_TOOLS else HEAVY
+    if isinstance(method, str) and method.startswith("notifications/"):
+        return "notification", LIGHT
+    return (method, LIGHT) if method in ADMISSION_METHODS else ("other", HEAVY)
+
+
+def _tool_label(name: str) -> str:
+    """Tool name as a metric label; unknown names share one, so clients cannot grow the label set."""
+    return name if name in TOOL_NAMES else "unknown"
+
+
+TOOL_NAMES = frozenset(definition.name for definition in TOOL_DEFINITIONS)
+
+
+def _instrumented(method: str, handler):
+    """Wrap an MCP request handler to record its latency and outcome, and profile it if enabled."""
+    async def handle(req):
+        tool = _tool_label(req.params.name) if method == "tools/call" else ""
+        outcome = "exception"
+        profiled = PROFILER.begin() if PROFILER else 0.0
+        started = time.perf_counter()
+        try:
+            result = await handler(req)
+            outcome = "error" if getattr(result.root, "isError", False) else "ok"
+            return result
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method, tool, outcome)
+            if PROFILER:
+                PROFILER.end(profiled, f"{method} {tool}".rstrip())
+
+    return handle
+
+
 # Register handlers
-mcp._mcp_server.request_handlers[types.CallToolRequest] = _call_tool_request
-mcp._mcp_server.request_handlers[types.ReadResourceRequest] = _handle_read_resource
+_handlers = mcp._mcp_server.request_handlers
+_handlers[types.ListToolsRequest] = _instrumented("tools/list", _list_tools)
+_handlers[types.CallToolRequest] = _instrumented("tools/call", _coalesced_call_tool_request)
+_handlers[types.ReadResourceRequest] = _instrumented("resources/read", _handle_read_resource)
+_handlers[types.ListResourcesRequest] = _instrumented("resources/list", _handlers[types.ListResourcesRequest])
+_handlers[types.ListResourceTemplatesRequest] = _instrumented(
+    "resources/templates/list", _handlers[types.ListResourceTemplatesRequest],
+)
 
 # Create FastAPI app
 app = mcp.streamable_http_app()
 
+# Tool call responses are plain JSON by default, but with MCP_JSON_RESPONSE=false
+# they are short event streams. sse-starlette would end those as soon as a worker
+# is told to stop; leave them to uvicorn's graceful drain like the JSON ones, so
+# a rolling restart does not cut off in-flight /mcp requests in either mode.
+AppStatus.disable_automatic_graceful_drain()
+
+# Backfill the trend rollups at startup; stop background jobs and close the pooled
+# CRM clients at shutdown
+_mcp_lifespan = app.router.lifespan_context
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(app):
+    TREND_ROLLUPS.start_backfill()
+    async with _mcp_lifespan(app):
+        yield
+        # Connections have drained by now; end any stream still open
+        AppStatus.should_exit = True
+    await JOB_SCHEDULER.aclose()
+    await CRM_EXPORTER.aclose()
+
+app.router.lifespan_context = _lifespan
+
 # Add health check endpoint for Railway
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 from starlette.routing import Route
 
 async def health_check(request):
     """Health check endpoint for Railway and monitoring."""
+    LEAD_STORE.refresh()
     return JSONResponse({
         "status": "healthy",
         "service": "business-lead-finder-mcp",
-        "mcp_endpoint": "/mcp"
+        "mcp_endpoint": "/mcp",
+        "worker_pid": os.getpid(),
+        "leads": len(LEAD_STORE),
+        "caches": {
+            "find-business-leads": SEARCH_CACHE.stats(),
+            "find-business-leads-shared": SHARED_SEARCH_CACHE.stats() if SHARED_SEARCH_CACHE else None,
+            "enrich-prospect-data": ENRICHMENT_CACHE.stats(),
+        },
+        "jobs": JOB_SCHEDULER.stats(),
+        "entities": ENTITIES.stats() if ENTITIES else None,
+        "trends": TREND_ROLLUPS.status,
+        "coalescing": TOOL_CALLS.stats(),
+        "admission": ADMISSION.stats(),
     })
 
 # Add the health check route to the app
 app.routes.insert(0, Route("/", health_check))
 
+
+async def metrics(request):
+    """Request metrics of this worker in the Prometheus text format."""
+    return Response(METRICS.render(), media_type=METRICS.content_type)
+
+
+async def slow_requests(request):
+    """Profiles of the latest slow requests, when PROFILE_SLOW_REQUESTS_MS enables the profiler."""
+    return JSONResponse({
+        "threshold_ms": PROFILER.threshold * 1000,
+        "slow_requests": list(PROFILER.slow),
+    })
+
+app.routes.insert(1, Route("/metrics", metrics))
+if PROFILER:
+    app.routes.insert(2, Route("/debug/slow-requests", slow_requests))
+
+# Compress large responses; added first so the metrics below see the sizes sent
+if os.getenv("RESPONSE_COMPRESSION", "true").lower() == "true":
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")),
+    )
+
+# Rate limit, cap and queue /mcp requests before they reach the MCP app
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=ADMISSION,
+    classify=_admission_kind,
+    decisions=ADMISSION_DECISIONS,
+    waits=ADMISSION_WAIT_SECONDS,
+    buckets=CLIENT_BUCKETS,
+    client_header=os.getenv("CLIENT_ID_HEADER", "mcp-session-id"),
+    trust_forwarded=os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true",
+)
+
+# Time and size every HTTP request
+app.add_middleware(
+    HTTPMetricsMiddleware,
+    durations=HTTP_SECONDS,
+    sizes=HTTP_BODY_BYTES,
+    paths=("/", "/mcp", "/metrics"),
+)
+
 # Add CORS middleware
 try:
     from starlette.middleware.cors import CORSMiddleware
 
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],
+        # Comma-separated origins allowed to call the server from a browser
+        allow_origins=[origin.strip() for origin in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",")],
         allow_methods=["*"],
         allow_headers=["*"],
         allow_credentials=False,
+        expose_headers=["Retry-After", "Mcp-Session-Id"],
     )
 except Exception:
     pass
@@ -716,5 +1217,22 @@ except Exception:
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    port = int(os.getenv("PORT", "8000"))
+    if workers > 1:
+        # Production: a supervisor process with one worker per core. SIGHUP starts
+        # fresh workers and lets the old ones finish in-flight requests before exiting.
+        if DATA_DIR is None:
+            logging.warning("LEAD_STORE_PATH is not set; each worker keeps its own leads, caches and jobs")
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=port,
+            workers=workers,
+            timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30")),
+            timeout_worker_healthcheck=int(os.getenv("WORKER_STARTUP_TIMEOUT", "120")),
+        )
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
 
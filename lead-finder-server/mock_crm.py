@@ -0,0 +1,146 @@
+"""Local mock of the Salesforce, HubSpot and Pipedrive endpoints used by CRM export.
+
+It accepts the same requests as the real bulk APIs, enforces each CRM's rate
+limit with 429 responses and ``Retry-After``, and can fail a share of requests
+to exercise retries. Run it and point the exporter at it::
+
+    MOCK_CRM_FAILURE_RATE=0.05 uvicorn mock_crm:app --port 4600
+    HUBSPOT_API_URL=http://localhost:4600 HUBSPOT_API_TOKEN=test python main.py
+
+``GET /stats`` reports how many records each CRM received and how many
+requests were throttled.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from itertools import count
+from typing import Any, Dict
+import os
+import random
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from crm_export import ADAPTERS
+
+FAILURE_RATE = float(os.getenv("MOCK_CRM_FAILURE_RATE", "0"))
+# Multiplier on each CRM's documented rate limit
+RATE_SCALE = float(os.getenv("MOCK_CRM_RATE_SCALE", "1"))
+
+
+class _Bucket:
+    """Non-blocking token bucket: answers how long to wait instead of waiting."""
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        return 0.0
+
+
+_buckets = {name: _Bucket(adapter.rate_limit * RATE_SCALE) for name, adapter in ADAPTERS.items()}
+_ids = count(1)
+_received: Counter = Counter()
+_throttled: Counter = Counter()
+_failed: Counter = Counter()
+_requests: Counter = Counter()
+
+
+def _gate(crm: str) -> JSONResponse | None:
+    """Return a throttling or failure response, or ``None`` to serve the request."""
+    _requests[crm] += 1
+    wait = _buckets[crm].take()
+    if wait:
+        _throttled[crm] += 1
+        return JSONResponse({"error": "rate limit exceeded"}, status_code=429,
+                            headers={"Retry-After": f"{wait:.3f}"})
+    if random.random() < FAILURE_RATE:
+        _failed[crm] += 1
+        return JSONResponse({"error": "temporarily unavailable"}, status_code=503)
+    return None
+
+
+async def salesforce_collections(request: Request):
+    rejected = _gate("salesforce")
+    if rejected:
+        return rejected
+    body = await request.json()
+    results = []
+    for record in body["records"]:
+        kind = record["attributes"]["type"]
+        if kind == "Lead" and not (record.get("LastName") and record.get("Company")):
+            results.append({"success": False, "errors": [
+                {"statusCode": "REQUIRED_FIELD_MISSING", "message": "Required fields are missing: [LastName, Company]"}
+            ]})
+            continue
+        _received[f"salesforce.{kind}"] += 1
+        prefix = "00Q" if kind == "Lead" else "00T"
+        results.append({"id": f"{prefix}{next(_ids):015d}", "success": True, "errors": []})
+    return JSONResponse(results)
+
+
+async def hubspot_batch_create(request: Request):
+    rejected = _gate("hubspot")
+    if rejected:
+        return rejected
+    body = await request.json()
+    kind = request.path_params["object_type"]
+    results = []
+    for item in body["inputs"]:
+        _received[f"hubspot.{kind}"] += 1
+        results.append({
+            "id": str(next(_ids)),
+            "objectWriteTraceId": item.get("objectWriteTraceId"),
+            "properties": item["properties"],
+        })
+    random.shuffle(results)
+    return JSONResponse({"status": "COMPLETE", "results": results}, status_code=201)
+
+
+async def pipedrive_create(request: Request):
+    rejected = _gate("pipedrive")
+    if rejected:
+        return rejected
+    body = await request.json()
+    kind = request.path_params["object_type"]
+    if kind == "persons" and not body.get("name"):
+        return JSONResponse({"success": False, "error": "Name must be given."}, status_code=400)
+    _received[f"pipedrive.{kind}"] += 1
+    return JSONResponse({"success": True, "data": {"id": next(_ids), **body}}, status_code=201)
+
+
+async def stats(request: Request):
+    def by_crm(counter: Counter) -> Dict[str, Any]:
+        return dict(sorted(counter.items()))
+
+    return JSONResponse({
+        "received": by_crm(_received),
+        "requests": by_crm(_requests),
+        "throttled": by_crm(_throttled),
+        "failed": by_crm(_failed),
+    })
+
+
+app = Starlette(routes=[
+    Route("/services/data/v60.0/composite/sobjects", salesforce_collections, methods=["POST"]),
+    Route("/crm/v3/objects/{object_type}/batch/create", hubspot_batch_create, methods=["POST"]),
+    Route("/v1/{object_type:str}", pipedrive_create, methods=["POST"]),
+    Route("/stats", stats),
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=4600)
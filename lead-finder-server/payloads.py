@@ -0,0 +1,180 @@
+"""Response payload shaping: per output mode projections of search results, and HTTP compression.
+
+find-business-leads results are computed and cached once, with full leads and
+metrics, whatever output mode was asked for. ``project_search_result`` then
+keeps only the fields the requested view shows:
+
+* ``compact_list``: one line per lead (name, role, company, location, score,
+  intent level, source link and, for merged leads, every platform the
+  prospect was found on) and the headline metrics.
+* ``summary``: the lead cards of the lead-finder widget, adding the email,
+  industry, intent details, a snippet of what the prospect posted and the IDs
+  of merged leads, with the full metrics.
+* ``detailed_table``: every field of every lead.
+
+Every view keeps the fields the widget reads unconditionally (``id``,
+``lead_score``, ``intent_analysis.intent_level``), so it renders any of them.
+
+``CompressionMiddleware`` compresses HTTP responses with brotli when the client
+accepts it and the ``brotli`` package is installed, and with gzip otherwise.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Sequence
+
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+# Nested field selection: None keeps a value whole, a dict selects inside it
+FieldTree = Dict[str, Any]
+
+
+def _tree(paths: Sequence[str]) -> FieldTree:
+    """Turn dotted field paths into a nested field selection."""
+    tree: FieldTree = {}
+    for path in paths:
+        node = tree
+        *parents, leaf = path.split(".")
+        for name in parents:
+            node = node.setdefault(name, {})
+        node[leaf] = None
+    return tree
+
+
+def _select(value: Dict[str, Any], tree: FieldTree) -> Dict[str, Any]:
+    return {
+        name: value[name] if fields is None or not isinstance(value[name], dict) else _select(value[name], fields)
+        for name, fields in tree.items()
+        if name in value
+    }
+
+
+@dataclass(frozen=True)
+class OutputView:
+    """Fields of a search result shown by one output mode; ``None`` keeps everything."""
+    lead_fields: FieldTree | None
+    metric_fields: FieldTree | None
+    # Characters of source_content kept, or None for all of it
+    snippet_length: int | None = None
+
+    def lead(self, lead: Dict[str, Any]) -> Dict[str, Any]:
+        if self.lead_fields is None:
+            return lead
+        projected = _select(lead, self.lead_fields)
+        content = projected.get("source_content")
+        if self.snippet_length is not None and content and len(content) > self.snippet_length:
+            projected["source_content"] = content[:self.snippet_length].rstrip() + "…"
+        return projected
+
+    def metrics(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        return metrics if self.metric_fields is None else _select(metrics, self.metric_fields)
+
+
+COMPACT_LEAD_FIELDS = (
+    "id",
+    "prospect_name",
+    "title",
+    "company",
+    "location",
+    "source_platform",
+    "source_url",
+    "source_platforms",
+    "lead_score",
+    "intent_analysis.intent_level",
+)
+
+OUTPUT_VIEWS: Dict[str, OutputView] = {
+    "compact_list": OutputView(
+        lead_fields=_tree(COMPACT_LEAD_FIELDS),
+        metric_fields=_tree((
+            "qualified_leads_found",
+            "average_lead_score",
+            "score_tiers",
+            "matched_set.qualified_leads_found",
+            "matched_set.average_lead_score",
+        )),
+    ),
+    "summary": OutputView(
+        lead_fields=_tree((
+            *COMPACT_LEAD_FIELDS,
+            "industry",
+            "source_content",
+            "discovered_at",
+            "intent_analysis.urgency_level",
+            "intent_analysis.pain_points",
+            "contact_info.email",
+            "merged_lead_ids",
+        )),
+        metric_fields=None,
+        snippet_length=200,
+    ),
+    "detailed_table": OutputView(lead_fields=None, metric_fields=None),
+}
+
+
+def project_search_result(result: Dict[str, Any], output: str) -> Dict[str, Any]:
+    """The leads and metrics of a cached search ``result`` as shown by output mode ``output``."""
+    view = OUTPUT_VIEWS[output]
+    return {
+        **result,
+        "leads": [view.lead(lead) for lead in result["leads"]],
+        "metrics": view.metrics(result["metrics"]),
+    }
+
+
+class BrotliResponder(IdentityResponder):
+    """Brotli counterpart of Starlette's gzip responder."""
+    content_encoding = "br"
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        quality: int,
+        *,
+        exclude_content_types: tuple[str, ...] = DEFAULT_EXCLUDED_CONTENT_TYPES,
+    ) -> None:
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.quality = quality
+        self._compressor: Any = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        compressed = self._compressor.process(body)
+        return compressed + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compress responses of at least ``minimum_size`` bytes, preferring brotli when available.
+
+    Event streams are left alone, so only plain JSON responses are compressed.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, compresslevel: int = 6, brotli_quality: int = 5) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and brotli is not None and _accepts(scope, b"br"):
+            responder = BrotliResponder(
+                self.app, self.minimum_size, self.brotli_quality, exclude_content_types=self.exclude_content_types,
+            )
+            await responder(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+def _accepts(scope: Scope, encoding: bytes) -> bool:
+    """Whether the request's Accept-Encoding lists ``encoding``."""
+    for name, value in scope["headers"]:
+        if name == b"accept-encoding":
+            return any(item.split(b";")[0].strip() == encoding for item in value.split(b","))
+    return False
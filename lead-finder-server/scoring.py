@@ -0,0 +1,138 @@
+"""Batched lead scoring.
+
+``lead_score`` is a weighted sum of the five ``score_breakdown`` components.
+``LeadScorer`` computes it for a whole candidate set with one matrix-vector
+product over the store's score columns, with the weights shifted towards the
+components a request cares about. Searches with a text query rank by the lead
+score plus a weighted share of the query's BM25 relevance.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import List, Sequence, Tuple
+import base64
+import json
+
+import numpy as np
+
+from lead_store import SCORE_COMPONENTS, LeadStore
+
+_ROLE_RELEVANCE = SCORE_COMPONENTS.index("role_relevance")
+_INTENT_STRENGTH = SCORE_COMPONENTS.index("intent_strength")
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    """Relative weight of each score component, plus per-request boosts."""
+    intent_strength: float = 0.3
+    company_fit: float = 0.25
+    role_relevance: float = 0.2
+    engagement_level: float = 0.15
+    timing_signals: float = 0.1
+    # Multipliers applied when the request names contact roles / intent signals
+    role_boost: float = 1.5
+    intent_boost: float = 1.5
+    # Ranking weight of text relevance, scaled to [0, 1] over the candidate set
+    text_relevance: float = 0.3
+
+    def __post_init__(self) -> None:
+        for field in fields(self):
+            if getattr(self, field.name) < 0:
+                raise ValueError(f"Scoring weight {field.name} must not be negative")
+        if not any(getattr(self, component) for component in SCORE_COMPONENTS):
+            raise ValueError("At least one score component needs a positive weight")
+
+    def vector(
+        self,
+        contact_roles: Sequence[str] | None = None,
+        intent_signals: Sequence[str] | None = None,
+    ) -> np.ndarray:
+        """Return the normalized weight vector for a request, in ``SCORE_COMPONENTS`` order."""
+        weights = np.array([getattr(self, component) for component in SCORE_COMPONENTS])
+        if contact_roles:
+            weights[_ROLE_RELEVANCE] *= self.role_boost
+        if intent_signals:
+            weights[_INTENT_STRENGTH] *= self.intent_boost
+        return weights / weights.sum()
+
+
+class LeadScorer:
+    """Scores candidate rows of a ``LeadStore`` in one vectorized pass."""
+
+    def __init__(self, weights: ScoringWeights | None = None) -> None:
+        self.weights = weights or ScoringWeights()
+
+    def score(
+        self,
+        store: LeadStore,
+        rows: Sequence[int],
+        contact_roles: Sequence[str] | None = None,
+        intent_signals: Sequence[str] | None = None,
+    ) -> np.ndarray:
+        """Return the request-weighted lead score of each row, aligned with ``rows``."""
+        components = store.score_components(rows)
+        return components @ self.weights.vector(contact_roles, intent_signals)
+
+    def rank(self, scores: np.ndarray, relevance: np.ndarray | None = None) -> np.ndarray:
+        """Return ranking keys: ``scores`` plus the weighted, max-scaled text ``relevance``."""
+        if relevance is None or not len(relevance):
+            return scores
+        top = relevance.max()
+        # No lead relevant at all, e.g. intent signals that nothing resembles
+        if top <= 0:
+            return scores
+        return scores + self.weights.text_relevance * relevance / top
+
+
+def top_k(
+    scores: np.ndarray,
+    limit: int,
+    after: Tuple[float, int] | None = None,
+) -> Tuple[List[int], int]:
+    """Select the positions of the ``limit`` best scores, best first.
+
+    Ties are broken by position, so the order is deterministic. ``after`` is
+    the ``(score, position)`` of the last lead of a previous page; only leads
+    ranked after it are considered. Selection uses ``argpartition``, so only
+    the returned page is sorted. Also returns how many leads were ranked after
+    the cursor, which tells whether another page exists.
+    """
+    candidates = None
+    if after is not None:
+        last_score, last_position = after
+        positions = np.arange(len(scores))
+        candidates = np.flatnonzero(
+            (scores < last_score) | ((scores == last_score) & (positions > last_position))
+        )
+        scores = scores[candidates]
+
+    remaining = len(scores)
+    if limit <= 0:
+        return [], remaining
+    if limit >= remaining:
+        selected = np.arange(remaining)
+    else:
+        threshold = scores[np.argpartition(-scores, limit - 1)[limit - 1]]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:limit - len(above)]
+        selected = np.concatenate([above, ties])
+    selected = selected[np.lexsort((selected, -scores[selected]))]
+
+    if candidates is not None:
+        selected = candidates[selected]
+    return selected.tolist(), remaining
+
+
+def encode_cursor(score: float, position: int) -> str:
+    """Encode the last lead of a page as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(json.dumps([float(score), position]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        score, position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(position)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
@@ -0,0 +1,118 @@
+"""On-disk snapshots of column arrays, and the append log that follows them.
+
+A snapshot is a directory of ``.npy`` files plus ``meta.json``. It is written
+to a staging directory and renamed into place, so readers never see a partial
+one, and read back with ``mmap_mode="r"``: opening costs a few system calls
+rather than parsing the data, pages are only read when touched, and every
+process mapping the same files shares them through the OS page cache.
+
+``AppendLog`` keeps records added since the snapshot as JSON lines, each
+written with a single ``O_APPEND`` write so concurrent writers do not
+interleave. Readers remember how far they have read, so every process can
+pick up the records the others append.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, Tuple
+import contextlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+META_FILE = "meta.json"
+
+
+def snapshot_exists(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+@contextlib.contextmanager
+def exclusive(lock_path: str) -> Iterator[None]:
+    """Hold an exclusive lock on file ``lock_path`` across processes, e.g. while building a snapshot."""
+    with open(lock_path, "a") as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+    """Write ``arrays`` and the JSON-serialisable ``meta`` as the snapshot at ``path``, replacing any."""
+    staging = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for name, values in arrays.items():
+        np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(values))
+    with open(os.path.join(staging, META_FILE), "w") as file:
+        json.dump({**meta, "arrays": sorted(arrays)}, file)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(staging, path)
+
+
+def read_snapshot(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Memory-map the snapshot at ``path``, returning its arrays and metadata."""
+    with open(os.path.join(path, META_FILE)) as file:
+        meta = json.load(file)
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        for name in meta.pop("arrays")
+    }
+    return arrays, meta
+
+
+class AppendLog:
+    """Append-only JSON-lines file of records written after a snapshot."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: int | None = None
+        # Bytes of complete records read so far
+        self._position = 0
+
+    def has_new(self) -> bool:
+        """Whether the log changed since the last read; a single ``stat`` call."""
+        try:
+            return os.stat(self.path).st_size != self._position
+        except FileNotFoundError:
+            return False
+
+    def read_new(self) -> Iterator[Dict[str, Any]]:
+        """Yield the records appended since the last read (all of them on the first).
+
+        A last line still being written is left for the next read.
+        """
+        try:
+            file = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with file:
+            if os.fstat(file.fileno()).st_size < self._position:
+                # Emptied since: its records went into a new snapshot
+                self._position = 0
+            file.seek(self._position)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                self._position += len(line)
+                yield json.loads(line)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(self._fd, (json.dumps(record, separators=(",", ":")) + "\n").encode())
+
+    def clear(self) -> None:
+        """Drop every record, e.g. once they are part of a new snapshot."""
+        if os.path.exists(self.path):
+            os.truncate(self.path, 0)
@@ -0,0 +1,6 @@
+"""Make the server's top-level modules importable when pytest runs from the repository."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from crm_export import ADAPTERS, CRMConnection, CRMError, CRMExporter
+from lead_store import SEED_LEADS, LeadStore
+
+ERROR_BODY = {"errorCode": "INVALID_SESSION_ID", "message": "Session expired or invalid"}
+
+
+def test_salesforce_error_object_raises_crm_error():
+    adapter = ADAPTERS["salesforce"]
+    with pytest.raises(CRMError, match="INVALID_SESSION_ID"):
+        adapter.created_ids(SEED_LEADS[:1], ERROR_BODY)
+    with pytest.raises(CRMError):
+        adapter.created_ids(SEED_LEADS[:1], ["not a result"])
+
+
+def test_salesforce_error_object_fails_the_export():
+    connection = CRMConnection(ADAPTERS["salesforce"], "https://crm.test", "token")
+    connection._client = httpx.AsyncClient(
+        base_url="https://crm.test",
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json=ERROR_BODY)),
+    )
+    exporter = CRMExporter(LeadStore(SEED_LEADS), {"salesforce": connection})
+
+    report = asyncio.run(exporter.export("salesforce", [SEED_LEADS[0]["id"]], create_tasks=False))
+
+    assert report["status"] == "failed"
+    assert report["failed"] == 1
+    assert "INVALID_SESSION_ID" in report["errors"][0]["error"]
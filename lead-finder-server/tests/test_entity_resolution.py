@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+
+from entity_resolution import EntityIndex, open_entity_index
+from lead_store import SEED_LEADS, LeadStore, synthetic_leads
+
+
+def _saved_store(path: str, count: int) -> LeadStore:
+    store = LeadStore(SEED_LEADS)
+    for lead in synthetic_leads(count):
+        store.add(lead)
+    store.save(path)
+    return store
+
+
+def _groups(index: EntityIndex, rows: int) -> set:
+    return {tuple(sorted(index.members(row))) for row in range(rows)}
+
+
+def test_reopening_a_saved_index_resolves_only_new_leads(tmp_path, monkeypatch):
+    built = open_entity_index(_saved_store(str(tmp_path), 2000), str(tmp_path / "entities"))
+    assert built.merged
+
+    store = LeadStore.open(str(tmp_path))
+    resolved = []
+    resolve = EntityIndex._resolve
+    monkeypatch.setattr(EntityIndex, "_resolve", lambda self, rows, chunk=2048: (
+        resolved.extend(rows), resolve(self, rows, chunk),
+    ))
+    reopened = open_entity_index(store, str(tmp_path / "entities"))
+
+    assert resolved == []
+    assert len(reopened) == len(built)
+    assert _groups(reopened, len(store)) == _groups(built, len(store))
+
+    # A later lead of a saved prospect joins its entity
+    row = 5
+    lead = dict(store.lead(row), id="lead-again", source_platform="Twitter")
+    added = store.add(lead)
+    assert resolved == [added]
+    assert reopened.entity(added) == reopened.entity(row)
+
+
+def test_saved_index_is_rebuilt_when_the_store_differs(tmp_path):
+    _saved_store(str(tmp_path), 500)
+    open_entity_index(LeadStore.open(str(tmp_path)), str(tmp_path / "entities"))
+
+    other = os.path.join(str(tmp_path), "other")
+    store = _saved_store(other, 300)
+    index = open_entity_index(store, str(tmp_path / "entities"))
+    assert index.stats()["saved_leads"] == 0
+    assert len(index) == len(EntityIndex(store))
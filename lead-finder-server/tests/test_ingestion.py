@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from ingestion import IngestionPipeline
+from lead_store import LeadStore
+
+
+def _linkedin_post(n: int) -> dict:
+    return {
+        "platform": "linkedin",
+        "author": {"handle": f"founder{n}", "name": f"Founder {n}", "headline": f"CEO at Company {n}"},
+        "text": "Looking for a CRM, our manual prospecting takes hours every week. Any recommendations?",
+        "created_at": "2026-10-01T12:00:00Z",
+    }
+
+
+def test_posts_without_urls_are_told_apart_by_author():
+    pipeline = IngestionPipeline(LeadStore(), min_confidence=0)
+    stats = pipeline.run([_linkedin_post(n) for n in range(5)])
+    assert stats.duplicates == 0
+    assert stats.added == 5
+
+    again = pipeline.run([_linkedin_post(0)])
+    assert again.duplicates == 1
+    assert again.added == 0
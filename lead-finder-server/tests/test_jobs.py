@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import asyncio
+
+from jobs import CANCELLED, COMPLETED, JobScheduler
+
+
+def test_job_cancelled_before_it_starts_frees_its_slot():
+    async def scenario():
+        scheduler = JobScheduler(max_concurrency=1)
+
+        async def run(job):
+            return "done"
+
+        first = scheduler.submit("export", run)
+        second = scheduler.submit("export", run)
+        # The first task has not taken a step yet
+        scheduler.cancel(first.id)
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return scheduler, first, second
+
+    scheduler, first, second = asyncio.run(scenario())
+    assert first.status == CANCELLED
+    assert second.status == COMPLETED
+    assert second.result == "done"
+    assert scheduler.stats()["running"] == {}
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from lead_store import SEED_LEADS, LeadStore
+
+
+def _store(*sizes: str) -> LeadStore:
+    return LeadStore(
+        dict(
+            SEED_LEADS[0],
+            id=f"lead-{row}",
+            company_insights=dict(SEED_LEADS[0]["company_insights"], size=size),
+        )
+        for row, size in enumerate(sizes)
+    )
+
+
+def _sizes(store: LeadStore, company_size: str) -> list:
+    return sorted(store.lead(row)["company_insights"]["size"] for row in store.search(company_size=company_size))
+
+
+def test_company_size_range_spanning_buckets():
+    store = _store("1-50", "51-200", "201-1000", "1000+")
+    assert _sizes(store, "1-500") == ["1-50", "201-1000", "51-200"]
+    assert _sizes(store, "small") == ["1-50", "51-200"]
+    assert _sizes(store, "51-200") == ["51-200"]
+
+
+def test_company_size_range_partly_overlapping_a_bucket():
+    store = _store("1-50", "51-200", "201-1000", "1000+")
+    assert _sizes(store, "50-200") == ["1-50", "51-200"]
+    assert _sizes(store, "2,000-5,000") == ["1000+"]
+    assert _sizes(store, "unknown") == []
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import numpy as np
+
+from text_index import BM25Index
+
+DOCUMENTS = [
+    "manual prospecting is slow",
+    "our CRM is a mess",
+    "hiring sales reps, prospecting by hand",
+    "nothing relevant here at all today",
+]
+
+
+def _index() -> BM25Index:
+    index = BM25Index()
+    for row, text in enumerate(DOCUMENTS):
+        index.add(row, [(text, 1)])
+    return index
+
+
+def test_restricting_rows_keeps_whole_corpus_scores():
+    index = _index()
+    rows, scores = index.search("prospecting crm")
+    assert rows.tolist() == [0, 1, 2]
+
+    for candidates in ([0, 2], np.array([1, 2]), range(1, 3)):
+        restricted, restricted_scores = index.search("prospecting crm", candidates)
+        keep = np.isin(rows, list(candidates))
+        assert restricted.tolist() == rows[keep].tolist()
+        assert np.allclose(restricted_scores, scores[keep])
+
+
+def test_scores_cover_appended_rows_after_a_base():
+    index = _index()
+    reopened = BM25Index.from_arrays(*index.arrays())
+    reopened.add(4, [("prospecting tools", 1)])
+    index.add(4, [("prospecting tools", 1)])
+    rows, scores = reopened.search("prospecting")
+    expected_rows, expected_scores = index.search("prospecting")
+    assert rows.tolist() == expected_rows.tolist() == [0, 2, 4]
+    assert np.allclose(scores, expected_scores)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import time
+
+from lead_store import SEED_LEADS, LeadStore, synthetic_leads
+from trends import TrendRollups
+
+
+def _store(count: int) -> LeadStore:
+    store = LeadStore(SEED_LEADS)
+    for lead in synthetic_leads(count):
+        store.add(lead)
+    return store
+
+
+def test_dashboard_reports_warming_until_the_backfill_finishes(monkeypatch):
+    store = _store(200)
+    rollups = TrendRollups(store)
+    started = []
+    monkeypatch.setattr(rollups, "start_backfill", lambda: started.append(True))
+
+    assert rollups.dashboard("30d") == {"time_range": "30d", "status": "warming", "leads": len(store)}
+    assert started
+
+
+def test_leads_and_conversions_during_the_backfill_are_counted():
+    store = _store(2000)
+    rollups = TrendRollups(store)
+    backfill = rollups._backfill
+
+    def slow_backfill(count):
+        # Arrivals while the store is being scanned
+        added = store.add(dict(store.lead(0), id="lead-during-backfill"))
+        rollups.record_conversions([store.lead(added)])
+        backfill(count)
+
+    rollups._backfill = slow_backfill
+    rollups.start_backfill()
+    for _ in range(500):
+        if rollups.status == "ready":
+            break
+        time.sleep(0.01)
+    assert rollups.status == "ready"
+
+    expected = TrendRollups(store)
+    expected._ensure_backfilled()
+    now = time.time()
+    day = int(now // 86400)
+    assert rollups.window(day, 400).leads == expected.window(day, 400).leads == len(store)
+    assert rollups.window(day, 400).conversions == 1
+    assert rollups.dashboard("90d", now)["status"] == "ready"
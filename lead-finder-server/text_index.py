@@ -0,0 +1,208 @@
+"""Full-text and fuzzy indexes for lead search.
+
+``BM25Index`` is an inverted index from terms to the rows containing them,
+with per-row term frequencies, ranked with Okapi BM25. A query only reads the
+posting lists of its own terms, so its cost depends on how many leads mention
+those terms rather than on the corpus size.
+
+``TrigramIndex`` matches short values such as job titles and locations
+approximately: "VP Sales" finds "VP of Sales" and "Maketing Director" finds
+"Marketing Director". Candidates come from trigram posting lists, so only
+values sharing a trigram with the query are compared.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple
+import math
+import re
+
+import numpy as np
+
+from columns import ArrayColumn, Postings
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "any", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is",
+    "it", "of", "on", "or", "our", "the", "this", "to", "us", "we", "with",
+})
+
+
+@lru_cache(maxsize=1 << 16)
+def stem(word: str) -> str:
+    """Strip common English suffixes so "funded" and "funding" share a term."""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    for suffix in ("ing", "ed", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[:-len(suffix)]
+    return word
+
+
+def words(text: str) -> List[str]:
+    """Lower-cased words of ``text``, without stop words."""
+    return [word for word in _WORD.findall(text.casefold()) if word not in STOPWORDS]
+
+
+@lru_cache(maxsize=1 << 14)
+def tokenize(text: str) -> Tuple[str, ...]:
+    """Index terms of ``text``: stemmed words without stop words.
+
+    Cached, since titles, locations, pain points and news items repeat across leads.
+    """
+    return tuple(stem(word) for word in words(text))
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of each word of ``text``, padded as in PostgreSQL's pg_trgm."""
+    grams: Set[str] = set()
+    for word in words(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class BM25Index:
+    """Inverted index over row-numbered documents, ranked with Okapi BM25.
+
+    Documents are added as ``(text, weight)`` fields; a term occurring in a
+    field of weight 2 counts twice, so matches in short, telling fields such
+    as pain points outrank a passing mention in free text.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._rows = Postings("I")
+        self._frequencies = Postings("H")
+        self._lengths = ArrayColumn("H")
+        self._total_length = 0
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> "BM25Index":
+        """Rebuild an index from the output of ``arrays`` (e.g. memory-mapped)."""
+        index = cls(meta["k1"], meta["b"])
+        index._rows = Postings("I", arrays["rows"], meta["spans"])
+        index._frequencies = Postings("H", arrays["frequencies"], meta["spans"])
+        index._lengths = ArrayColumn("H", arrays["lengths"])
+        index._total_length = meta["total_length"]
+        return index
+
+    def arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """The index as arrays plus JSON-serialisable metadata, for a snapshot."""
+        rows, spans = self._rows.arrays()
+        frequencies, _ = self._frequencies.arrays()
+        arrays = {"rows": rows, "frequencies": frequencies, "lengths": self._lengths.array()}
+        return arrays, {"k1": self.k1, "b": self.b, "total_length": self._total_length, "spans": spans}
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @property
+    def terms(self) -> int:
+        return len(self._rows)
+
+    def add(self, row: int, fields: Iterable[Tuple[str, int]]) -> None:
+        """Index the document of ``row``; rows must be added in order from 0."""
+        if row != len(self._lengths):
+            raise ValueError(f"Rows must be indexed in order; expected {len(self._lengths)}, got {row}")
+        counts: Dict[str, int] = {}
+        for text, weight in fields:
+            for term in tokenize(text):
+                counts[term] = counts.get(term, 0) + weight
+        for term, frequency in counts.items():
+            self._rows.append(term, row)
+            self._frequencies.append(term, min(frequency, 0xFFFF))
+        length = min(sum(counts.values()), 0xFFFF)
+        self._lengths.append(length)
+        self._total_length += length
+
+    def document_frequency(self, term: str) -> int:
+        return self._rows.count(term)
+
+    def search(self, query: str, rows: Sequence[int] | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the ascending rows matching any query term, and their BM25 scores.
+
+        ``rows``, if given, restricts the result to those (ascending) rows.
+        """
+        count = len(self)
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term in self._rows]
+        if not count or not terms:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        average_length = self._total_length / count
+        if rows is not None and not isinstance(rows, range):
+            rows = np.asarray(rows, dtype=np.intp)
+
+        hits: List[np.ndarray] = []
+        contributions: List[np.ndarray] = []
+        for term in terms:
+            term_rows = self._rows.get(term).astype(np.intp)
+            frequencies = self._frequencies.get(term).astype(np.float64)
+            df = len(term_rows)
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            if isinstance(rows, range):
+                keep = (term_rows >= rows.start) & (term_rows < rows.stop)
+                term_rows, frequencies = term_rows[keep], frequencies[keep]
+            elif rows is not None:
+                keep = np.isin(term_rows, rows, assume_unique=True)
+                term_rows, frequencies = term_rows[keep], frequencies[keep]
+            # Length normalisation only for the rows this term scores, not the whole corpus
+            norm = self.k1 * (1 - self.b + self.b * self._lengths.take(term_rows) / average_length)
+            hits.append(term_rows)
+            contributions.append(idf * frequencies * (self.k1 + 1) / (frequencies + norm))
+        if len(hits) == 1:
+            return hits[0], contributions[0]
+        matched, inverse = np.unique(np.concatenate(hits), return_inverse=True)
+        return matched, np.bincount(inverse, weights=np.concatenate(contributions))
+
+
+class TrigramIndex:
+    """Approximate lookup of short values by trigram similarity.
+
+    A value matches a query when the Jaccard similarity of their trigram sets
+    reaches ``threshold``, or when every word of the query occurs in the value
+    (so "Sales" matches "Head of Sales" and "VP Sales" matches "VP of Sales").
+    """
+
+    def __init__(self, threshold: float = 0.5) -> None:
+        self.threshold = threshold
+        self._values: List[str] = []
+        self._grams: List[int] = []
+        self._terms: List[FrozenSet[str]] = []
+        self._known: Set[str] = set()
+        self._postings: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, value: str) -> None:
+        if value in self._known:
+            return
+        self._known.add(value)
+        code = len(self._values)
+        grams = trigrams(value)
+        self._values.append(value)
+        self._grams.append(len(grams))
+        self._terms.append(frozenset(tokenize(value)))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(code)
+
+    def lookup(self, query: str) -> List[str]:
+        """Return the indexed values matching ``query``, most similar first."""
+        grams = trigrams(query)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for code in self._postings.get(gram, ()):
+                shared[code] = shared.get(code, 0) + 1
+        terms = frozenset(tokenize(query))
+        matches = []
+        for code, common in shared.items():
+            similarity = common / (len(grams) + self._grams[code] - common)
+            if similarity >= self.threshold or (terms and terms <= self._terms[code]):
+                matches.append((similarity, self._values[code]))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return [value for _, value in matches]
@@ -0,0 +1,349 @@
+"""Incrementally maintained lead trend rollups.
+
+``TrendRollups`` keeps one rollup per UTC day and one per 7-day block. A rollup
+holds exact lead, tier and conversion counts plus fixed-size sketches (see
+``sketches.py``): heavy hitters for industries and locations, and HyperLogLog
+distinct counts of companies and prospects. Rollups are backfilled from the
+lead store once, in a background thread so neither opening a memory-mapped
+store nor the event loop waits on a scan of every lead (dashboards report
+"warming" meanwhile), then updated as leads are added and converted. A dashboard
+merges whole weeks plus the odd days at its edges, so a 90-day window combines
+at most 18 rollups whatever the lead volume, and memory grows only with the
+days retained.
+
+A conversion is a lead accepted by a CRM export, counted once however often
+or to however many CRMs it is exported, and credited to the day the lead was
+discovered: the conversion rate of a window is then the share of the leads
+discovered in it that converted, and never exceeds 1. Its response time is the
+time from discovery to the first export.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+import math
+import threading
+import time
+
+import numpy as np
+
+from lead_metrics import SCORE_TIERS, score_tier
+from lead_store import LeadStore, normalize_key, parse_timestamp
+from sketches import HeavyHitters, HyperLogLog
+
+DAY = 86400
+WEEK = 7
+
+# Dashboard windows in days, and the days covered by each time-series point
+TIME_RANGES = {"7d": 7, "30d": 30, "90d": 90}
+SERIES_STEPS = {"7d": 1, "30d": 7, "90d": 7}
+
+TOP_VALUES = 3
+BREAKDOWN_VALUES = 10
+
+
+def _day(seconds: float) -> int:
+    return int(seconds // DAY)
+
+
+def _date(day: int) -> str:
+    return datetime.fromtimestamp(day * DAY, timezone.utc).date().isoformat()
+
+
+def _growth(current: int, previous: int) -> float:
+    return round((current - previous) / previous, 2) if previous else 0.0
+
+
+def _prospect_key(email: str, name: str) -> str:
+    """Identify a prospect by email, or by name when the email is unknown."""
+    return normalize_key(email or name)
+
+
+class Rollup:
+    """Aggregates of the lead and conversion events of one day or week."""
+
+    __slots__ = (
+        "leads", "tiers", "conversions", "response_seconds",
+        "industries", "locations", "companies", "prospects",
+    )
+
+    def __init__(self) -> None:
+        self.leads = 0
+        self.tiers: Dict[str, int] = {tier: 0 for tier, _ in SCORE_TIERS}
+        self.conversions = 0
+        self.response_seconds = 0.0
+        self.industries = HeavyHitters()
+        self.locations = HeavyHitters()
+        self.companies = HyperLogLog()
+        self.prospects = HyperLogLog()
+
+    def add_lead(self, lead: Dict[str, Any]) -> None:
+        """Fold one lead record in."""
+        self.leads += 1
+        self.tiers[score_tier(lead["lead_score"])] += 1
+        self.industries.add(lead["industry"])
+        self.locations.add(lead["location"])
+        self.companies.add(normalize_key(lead["company"]))
+        self.prospects.add(_prospect_key(lead["contact_info"]["email"], lead["prospect_name"]))
+
+    def merge(self, other: Rollup) -> None:
+        """Fold another rollup in."""
+        self.leads += other.leads
+        for tier, count in other.tiers.items():
+            self.tiers[tier] += count
+        self.conversions += other.conversions
+        self.response_seconds += other.response_seconds
+        self.industries.merge(other.industries)
+        self.locations.merge(other.locations)
+        self.companies.merge(other.companies)
+        self.prospects.merge(other.prospects)
+
+    @classmethod
+    def combine(cls, rollups: Sequence[Rollup]) -> Rollup:
+        """Merge many rollups in one pass."""
+        if not rollups:
+            return cls()
+        combined = cls.__new__(cls)
+        combined.leads = sum(rollup.leads for rollup in rollups)
+        combined.tiers = {tier: sum(rollup.tiers[tier] for rollup in rollups) for tier, _ in SCORE_TIERS}
+        combined.conversions = sum(rollup.conversions for rollup in rollups)
+        combined.response_seconds = sum(rollup.response_seconds for rollup in rollups)
+        combined.industries = HeavyHitters.combine([rollup.industries for rollup in rollups])
+        combined.locations = HeavyHitters.combine([rollup.locations for rollup in rollups])
+        precision = rollups[0].companies.precision
+        combined.companies = HyperLogLog.combine([rollup.companies for rollup in rollups], precision)
+        combined.prospects = HyperLogLog.combine([rollup.prospects for rollup in rollups], precision)
+        return combined
+
+
+class TrendRollups:
+    """Day and week rollups of a lead store, kept current as leads arrive and convert.
+
+    Rollups more than ``retention_days`` older than the newest day are dropped.
+    """
+
+    def __init__(self, store: LeadStore, retention_days: int = 400) -> None:
+        self.store = store
+        self.retention_days = retention_days
+        self._days: Dict[int, Rollup] = {}
+        self._weeks: Dict[int, Rollup] = {}
+        self._latest_day: int | None = None
+        self._backfilled = False
+        self._backfill_lock = threading.Lock()
+        self._backfill_thread: threading.Thread | None = None
+        # Rows the running backfill covers, and the leads added and conversions
+        # recorded after it started, applied once it finishes
+        self._backfill_rows: int | None = None
+        self._pending_rows: List[int] = []
+        self._pending_conversions: List[Tuple[List[Dict[str, Any]], float]] = []
+        self._pending_lock = threading.Lock()
+        self._converted: Set[str] = set()
+        self._conversion_lock = threading.Lock()
+        store.add_listener(self._on_add)
+
+    @property
+    def status(self) -> str:
+        """``ready`` once the rollups cover the whole store, ``warming`` while they are backfilled."""
+        return "ready" if self._backfilled else "warming"
+
+    def start_backfill(self) -> None:
+        """Backfill the rollups in a background thread, unless that has already started."""
+        with self._pending_lock:
+            if self._backfilled or self._backfill_thread is not None:
+                return
+            self._backfill_thread = threading.Thread(
+                target=self._ensure_backfilled, name="trend-backfill", daemon=True,
+            )
+        self._backfill_thread.start()
+
+    def _ensure_backfilled(self) -> None:
+        if not self._backfilled:
+            with self._backfill_lock:
+                if not self._backfilled:
+                    with self._pending_lock:
+                        rows = self._backfill_rows = len(self.store)
+                    self._backfill(rows)
+                    with self._pending_lock:
+                        for row in self._pending_rows:
+                            self._add_row(row)
+                        for leads, at in self._pending_conversions:
+                            self._convert(leads, at)
+                        self._pending_rows.clear()
+                        self._pending_conversions.clear()
+                        self._backfilled = True
+
+    def _rollups(self, day: int) -> Tuple[Rollup, Rollup]:
+        """Return the day and week rollups that events of ``day`` update."""
+        if self._latest_day is None or day > self._latest_day:
+            self._latest_day = day
+            self._prune()
+        rollup = self._days.get(day)
+        if rollup is None:
+            rollup = self._days[day] = Rollup()
+        week = self._weeks.get(day // WEEK)
+        if week is None:
+            week = self._weeks[day // WEEK] = Rollup()
+        return rollup, week
+
+    def _prune(self) -> None:
+        oldest = self._latest_day - self.retention_days
+        for day in [day for day in self._days if day < oldest]:
+            del self._days[day]
+        for week in [week for week in self._weeks if (week + 1) * WEEK <= oldest]:
+            del self._weeks[week]
+
+    def _backfill(self, count: int) -> None:
+        """Build the rollups of the first ``count`` leads of the store, one day at a time."""
+        store = self.store
+        days = (store.numeric("discovered_at")[:count] // DAY).astype(np.int64)
+        if not len(days):
+            return
+        scores = store.numeric("lead_score")[:count]
+        order = np.argsort(days, kind="stable")
+        bounds = np.flatnonzero(np.diff(days[order])) + 1
+        for rows in np.split(order, bounds):
+            rollup, week = self._rollups(int(days[rows[0]]))
+            rollup.leads += len(rows)
+            remaining = np.ones(len(rows), dtype=bool)
+            day_scores = scores[rows]
+            for tier, lower in SCORE_TIERS:
+                in_tier = remaining & (day_scores >= lower)
+                rollup.tiers[tier] += int(in_tier.sum())
+                remaining &= ~in_tier
+            for industry, count in store.value_counts("industry", rows).items():
+                rollup.industries.add(industry, count)
+            for location, count in store.value_counts("location", rows).items():
+                rollup.locations.add(location, count)
+            for company in store.value_counts("company", rows):
+                rollup.companies.add(normalize_key(company))
+            emails = store.text_values("email", rows)
+            names = store.text_values("prospect_name", rows)
+            for email, name in zip(emails, names):
+                rollup.prospects.add(_prospect_key(email, name))
+            week.merge(rollup)
+
+    def _on_add(self, row: int) -> None:
+        if not self._backfilled:
+            with self._pending_lock:
+                if not self._backfilled:
+                    # Rows before the backfill's are counted by it
+                    if self._backfill_rows is not None and row >= self._backfill_rows:
+                        self._pending_rows.append(row)
+                    return
+        self._add_row(row)
+
+    def _add_row(self, row: int) -> None:
+        lead = self.store.lead(row)
+        for rollup in self._rollups(_day(parse_timestamp(lead["discovered_at"]))):
+            rollup.add_lead(lead)
+
+    def record_conversions(self, leads: Iterable[Dict[str, Any]], at: float | None = None) -> None:
+        """Record ``leads`` as converted at ``at`` (default now).
+
+        Leads already converted are skipped. Each conversion is credited to the
+        day its lead was discovered; leads older than the retained days are not counted.
+        """
+        at = time.time() if at is None else at
+        if not self._backfilled:
+            with self._pending_lock:
+                if not self._backfilled:
+                    self._pending_conversions.append((list(leads), at))
+                    return
+        self._convert(leads, at)
+
+    def _convert(self, leads: Iterable[Dict[str, Any]], at: float) -> None:
+        with self._conversion_lock:
+            for lead in leads:
+                if lead["id"] in self._converted:
+                    continue
+                self._converted.add(lead["id"])
+                discovered = parse_timestamp(lead.get("discovered_at"))
+                day = _day(discovered)
+                if self._latest_day is not None and day < self._latest_day - self.retention_days:
+                    continue
+                for rollup in self._rollups(day):
+                    rollup.conversions += 1
+                    rollup.response_seconds += max(at - discovered, 0.0)
+
+    def _covering(self, end_day: int, days: int) -> List[Rollup]:
+        """The rollups covering a window: whole weeks, plus single days at its edges."""
+        rollups = []
+        day = end_day - days + 1
+        while day <= end_day:
+            if day % WEEK == 0 and day + WEEK - 1 <= end_day:
+                rollup = self._weeks.get(day // WEEK)
+                day += WEEK
+            else:
+                rollup = self._days.get(day)
+                day += 1
+            if rollup is not None:
+                rollups.append(rollup)
+        return rollups
+
+    def window(self, end_day: int, days: int) -> Rollup:
+        """Combine the rollups of the ``days`` days ending with ``end_day``."""
+        self._ensure_backfilled()
+        return Rollup.combine(self._covering(end_day, days))
+
+    def _counts(self, end_day: int, days: int) -> Tuple[int, int]:
+        """Lead and conversion counts of a window, without merging sketches."""
+        rollups = self._covering(end_day, days)
+        return sum(rollup.leads for rollup in rollups), sum(rollup.conversions for rollup in rollups)
+
+    def dashboard(self, time_range: str, now: float | None = None) -> Dict[str, Any]:
+        """Render the analytics dashboard for a ``TIME_RANGES`` window ending today.
+
+        Until the backfill has finished this only reports ``status: "warming"``
+        (starting the backfill if nothing has), rather than blocking on it.
+        """
+        if not self._backfilled:
+            self.start_backfill()
+            return {"time_range": time_range, "status": "warming", "leads": len(self.store)}
+        days = TIME_RANGES[time_range]
+        today = _day(time.time() if now is None else now)
+        window = self.window(today, days)
+
+        step = SERIES_STEPS[time_range]
+        start_day = today - days + 1
+        series: List[Dict[str, Any]] = []
+        for point in range(math.ceil(days / step)):
+            end = today - point * step
+            start = max(start_day, end - step + 1)
+            period_leads, period_conversions = self._counts(end, end - start + 1)
+            series.append({"date": _date(start), "leads": period_leads, "conversions": period_conversions})
+        series.reverse()
+
+        industries = window.industries.top(BREAKDOWN_VALUES)
+        locations = window.locations.top(BREAKDOWN_VALUES)
+        sketch = window.industries.sketch
+        response_days = window.response_seconds / window.conversions / DAY if window.conversions else None
+        return {
+            "time_range": time_range,
+            "status": "ready",
+            "analytics": {
+                "total_leads": window.leads,
+                "hot_leads": window.tiers["hot"],
+                "warm_leads": window.tiers["warm"],
+                "cold_leads": window.tiers["cold"],
+                # Sketch estimates can exceed the exact lead count they are drawn from
+                "unique_companies": min(window.companies.estimate(), window.leads),
+                "unique_prospects": min(window.prospects.estimate(), window.leads),
+                "conversion_rate": round(min(window.conversions / window.leads, 1.0), 3) if window.leads else 0.0,
+                "avg_response_time": f"{response_days:.1f} days" if response_days is not None else "n/a",
+            },
+            "trends": {
+                "weekly_growth": _growth(self._counts(today, 7)[0], self._counts(today - 7, 7)[0]),
+                "monthly_growth": _growth(self._counts(today, 30)[0], self._counts(today - 30, 30)[0]),
+                "top_industries": [name for name, _ in industries[:TOP_VALUES]],
+                "top_locations": [name for name, _ in locations[:TOP_VALUES]],
+                "industry_breakdown": dict(industries),
+                "geographic_distribution": dict(locations),
+            },
+            "time_series": series,
+            "accuracy": {
+                "breakdown_max_overcount": math.ceil(sketch.error_bound),
+                "breakdown_confidence": round(1 - math.exp(-sketch.depth), 3),
+                "unique_relative_error": round(window.companies.relative_error, 3),
+            },
+        }
@@ -0,0 +1,336 @@
+"""Semantic intent matching over what prospects wrote.
+
+Each lead's post and company news are embedded once, when the lead is
+indexed, as a hashed-feature vector: stemmed words, word pairs and intent
+concepts (so "actively hiring" and "expanding the team" share a *growth*
+feature) are hashed into ``DIMENSIONS`` signed buckets and L2-normalized.
+Embedding needs no model download and runs in microseconds per text.
+
+``VectorIndex`` answers cosine top-k queries, one row per intent signal in a
+single matrix product. Small candidate sets are scored exactly. Otherwise an
+IVF index is used: vectors are grouped by their nearest of ``sqrt(n)``
+k-means centroids, stored contiguously per group, and a query scans only the
+``nprobe`` groups closest to it.
+
+Vectors are stored quantized to int8 (a quarter of float32, and far cheaper
+to convert back than float16), which changes cosines by well under 0.01.
+Saved indexes are a directory of ``.npy`` files that are memory-mapped on
+load, so startup does not re-embed the corpus and processes share the page
+cache. Leads added after the index was saved are embedded into an in-memory
+tail that is scored exactly.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+import json
+import logging
+import os
+import shutil
+import zlib
+
+import numpy as np
+
+from lead_store import LeadStore
+from snapshot import exclusive
+from text_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 128
+# Bumped whenever embeddings change, so saved indexes are rebuilt
+EMBEDDING_VERSION = 1
+# int8 quantization scale of unit-vector components
+_SCALE = 127.0
+
+# Intent concepts, keyed by stemmed word; a word also contributes its concept feature
+CONCEPTS = {
+    **dict.fromkeys(("hir", "hire", "recruit", "headcount", "expand", "expansion", "grow", "growth",
+                     "scal", "scale", "onboard", "team", "office"), "growth"),
+    **dict.fromkeys(("fund", "funded", "rais", "raise", "investor", "invest", "investment", "series",
+                     "round", "seed", "backed"), "funding"),
+    **dict.fromkeys(("look", "seek", "need", "recommendation", "evaluat", "evaluate", "switch", "vendor",
+                     "alternative", "demo", "trial", "buy", "purchas", "shop", "quote"), "buying"),
+    **dict.fromkeys(("struggl", "struggle", "kill", "fix", "slow", "manual", "frustrat", "pain",
+                     "problem", "broken", "silo"), "pain"),
+    **dict.fromkeys(("launch", "release", "product", "update", "partnership", "announc"), "launch"),
+}
+
+_CONCEPT_WEIGHT = 1.0
+_BIGRAM_WEIGHT = 0.5
+
+
+def _features(text: str) -> Dict[str, float]:
+    terms = tokenize(text)
+    features: Dict[str, float] = {}
+    for term in terms:
+        features[term] = features.get(term, 0.0) + 1.0
+        concept = CONCEPTS.get(term)
+        if concept:
+            key = f"concept:{concept}"
+            features[key] = features.get(key, 0.0) + _CONCEPT_WEIGHT
+    for first, second in zip(terms, terms[1:]):
+        key = f"{first} {second}"
+        features[key] = features.get(key, 0.0) + _BIGRAM_WEIGHT
+    return features
+
+
+def embed(texts: Sequence[str]) -> np.ndarray:
+    """Embed ``texts`` as unit-length ``(len(texts), DIMENSIONS)`` float32 vectors.
+
+    Features are hashed with CRC-32 rather than ``hash()`` so vectors saved by
+    one process match queries embedded by another. Texts without features get
+    a zero vector.
+    """
+    vectors = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+    known: Dict[str, int] = {}
+    for i, text in enumerate(texts):
+        first = known.get(text)
+        if first is not None:
+            vectors[i] = vectors[first]
+            continue
+        known[text] = i
+        for feature, weight in _features(text).items():
+            h = zlib.crc32(feature.encode())
+            vectors[i, h % DIMENSIONS] += weight if h & 0x80000000 else -weight
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def lead_texts(store: LeadStore, rows: Iterable[int]) -> List[str]:
+    """The text embedded for each lead: its post and its company's news."""
+    rows = list(rows)
+    contents = store.text_values("source_content", rows)
+    news = store.list_values("recent_news", rows)
+    return [" ".join([content, *items]) for content, items in zip(contents, news)]
+
+
+def quantize(vectors: np.ndarray) -> np.ndarray:
+    """Quantize unit vectors to int8."""
+    return np.rint(vectors * _SCALE).astype(np.int8)
+
+
+def _kmeans(vectors: np.ndarray, lists: int, iterations: int = 8, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids of unit vectors, trained on a sample."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), lists * 64), replace=False)].astype(np.float32)
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # Empty clusters keep their previous centroid
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 16384) -> np.ndarray:
+    """Index of the nearest centroid of every vector, computed in chunks."""
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        block = vectors[start:start + chunk].astype(np.float32)
+        assignment[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+class VectorIndex:
+    """Cosine top-k search over lead embeddings, with an IVF partition for large corpora.
+
+    Rows ``0..count-1`` live in the (possibly memory-mapped) IVF arrays; rows
+    added later live in the exact-scored tail.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        rows: np.ndarray,
+        offsets: np.ndarray,
+        centroids: np.ndarray,
+        nprobe: int = 32,
+        exact_limit: int = 50_000,
+    ) -> None:
+        self.vectors = vectors        # quantized, grouped by list
+        self.rows = rows              # store row of each vector
+        self.offsets = offsets        # list i spans vectors[offsets[i]:offsets[i + 1]]
+        self.centroids = centroids
+        self.nprobe = nprobe
+        self.exact_limit = exact_limit
+        self._positions = np.empty(len(rows), dtype=np.int32)
+        self._positions[rows] = np.arange(len(rows), dtype=np.int32)
+        self._tail: List[np.ndarray] = []
+        self._tail_matrix: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.rows) + len(self._tail)
+
+    @property
+    def count(self) -> int:
+        """Rows held by the IVF arrays."""
+        return len(self.rows)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, **options) -> VectorIndex:
+        """Partition the embeddings of rows ``0..len(vectors)-1``."""
+        lists = max(1, min(1024, int(np.sqrt(len(vectors)))))
+        if len(vectors):
+            centroids = _kmeans(vectors, lists)
+            assignment = _assign(vectors, centroids)
+        else:
+            centroids = np.zeros((1, DIMENSIONS), dtype=np.float32)
+            assignment = np.empty(0, dtype=np.int32)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=len(centroids)), out=offsets[1:])
+        return cls(
+            quantize(vectors[order]),
+            order.astype(np.int32),
+            offsets,
+            centroids.astype(np.float32),
+            **options,
+        )
+
+    def add(self, vectors: np.ndarray) -> None:
+        """Append the embeddings of the next rows to the tail."""
+        self._tail.extend(quantize(vectors))
+        self._tail_matrix = None
+
+    def save(self, path: str, fingerprint: Dict[str, object]) -> None:
+        """Write the IVF arrays to directory ``path``; the tail is not saved."""
+        staging = f"{path}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in ("vectors", "rows", "offsets", "centroids"):
+            np.save(os.path.join(staging, f"{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(staging, "meta.json"), "w") as meta:
+            json.dump({"version": EMBEDDING_VERSION, "dimensions": DIMENSIONS, **fingerprint}, meta)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(staging, path)
+
+    @classmethod
+    def load(cls, path: str, **options) -> Tuple[VectorIndex, Dict[str, object]]:
+        """Memory-map a saved index, returning it with its fingerprint."""
+        with open(os.path.join(path, "meta.json")) as meta:
+            fingerprint = json.load(meta)
+        if fingerprint.get("version") != EMBEDDING_VERSION or fingerprint.get("dimensions") != DIMENSIONS:
+            raise ValueError("Saved vector index uses a different embedding")
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ("vectors", "rows", "offsets", "centroids")
+        }
+        return cls(**arrays, **options), fingerprint
+
+    def _tail_vectors(self) -> np.ndarray:
+        if self._tail_matrix is None or len(self._tail_matrix) != len(self._tail):
+            tail = self._tail
+            self._tail_matrix = np.stack(tail) if tail else np.empty((0, DIMENSIONS), dtype=np.int8)
+        return self._tail_matrix
+
+    def _vectors_of(self, rows: np.ndarray) -> np.ndarray:
+        """Gather the vectors of ascending ``rows``."""
+        base = rows[rows < self.count]
+        vectors = np.asarray(self.vectors[self._positions[base]])
+        if len(base) < len(rows):
+            vectors = np.concatenate([vectors, self._tail_vectors()[rows[len(base):] - self.count]])
+        return vectors
+
+    def _probe(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and vectors of the ``nprobe`` lists nearest to any query, plus the tail."""
+        lists = self.centroids @ queries.T
+        nprobe = min(self.nprobe, len(self.centroids))
+        probed = np.unique(np.argpartition(-lists, nprobe - 1, axis=0)[:nprobe].ravel())
+        spans = [(int(self.offsets[i]), int(self.offsets[i + 1])) for i in probed]
+        rows = [np.asarray(self.rows[start:stop]) for start, stop in spans]
+        vectors = [np.asarray(self.vectors[start:stop]) for start, stop in spans]
+        rows.append(np.arange(self.count, len(self), dtype=np.int32))
+        vectors.append(self._tail_vectors())
+        return np.concatenate(rows).astype(np.intp), np.concatenate(vectors)
+
+    def search(
+        self,
+        queries: Sequence[str],
+        rows: Sequence[int] | None = None,
+        k: int = 1000,
+        min_similarity: float = 0.25,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return up to ``k`` rows most similar to any of ``queries``, ascending, with their similarity.
+
+        A row's similarity is its best cosine over the queries; rows below
+        ``min_similarity`` are left out. ``rows``, if given, restricts the
+        result to those (ascending) rows.
+        """
+        query_vectors = embed(list(queries))
+        query_vectors = query_vectors[np.linalg.norm(query_vectors, axis=1) > 0]
+        if not len(query_vectors) or not len(self):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        if isinstance(rows, range):
+            start, stop = max(rows.start, 0), min(rows.stop, len(self))
+        else:
+            start, stop = 0, len(self)
+        size = stop - start if rows is None or isinstance(rows, range) else len(rows)
+        if size <= self.exact_limit:
+            if rows is None or isinstance(rows, range):
+                candidates = np.arange(start, stop, dtype=np.intp)
+            else:
+                candidates = np.asarray(rows, dtype=np.intp)
+            vectors = self._vectors_of(candidates)
+        else:
+            candidates, vectors = self._probe(query_vectors)
+            if rows is not None and not isinstance(rows, range):
+                keep = np.isin(candidates, np.asarray(rows, dtype=np.intp))
+                candidates, vectors = candidates[keep], vectors[keep]
+            elif isinstance(rows, range):
+                keep = (candidates >= start) & (candidates < stop)
+                candidates, vectors = candidates[keep], vectors[keep]
+
+        similarity = (vectors.astype(np.float32) @ (query_vectors.T / _SCALE)).max(axis=1)
+        selected = np.flatnonzero(similarity >= min_similarity)
+        if len(selected) > k:
+            selected = selected[np.argpartition(-similarity[selected], k - 1)[:k]]
+        order = np.argsort(candidates[selected], kind="stable")
+        selected = selected[order]
+        return candidates[selected], similarity[selected].astype(np.float64)
+
+
+def _fingerprint(store: LeadStore, count: int) -> Dict[str, object]:
+    last_id = store.text_values("id", [count - 1])[0] if count else None
+    return {"count": count, "last_id": last_id}
+
+
+def open_vector_index(store: LeadStore, path: str | None = None, **options) -> VectorIndex:
+    """Load the saved index at ``path`` if it matches ``store``, else build (and save) one.
+
+    The index follows the store: leads added later are embedded as they arrive.
+    Processes opening the same ``path`` together build it only once.
+    """
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with exclusive(f"{path}.lock"):
+            index = _load_or_build(store, path, options)
+    else:
+        index = _load_or_build(store, None, options)
+    if index.count < len(store):
+        index.add(embed(lead_texts(store, range(index.count, len(store)))))
+    store.add_listener(lambda row: index.add(embed(lead_texts(store, [row]))))
+    return index
+
+
+def _load_or_build(store: LeadStore, path: str | None, options: Dict) -> VectorIndex:
+    index = None
+    if path and os.path.isdir(path):
+        try:
+            index, fingerprint = VectorIndex.load(path, **options)
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring vector index at %s: %s", path, exc)
+        else:
+            if fingerprint != {"version": EMBEDDING_VERSION, "dimensions": DIMENSIONS,
+                               **_fingerprint(store, min(index.count, len(store)))} or index.count > len(store):
+                logger.info("Vector index at %s is out of date; rebuilding", path)
+                index = None
+    if index is None:
+        index = VectorIndex.build(embed(lead_texts(store, range(len(store)))), **options)
+        if path:
+            index.save(path, _fingerprint(store, index.count))
+    return index
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { createRoot } from 'react-dom/client';
 import { useWidgetProps } from '../shared/use-widget-props';
 import { useWebplusGlobal } from '../shared/use-webplus-global';
@@ -17,27 +17,69 @@ interface CRMExportData {
     fields: string[];
     automation: string[];
   };
-  export_status: string;
+  export_status: 'queued' | 'completed' | 'partial' | 'failed';
+  export_result: {
+    exported: number;
+    failed: number;
+    missing: number;
+    tasks_created: number;
+    errors: { lead_ids: string[]; error: string }[];
+  } | null;
   lead_ids: string[];
+  job?: ExportJob;
 }
 
+interface ExportJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled';
+  progress: { done: number; total: number | null; fraction: number | null };
+  error: string | null;
+}
+
+const POLL_INTERVAL_MS = 2000;
+
 function CRMExportApp() {
-  const toolOutput = useWidgetProps<CRMExportData>();
+  const initialOutput = useWidgetProps<CRMExportData>();
   const theme = useWebplusGlobal('theme');
   const [exporting, setExporting] = useState(false);
-  const [exported, setExported] = useState(false);
+  const [toolOutput, setToolOutput] = useState(initialOutput);
+  
+  useEffect(() => setToolOutput(initialOutput), [initialOutput]);
+  
+  // Large exports run as background jobs; poll until the job finishes
+  const job = toolOutput?.job;
+  const jobPending = job?.status === 'queued' || job?.status === 'running';
+  useEffect(() => {
+    if (!job || !jobPending) return;
+    const timer = setInterval(async () => {
+      const response = await window.openai?.callTool?.('get-job-status', { job_id: job.job_id });
+      const latest = response?.structuredContent as Partial<CRMExportData> | undefined;
+      if (latest?.job) {
+        setToolOutput(previous => ({ ...previous, ...latest } as CRMExportData));
+      }
+    }, POLL_INTERVAL_MS);
+    return () => clearInterval(timer);
+  }, [job?.job_id, jobPending]);
   
   const config = toolOutput?.export_config;
   const options = toolOutput?.export_options;
+  const result = toolOutput?.export_result;
+  const status = toolOutput?.export_status;
   const leadIds = toolOutput?.lead_ids ?? [];
   
-  const handleExport = async () => {
+  const handleRetry = async () => {
+    if (!config) return;
     setExporting(true);
-    // Simulate export
-    setTimeout(() => {
+    try {
+      await window.openai?.callTool?.('export-to-crm', {
+        lead_ids: leadIds,
+        crm_system: config.crm_system,
+        create_tasks: config.create_tasks,
+        set_reminders: config.set_reminders
+      });
+    } finally {
       setExporting(false);
-      setExported(true);
-    }, 2000);
+    }
   };
   
   if (!config || !options) {
@@ -60,7 +102,7 @@ function CRMExportApp() {
         <div className="bg-blue-50 dark:bg-blue-900/20 rounded-lg p-4 mb-6">
           <h3 className="font-semibold text-gray-900 dark:text-gray-100 mb-2">Export Summary</h3>
           <div className="space-y-1 text-sm text-gray-600 dark:text-gray-400">
-            <p>• {config.lead_count} leads ready for export</p>
+            <p>• {config.lead_count} leads selected for export</p>
             <p>• Target CRM: {config.crm_system.charAt(0).toUpperCase() + config.crm_system.slice(1)}</p>
             <p>• Create follow-up tasks: {config.create_tasks ? 'Yes' : 'No'}</p>
             <p>• Set reminders: {config.set_reminders ? 'Yes' : 'No'}</p>
@@ -68,38 +110,79 @@ function CRMExportApp() {
         </div>
         
         {/* Export Status */}
-        {exported ? (
+        {jobPending && job ? (
+          <div className="bg-blue-50 dark:bg-blue-900/20 border border-blue-200 dark:border-blue-800 rounded-lg p-4 mb-6">
+            <div className="flex items-center mb-2">
+              <div className="inline-block animate-spin rounded-full h-4 w-4 border-b-2 border-blue-600 mr-2"></div>
+              <span className="text-blue-900 dark:text-blue-100 font-medium">
+                {job.status === 'queued'
+                  ? 'Export queued...'
+                  : `Exporting... ${job.progress.done} of ${job.progress.total ?? config.lead_count} leads`}
+              </span>
+            </div>
+            <div className="w-full bg-blue-100 dark:bg-blue-900 rounded-full h-2">
+              <div
+                className="bg-blue-600 h-2 rounded-full"
+                style={{ width: `${Math.round((job.progress.fraction ?? 0) * 100)}%` }}
+              ></div>
+            </div>
+          </div>
+        ) : job && (job.status === 'failed' || job.status === 'cancelled') ? (
+          <div className="bg-red-50 dark:bg-red-900/20 border border-red-200 dark:border-red-800 rounded-lg p-4 mb-6">
+            <div className="flex items-center">
+              <AlertCircle className="w-5 h-5 text-red-600 mr-2" />
+              <span className="text-red-900 dark:text-red-100 font-medium">
+                Export {job.status}{job.error ? `: ${job.error}` : ''}
+              </span>
+            </div>
+          </div>
+        ) : status === 'completed' && result ? (
           <div className="bg-green-50 dark:bg-green-900/20 border border-green-200 dark:border-green-800 rounded-lg p-4 mb-6">
             <div className="flex items-center">
               <CheckCircle className="w-5 h-5 text-green-600 mr-2" />
               <span className="text-green-900 dark:text-green-100 font-medium">
-                Successfully exported {config.lead_count} leads to {config.crm_system}
+                Successfully exported {result.exported} leads to {config.crm_system}
+                {config.create_tasks ? ` with ${result.tasks_created} follow-up tasks` : ''}
               </span>
             </div>
           </div>
-        ) : (
-          <button
-            onClick={handleExport}
-            disabled={exporting}
-            className={`w-full py-3 px-4 rounded-lg font-medium ${
-              exporting
-                ? 'bg-gray-300 text-gray-500 cursor-not-allowed'
-                : 'bg-blue-600 text-white hover:bg-blue-700'
-            }`}
-          >
-            {exporting ? (
-              <>
-                <div className="inline-block animate-spin rounded-full h-4 w-4 border-b-2 border-white mr-2"></div>
-                Exporting...
-              </>
-            ) : (
-              <>
-                <Download className="w-4 h-4 inline mr-2" />
-                Export to {config.crm_system.charAt(0).toUpperCase() + config.crm_system.slice(1)}
-              </>
+        ) : result ? (
+          <div className="bg-amber-50 dark:bg-amber-900/20 border border-amber-200 dark:border-amber-800 rounded-lg p-4 mb-6">
+            <div className="flex items-center mb-2">
+              <AlertCircle className="w-5 h-5 text-amber-600 mr-2" />
+              <span className="text-amber-900 dark:text-amber-100 font-medium">
+                Exported {result.exported} of {config.lead_count} leads
+                ({result.failed} rejected, {result.missing} not found)
+              </span>
+            </div>
+            {result.errors.slice(0, 3).map((error, index) => (
+              <p key={index} className="text-sm text-amber-800 dark:text-amber-200">• {error.error}</p>
+            ))}
+            {result.failed > 0 && (
+              <button
+                onClick={handleRetry}
+                disabled={exporting}
+                className={`mt-3 w-full py-3 px-4 rounded-lg font-medium ${
+                  exporting
+                    ? 'bg-gray-300 text-gray-500 cursor-not-allowed'
+                    : 'bg-blue-600 text-white hover:bg-blue-700'
+                }`}
+              >
+                {exporting ? (
+                  <>
+                    <div className="inline-block animate-spin rounded-full h-4 w-4 border-b-2 border-white mr-2"></div>
+                    Exporting...
+                  </>
+                ) : (
+                  <>
+                    <Download className="w-4 h-4 inline mr-2" />
+                    Retry export to {config.crm_system.charAt(0).toUpperCase() + config.crm_system.slice(1)}
+                  </>
+                )}
+              </button>
             )}
-          </button>
-        )}
+          </div>
+        ) : null}
         
         {/* Available Options */}
         <div className="mt-6 space-y-4">
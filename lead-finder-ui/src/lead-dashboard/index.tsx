@@ -10,6 +10,8 @@ interface DashboardData {
     hot_leads: number;
     warm_leads: number;
     cold_leads: number;
+    unique_companies?: number;
+    unique_prospects?: number;
     conversion_rate: number;
     avg_response_time: string;
   };
@@ -18,6 +20,8 @@ interface DashboardData {
     monthly_growth: number;
     top_industries: string[];
     top_locations: string[];
+    industry_breakdown?: Record<string, number>;
+    geographic_distribution?: Record<string, number>;
   };
   time_series?: Array<{
     date: string;
@@ -56,6 +56,7 @@ export type RequestDisplayMode = (args: { mode: DisplayMode }) => Promise<{
 
 export type CallToolResponse = {
   result: string;
+  structuredContent?: UnknownObject;
 };
 
 export type CallTool = (
@@ -177,8 +178,12 @@ export interface Lead {
   source_platform: string;
   source_url: string;
   source_content?: string;
+  // Only on leads merged from several leads of the same prospect
+  source_platforms?: string[];
+  merged_lead_ids?: string[];
   lead_score: number;
-  score_breakdown: {
+  // Fields beyond the compact_list view are only present in richer output modes
+  score_breakdown?: {
     intent_strength: number;
     company_fit: number;
     role_relevance: number;
@@ -186,12 +191,12 @@ export interface Lead {
     timing_signals: number;
   };
   intent_analysis: {
-    has_intent: boolean;
-    confidence: number;
+    has_intent?: boolean;
+    confidence?: number;
     intent_level: string;
-    urgency_level: string;
-    solution_seeking: string[];
-    pain_points: string[];
+    urgency_level?: string;
+    solution_seeking?: string[];
+    pain_points?: string[];
   };
   contact_info?: {
     email?: string;